@@ -4,10 +4,34 @@ Venice.ai API integration for document processing.
 This module handles:
 - API client implementation
 - Think tag processing
-- Response streaming
+- Response streaming and non-streaming completions
+- Response caching
+- Adaptive concurrency control
+- RPM/TPM rate limiting
+- Hedged requests
+- Load balancing across endpoints
+- Circuit breaking
 """
 
-from .client import VeniceClient
+from .balancer import Endpoint, EndpointPool
+from .breaker import CircuitBreaker, CircuitOpenError
+from .cache import ResponseCache
+from .client import Completion, VeniceClient
+from .concurrency import ConcurrencyGovernor
 from .handlers import ThinkTagHandler
+from .hedging import HedgingPolicy
+from .ratelimit import RateLimiter
 
-__all__ = ["VeniceClient", "ThinkTagHandler"]
+__all__ = [
+    "VeniceClient",
+    "Completion",
+    "ThinkTagHandler",
+    "ResponseCache",
+    "ConcurrencyGovernor",
+    "RateLimiter",
+    "HedgingPolicy",
+    "Endpoint",
+    "EndpointPool",
+    "CircuitBreaker",
+    "CircuitOpenError"
+]
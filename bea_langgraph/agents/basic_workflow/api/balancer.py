@@ -0,0 +1,208 @@
+"""
+Latency-aware load balancing across API endpoints.
+
+This module spreads requests over several OpenAI-compatible endpoints:
+- Per-endpoint weights, EWMA latency, error rate and in-flight counts
+- Power-of-two-choices selection by expected cost
+- Ejection of unhealthy endpoints with single-request probes to restore them
+"""
+
+import random
+import time
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+
+class Endpoint:
+    """One API endpoint and its health statistics."""
+
+    def __init__(self, url: str, weight: float = 1.0, api_key: Optional[str] = None):
+        """Initialize an endpoint.
+
+        Args:
+            url: Base URL of the endpoint
+            weight: Relative share of traffic the endpoint should receive
+            api_key: Key for this endpoint (None uses the client's key)
+        """
+        if weight <= 0:
+            raise ValueError("weight must be positive")
+        self.url = url.rstrip("/")
+        self.weight = weight
+        self.api_key = api_key
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.ejections = 0
+        self.ejected_until: Optional[float] = None
+        self.probing = False
+        self._backoff = 0
+
+    def cost(self, default_latency: float) -> float:
+        """Estimate the cost of sending the next request to this endpoint."""
+        latency = self.latency if self.latency is not None else default_latency
+        return latency * (self.in_flight + 1) / self.weight / max(0.05, 1.0 - self.error_rate)
+
+    def stats(self) -> Dict[str, object]:
+        """Get the endpoint's health statistics."""
+        return {
+            "url": self.url,
+            "weight": self.weight,
+            "latency": self.latency,
+            "error_rate": self.error_rate,
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "failures": self.failures,
+            "ejections": self.ejections,
+            "ejected": self.ejected_until is not None
+        }
+
+
+EndpointSpec = Union[str, Tuple[str, float], Endpoint]
+
+
+class EndpointPool:
+    """Power-of-two-choices balancer with outlier ejection.
+
+    Two healthy endpoints are sampled in proportion to their weights and the
+    one with the lower expected cost (latency times queue length, scaled by
+    weight and error rate) is chosen. An endpoint that fails repeatedly or
+    whose error rate crosses the threshold is ejected for a backoff period,
+    after which a single probe request decides whether it rejoins the pool.
+    """
+
+    def __init__(
+        self,
+        endpoints: Sequence[EndpointSpec],
+        alpha: float = 0.3,
+        max_error_rate: float = 0.5,
+        max_consecutive_failures: int = 3,
+        eject_duration: float = 10.0,
+        max_eject_duration: float = 300.0
+    ):
+        """Initialize the pool.
+
+        Args:
+            endpoints: URLs, (url, weight) pairs or Endpoint objects
+            alpha: Smoothing factor for latency and error rate averages
+            max_error_rate: Error rate above which an endpoint is ejected
+            max_consecutive_failures: Failures in a row that eject an endpoint
+            eject_duration: Seconds of the first ejection
+            max_eject_duration: Upper bound as ejections double in length
+        """
+        if not endpoints:
+            raise ValueError("At least one endpoint is required")
+        self.endpoints: List[Endpoint] = []
+        for spec in endpoints:
+            if isinstance(spec, Endpoint):
+                self.endpoints.append(spec)
+            elif isinstance(spec, str):
+                self.endpoints.append(Endpoint(spec))
+            else:
+                self.endpoints.append(Endpoint(*spec))
+        self.alpha = alpha
+        self.max_error_rate = max_error_rate
+        self.max_consecutive_failures = max_consecutive_failures
+        self.eject_duration = eject_duration
+        self.max_eject_duration = max_eject_duration
+
+    @property
+    def stats(self) -> List[Dict[str, object]]:
+        """Get the health statistics of every endpoint."""
+        return [endpoint.stats() for endpoint in self.endpoints]
+
+    def acquire(self) -> Endpoint:
+        """Choose an endpoint for the next request and count it in flight."""
+        endpoint = self._choose()
+        endpoint.in_flight += 1
+        endpoint.requests += 1
+        return endpoint
+
+    def release(self, endpoint: Endpoint, latency: Optional[float], failed: bool) -> None:
+        """Record the outcome of a request sent to an endpoint.
+
+        Args:
+            endpoint: Endpoint returned by acquire
+            latency: Seconds to response headers, or None if none arrived
+            failed: Whether the request failed because of the endpoint
+        """
+        endpoint.in_flight -= 1
+        endpoint.error_rate += self.alpha * ((1.0 if failed else 0.0) - endpoint.error_rate)
+        if latency is not None:
+            if endpoint.latency is None:
+                endpoint.latency = latency
+            else:
+                endpoint.latency += self.alpha * (latency - endpoint.latency)
+
+        if failed:
+            endpoint.failures += 1
+            endpoint.consecutive_failures += 1
+            if (
+                endpoint.probing
+                or endpoint.consecutive_failures >= self.max_consecutive_failures
+                or endpoint.error_rate > self.max_error_rate
+            ):
+                self._eject(endpoint)
+        else:
+            endpoint.consecutive_failures = 0
+            if endpoint.probing:
+                # The probe succeeded; rejoin with a clean error history
+                endpoint.probing = False
+                endpoint.ejected_until = None
+                endpoint.error_rate = 0.0
+                endpoint._backoff = 0
+
+    def abandon(self, endpoint: Endpoint) -> None:
+        """Release a request that was cancelled for reasons unrelated to the endpoint.
+
+        No statistics are updated. A cancelled probe does not restore the
+        endpoint; the next request after it probes again.
+
+        Args:
+            endpoint: Endpoint returned by acquire
+        """
+        endpoint.in_flight -= 1
+        endpoint.probing = False
+
+    def _choose(self) -> Endpoint:
+        """Pick an endpoint with power-of-two-choices among healthy ones."""
+        now = time.monotonic()
+        healthy = []
+        for endpoint in self.endpoints:
+            if endpoint.ejected_until is None:
+                healthy.append(endpoint)
+            elif endpoint.ejected_until <= now and not endpoint.probing:
+                # The ejection expired: let one request probe the endpoint
+                endpoint.probing = True
+                return endpoint
+
+        if not healthy:
+            # Everything is ejected; try the one that has rested the longest
+            return min(self.endpoints, key=lambda e: (e.probing, e.ejected_until))
+        if len(healthy) == 1:
+            return healthy[0]
+
+        first, second = self._sample_two(healthy)
+        known = [e.latency for e in healthy if e.latency is not None]
+        default_latency = min(known) if known else 1.0
+        if second.cost(default_latency) < first.cost(default_latency):
+            return second
+        return first
+
+    def _sample_two(self, endpoints: List[Endpoint]) -> Tuple[Endpoint, Endpoint]:
+        """Sample two distinct endpoints in proportion to their weights."""
+        weights = [endpoint.weight for endpoint in endpoints]
+        first = random.choices(range(len(endpoints)), weights)[0]
+        weights[first] = 0.0
+        second = random.choices(range(len(endpoints)), weights)[0]
+        return endpoints[first], endpoints[second]
+
+    def _eject(self, endpoint: Endpoint) -> None:
+        """Take an endpoint out of rotation, doubling repeated ejections."""
+        duration = min(self.max_eject_duration, self.eject_duration * 2 ** endpoint._backoff)
+        endpoint._backoff += 1
+        endpoint.ejections += 1
+        endpoint.ejected_until = time.monotonic() + duration
+        endpoint.probing = False
+        endpoint.consecutive_failures = 0
@@ -0,0 +1,161 @@
+"""
+Circuit breaker for venice.ai requests.
+
+This module stops sending requests to a degraded provider:
+- Closed: requests flow and outcomes are tracked over a rolling window
+- Open: requests fail immediately once the error or timeout rate trips
+- Half-open: after a cool-down a few trial requests decide whether to close
+"""
+
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+SUCCESS = "success"
+ERROR = "error"
+TIMEOUT = "timeout"
+
+StateListener = Callable[[str, str], None]
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request while the circuit is open."""
+
+    def __init__(self, retry_in: float):
+        super().__init__(f"Circuit open: failing fast, retry in {retry_in:.1f} seconds")
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """Rolling-window circuit breaker with closed, open and half-open states.
+
+    The circuit opens when, over the last ``window`` seconds and at least
+    ``min_requests`` outcomes, the combined error and timeout rate reaches
+    ``error_threshold`` or the timeout rate alone reaches
+    ``timeout_threshold``. Listeners are called with ``(old, new)`` on every
+    state change.
+    """
+
+    def __init__(
+        self,
+        window: float = 30.0,
+        min_requests: int = 10,
+        error_threshold: float = 0.5,
+        timeout_threshold: float = 0.25,
+        open_duration: float = 15.0,
+        half_open_requests: int = 1,
+        on_state_change: Optional[StateListener] = None
+    ):
+        """Initialize a closed breaker.
+
+        Args:
+            window: Seconds of outcomes considered for the failure rates
+            min_requests: Outcomes required in the window before tripping
+            error_threshold: Failure rate (errors and timeouts) that opens the circuit
+            timeout_threshold: Timeout rate that opens the circuit
+            open_duration: Seconds to fail fast before trying again
+            half_open_requests: Trial requests allowed while half-open
+            on_state_change: Optional listener called with the old and new state
+        """
+        self.window = window
+        self.min_requests = min_requests
+        self.error_threshold = error_threshold
+        self.timeout_threshold = timeout_threshold
+        self.open_duration = open_duration
+        self.half_open_requests = half_open_requests
+        self.listeners: List[StateListener] = [on_state_change] if on_state_change else []
+
+        self.state = CLOSED
+        self._outcomes: Deque[Tuple[float, str]] = deque()
+        self._opened_at = 0.0
+        self._trials = 0
+        self._stats = {
+            "successes": 0,
+            "errors": 0,
+            "timeouts": 0,
+            "rejected": 0,
+            "opened": 0
+        }
+
+    @property
+    def stats(self) -> Dict[str, object]:
+        """Get outcome counters and the current state."""
+        stats = dict(self._stats)
+        stats["state"] = self.state
+        return stats
+
+    def add_listener(self, listener: StateListener) -> None:
+        """Register a callback for state changes."""
+        self.listeners.append(listener)
+
+    def check(self) -> None:
+        """Admit a request or raise CircuitOpenError.
+
+        Every admitted request must be followed by a call to ``record``.
+        """
+        if self.state == OPEN:
+            remaining = self._opened_at + self.open_duration - time.monotonic()
+            if remaining > 0:
+                self._stats["rejected"] += 1
+                raise CircuitOpenError(remaining)
+            self._transition(HALF_OPEN)
+        if self.state == HALF_OPEN:
+            if self._trials >= self.half_open_requests:
+                self._stats["rejected"] += 1
+                raise CircuitOpenError(0.0)
+            self._trials += 1
+
+    def record(self, outcome: Optional[str]) -> None:
+        """Record the outcome of an admitted request.
+
+        Args:
+            outcome: SUCCESS, ERROR or TIMEOUT, or None if the request was
+                cancelled before it had an outcome
+        """
+        if self.state == HALF_OPEN:
+            self._trials = max(0, self._trials - 1)
+        if outcome is None:
+            return
+        self._stats[{SUCCESS: "successes", ERROR: "errors", TIMEOUT: "timeouts"}[outcome]] += 1
+
+        if self.state == HALF_OPEN:
+            if outcome == SUCCESS:
+                self._outcomes.clear()
+                self._transition(CLOSED)
+            else:
+                self._open()
+            return
+        if self.state == OPEN:
+            # A request admitted before the circuit opened finished late
+            return
+
+        now = time.monotonic()
+        self._outcomes.append((now, outcome))
+        while self._outcomes and self._outcomes[0][0] < now - self.window:
+            self._outcomes.popleft()
+        total = len(self._outcomes)
+        if outcome == SUCCESS or total < self.min_requests:
+            return
+        timeouts = sum(1 for _, o in self._outcomes if o == TIMEOUT)
+        errors = sum(1 for _, o in self._outcomes if o == ERROR)
+        if (errors + timeouts) / total >= self.error_threshold or timeouts / total >= self.timeout_threshold:
+            self._open()
+
+    def _open(self) -> None:
+        """Open the circuit and start the cool-down."""
+        self._opened_at = time.monotonic()
+        self._trials = 0
+        self._outcomes.clear()
+        self._stats["opened"] += 1
+        self._transition(OPEN)
+
+    def _transition(self, state: str) -> None:
+        """Change state and notify the listeners."""
+        old, self.state = self.state, state
+        if old != state:
+            for listener in self.listeners:
+                listener(old, state)
@@ -0,0 +1,245 @@
+"""
+Response caching for venice.ai completions.
+
+This module provides a content-addressed cache for completion responses with:
+- An in-memory LRU tier
+- An optional on-disk SQLite tier shared across runs
+- TTL and size-based eviction
+- Replay of cached responses as a chunked stream
+"""
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import AsyncGenerator, Dict, List, Optional, Tuple
+
+
+class ResponseCache:
+    """Two-tier LRU cache for completion responses.
+
+    Entries are keyed on a canonical hash of the request so that identical
+    prompts map to the same entry regardless of dict ordering. Only
+    deterministic (temperature 0) requests are cached unless
+    ``cache_sampled`` is set or the caller opts in per request.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_bytes: Optional[int] = 64 * 1024 * 1024,
+        ttl: Optional[float] = 3600.0,
+        path: Optional[str] = None,
+        max_disk_entries: int = 100_000,
+        cache_sampled: bool = False,
+        replay_chunk_size: int = 64
+    ):
+        """Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of entries kept in memory
+            max_bytes: Maximum total UTF-8 encoded size of in-memory entries
+                (None for no limit)
+            ttl: Seconds before an entry expires (None for no expiry)
+            path: Path of an SQLite database for the on-disk tier (None disables it)
+            max_disk_entries: Maximum number of entries kept on disk
+            cache_sampled: Whether requests with temperature > 0 are cached by default
+            replay_chunk_size: Number of characters per chunk when replaying
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        if replay_chunk_size < 1:
+            raise ValueError("replay_chunk_size must be at least 1")
+
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.path = path
+        self.max_disk_entries = max_disk_entries
+        self.cache_sampled = cache_sampled
+        self.replay_chunk_size = replay_chunk_size
+
+        # Entries are (expiry, value, UTF-8 size of the value)
+        self._memory: "OrderedDict[str, Tuple[Optional[float], str, int]]" = OrderedDict()
+        self._memory_bytes = 0
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "evictions": 0,
+            "expirations": 0
+        }
+
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        if path is not None:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "expires_at REAL, accessed_at REAL NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def make_key(
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float,
+        max_tokens: int
+    ) -> str:
+        """Build a canonical content hash for a completion request."""
+        canonical = json.dumps(
+            {
+                "messages": messages,
+                "model": model,
+                "temperature": float(temperature),
+                "max_tokens": max_tokens
+            },
+            sort_keys=True,
+            separators=(",", ":"),
+            ensure_ascii=False
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def is_cacheable(self, temperature: float, use_cache: Optional[bool] = None) -> bool:
+        """Check whether a request may be served from or stored in the cache.
+
+        Args:
+            temperature: Sampling temperature of the request
+            use_cache: Per-request override; None applies the default policy
+        """
+        if use_cache is not None:
+            return use_cache
+        return temperature <= 0 or self.cache_sampled
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Get hit, miss and eviction counters along with current sizes."""
+        stats = dict(self._stats)
+        stats["entries"] = len(self._memory)
+        stats["bytes"] = self._memory_bytes
+        return stats
+
+    async def get(self, key: str) -> Optional[str]:
+        """Look up a cached response, promoting disk hits into memory."""
+        now = time.time()
+        entry = self._memory.get(key)
+        if entry is not None:
+            expires_at, value, _ = entry
+            if expires_at is not None and expires_at <= now:
+                self._remove(key)
+                self._stats["expirations"] += 1
+            else:
+                self._memory.move_to_end(key)
+                self._stats["hits"] += 1
+                self._stats["memory_hits"] += 1
+                return value
+
+        if self._db is not None:
+            row = await asyncio.to_thread(self._disk_get, key, now)
+            if row is not None:
+                value, expires_at = row
+                self._store(key, value, expires_at)
+                self._stats["hits"] += 1
+                self._stats["disk_hits"] += 1
+                return value
+
+        self._stats["misses"] += 1
+        return None
+
+    async def set(self, key: str, value: str) -> None:
+        """Store a complete response in every configured tier."""
+        expires_at = time.time() + self.ttl if self.ttl is not None else None
+        self._store(key, value, expires_at)
+        if self._db is not None:
+            await asyncio.to_thread(self._disk_set, key, value, expires_at)
+
+    async def replay(self, value: str) -> AsyncGenerator[str, None]:
+        """Replay a cached response as a stream of chunks."""
+        size = self.replay_chunk_size
+        for start in range(0, len(value), size):
+            yield value[start:start + size]
+
+    def clear(self) -> None:
+        """Remove every entry from all tiers."""
+        self._memory.clear()
+        self._memory_bytes = 0
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    def close(self) -> None:
+        """Close the on-disk tier."""
+        if self._db is not None:
+            with self._db_lock:
+                self._db.close()
+            self._db = None
+
+    def _store(self, key: str, value: str, expires_at: Optional[float]) -> None:
+        """Insert an entry into the memory tier and evict to fit the limits."""
+        if key in self._memory:
+            self._remove(key)
+        size = len(value.encode("utf-8"))
+        self._memory[key] = (expires_at, value, size)
+        self._memory_bytes += size
+
+        while len(self._memory) > self.max_entries or (
+            self.max_bytes is not None
+            and self._memory_bytes > self.max_bytes
+            and len(self._memory) > 1
+        ):
+            oldest = next(iter(self._memory))
+            self._remove(oldest)
+            self._stats["evictions"] += 1
+
+    def _remove(self, key: str) -> None:
+        """Remove an entry from the memory tier."""
+        _, _, size = self._memory.pop(key)
+        self._memory_bytes -= size
+
+    def _disk_get(self, key: str, now: float) -> Optional[Tuple[str, Optional[float]]]:
+        """Read an unexpired entry from the disk tier."""
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] is not None and row[1] <= now:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._db.commit()
+                self._stats["expirations"] += 1
+                return None
+            self._db.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            self._db.commit()
+            return row[0], row[1]
+
+    def _disk_set(self, key: str, value: str, expires_at: Optional[float]) -> None:
+        """Write an entry to the disk tier and evict least recently used rows."""
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, value, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, value, expires_at, time.time())
+            )
+            count = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            excess = count - self.max_disk_entries
+            if excess > 0:
+                self._db.execute(
+                    "DELETE FROM responses WHERE key IN ("
+                    "SELECT key FROM responses ORDER BY accessed_at LIMIT ?)",
+                    (excess,)
+                )
+                self._stats["evictions"] += excess
+            self._db.commit()
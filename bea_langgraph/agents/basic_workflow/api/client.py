@@ -6,20 +6,129 @@ handling think tags and streaming responses.
 """
 
 import asyncio
+import functools
+import random
+import re
+import time
 import aiohttp
-from typing import AsyncGenerator, List, Dict, Any
-import json
-from .handlers import ThinkTagHandler
+from contextlib import aclosing, asynccontextmanager
+from typing import (
+    AsyncGenerator, AsyncIterator, Callable, List, Dict, Any, NamedTuple, Optional,
+    Sequence, Tuple, Union
+)
+from ....common.streaming import StreamAccumulator, ThinkEvent, ThinkTagParser
+from .balancer import Endpoint, EndpointPool, EndpointSpec
+from .breaker import CircuitBreaker, ERROR, SUCCESS, TIMEOUT
+from .cache import ResponseCache
+from .concurrency import ConcurrencyGovernor, PRIORITY_NORMAL
+from .hedging import HedgingPolicy
+from .ratelimit import RateLimiter, parse_retry_after
+from .singleflight import SingleFlight
+from .sse import ChoiceSSEParser, SSEParser
+
+# Rough characters per token, used to size continuation requests
+_CHARS_PER_TOKEN = 4
+# An error body naming the n parameter, e.g. 'Unrecognized parameter "n"'
+_N_PARAMETER = re.compile(r"""(["'`])n\1|\bparameter:?\s*n\b|\bn\s+parameter\b""")
+
+class Completion(NamedTuple):
+    """Result of a non-streaming completion."""
+    text: str  # Content with think sections removed
+    usage: Optional[Dict[str, Any]] = None  # Token usage; None when served from cache
+    think: str = ""  # Reasoning from think sections
+
+class _RetryableStatus(Exception):
+    """Rate-limited or server error response that should be retried."""
+    
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class _RejectedRequest(Exception):
+    """Request the provider refused with a client error status."""
+    
+    def __init__(self, message: str, status: int, body: str):
+        super().__init__(message)
+        self.status = status
+        self.body = body
+
+async def complete_with(client: Any, messages: List[Dict[str, str]], **kwargs: Any) -> Completion:
+    """Get a non-streaming completion from any client with VeniceClient's interface.
+    
+    Clients without ``complete`` (e.g. test doubles that only stream) have
+    their ``stream_completion`` collected instead; keyword arguments are only
+    passed to ``complete``.
+    """
+    complete = getattr(client, "complete", None)
+    if complete is not None:
+        return await complete(messages, **kwargs)
+    result = StreamAccumulator()
+    async for chunk in client.stream_completion(messages):
+        result.append(chunk)
+    return Completion(result.text)
 
 class VeniceClient:
-    """Client for interacting with the venice.ai API."""
+    """Client for interacting with the venice.ai API.
+    
+    The client owns a single pooled ``aiohttp.ClientSession`` that is created
+    lazily on first use and shared by every request, so keep-alive connections
+    are reused across calls. A single client can be shared by all workflows and
+    should be closed with ``aclose()`` or used as an async context manager::
     
-    def __init__(self, api_key: str, base_url: str = "https://api.venice.ai/api/v1"):
+        async with VeniceClient(api_key) as client:
+            workflow = ParallelWorkflow(config, client)
+            ...
+    """
+    
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = "https://api.venice.ai/api/v1",
+        limit: int = 100,
+        limit_per_host: int = 20,
+        ttl_dns_cache: Optional[int] = 300,
+        keepalive_timeout: float = 30.0,
+        cache: Optional[ResponseCache] = None,
+        single_flight: bool = False,
+        on_malformed_event: Optional[Callable[[bytes, Exception], None]] = None,
+        governor: Optional[ConcurrencyGovernor] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        resumable: bool = False,
+        hedging: Optional[HedgingPolicy] = None,
+        endpoints: Optional[Union[EndpointPool, Sequence[EndpointSpec]]] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        max_retries: int = 3,
+        retry_delay: float = 1.0
+    ):
         """Initialize the Venice API client.
         
         Args:
             api_key: Venice API key
             base_url: Base URL for the Venice API
+            limit: Maximum number of pooled connections in total
+            limit_per_host: Maximum number of pooled connections per host
+            ttl_dns_cache: Seconds to cache DNS lookups (None caches forever)
+            keepalive_timeout: Seconds an idle connection is kept open for reuse
+            cache: Optional response cache consulted before each request
+            single_flight: Coalesce concurrent identical requests into one
+                upstream stream shared by every caller
+            on_malformed_event: Optional callback receiving the raw payload and
+                error of each server-sent event that cannot be parsed
+            governor: Adaptive concurrency governor to share with other
+                clients; by default each client gets its own, capped at
+                limit_per_host
+            rate_limiter: Optional RPM/TPM scheduler admitting requests
+                within the provider's quotas
+            resumable: Continue a stream that fails mid-response from the
+                content already delivered instead of failing the request
+            hedging: Optional policy for duplicating requests whose first
+                token is unusually slow
+            endpoints: Optional pool, or list of URLs or (url, weight) pairs,
+                to balance requests across instead of base_url
+            breaker: Optional circuit breaker that fails requests fast while
+                the provider is degraded
+            max_retries: Number of attempts per request
+            retry_delay: Initial backoff in seconds, doubled after each attempt
         """
         self.api_key = api_key
         self.base_url = base_url
@@ -27,6 +136,115 @@ class VeniceClient:
             "Authorization": f"Bearer {api_key}",
             "Content-Type": "application/json"
         }
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.ttl_dns_cache = ttl_dns_cache
+        self.keepalive_timeout = keepalive_timeout
+        self.cache = cache
+        self.single_flight = SingleFlight() if single_flight else None
+        self.on_malformed_event = on_malformed_event
+        self.governor = governor or ConcurrencyGovernor(
+            initial_limit=min(8, limit_per_host),
+            max_limit=limit_per_host
+        )
+        self.rate_limiter = rate_limiter
+        self.resumable = resumable
+        self.hedging = hedging
+        if endpoints is not None and not isinstance(endpoints, EndpointPool):
+            endpoints = EndpointPool(endpoints)
+        self.endpoints = endpoints
+        self.breaker = breaker
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stats = {
+            "requests": 0,
+            "connections_created": 0,
+            "connections_reused": 0,
+            "sessions_created": 0,
+            "events": 0,
+            "malformed_events": 0,
+            "resumes": 0,
+            "resume_tokens_saved": 0,
+            "multi_sample_requests": 0,
+            "multi_sample_fallbacks": 0
+        }
+        # Whether the backend honors the n parameter; None until known
+        self._n_supported: Optional[bool] = None
+        # Requests cancelled before their response, scored once the cause is known
+        self._cancelled: List[Tuple[asyncio.Task, int, Optional[Endpoint], float]] = []
+    
+    async def __aenter__(self) -> "VeniceClient":
+        """Open the pooled session when entering an ``async with`` block."""
+        await self._get_session()
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        """Close the pooled session when leaving an ``async with`` block."""
+        await self.aclose()
+    
+    async def aclose(self) -> None:
+        """Close the pooled session and release all connections."""
+        session = self._session
+        self._session = None
+        self._session_loop = None
+        if session is not None and not session.closed:
+            await session.close()
+    
+    @property
+    def connection_stats(self) -> Dict[str, int]:
+        """Get request, connection reuse, event parsing, resume and sampling counters."""
+        return dict(self._stats)
+    
+    def _on_malformed_event(self, data: bytes, error: Exception) -> None:
+        """Count a malformed server-sent event and forward it to the callback."""
+        self._stats["malformed_events"] += 1
+        if self.on_malformed_event is not None:
+            self.on_malformed_event(data, error)
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Get the shared session, creating it on first use.
+        
+        A session is bound to the event loop it was created on, so a new one is
+        created if the client is used from a different loop (e.g. after
+        ``asyncio.run`` is called again).
+        """
+        loop = asyncio.get_running_loop()
+        if (self._session is None or self._session.closed
+                or self._session_loop is not loop):
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.ttl_dns_cache,
+                keepalive_timeout=self.keepalive_timeout
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                trace_configs=[self._create_trace_config()]
+            )
+            self._session_loop = loop
+            self._stats["sessions_created"] += 1
+        return self._session
+    
+    def _create_trace_config(self) -> aiohttp.TraceConfig:
+        """Create a trace config that records connection reuse statistics."""
+        stats = self._stats
+        
+        async def on_request_start(session, context, params):
+            stats["requests"] += 1
+            
+        async def on_connection_create_end(session, context, params):
+            stats["connections_created"] += 1
+            
+        async def on_connection_reuseconn(session, context, params):
+            stats["connections_reused"] += 1
+        
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        return trace_config
     
     async def stream_completion(
         self,
@@ -34,83 +252,894 @@ class VeniceClient:
         model: str = "deepseek-r1-671b",
         temperature: float = 0.7,
         max_tokens: int = 1000,
-        timeout: float = 120.0
+        timeout: float = 120.0,
+        use_cache: Optional[bool] = None,
+        coalesce: Optional[bool] = None,
+        priority: int = PRIORITY_NORMAL
     ) -> AsyncGenerator[str, None]:
         """Stream a chat completion from the API.
         
+        Think sections are removed from the stream without being buffered;
+        use ``stream_events`` to receive the reasoning as well.
+        
         Args:
             messages: List of message dictionaries with 'role' and 'content'
             model: Model to use for completion
             temperature: Sampling temperature
             max_tokens: Maximum tokens to generate
             timeout: Request timeout in seconds
+            use_cache: Force (True) or bypass (False) the response cache; None
+                caches only requests the cache considers deterministic
+            coalesce: Set to False to opt out of single-flight coalescing when
+                an independent sample is required
+            priority: Concurrency lane; lower values are admitted first
             
         Yields:
-            Generated text chunks with think tags processed
+            Generated content chunks with think sections removed
         """
-        if not messages:
-            raise ValueError("Messages cannot be empty")
-        if not isinstance(messages, list):
-            raise ValueError("Messages must be a list")
+        parser = ThinkTagParser(keep_think=False)
+        async for event in self._parse_think_tags(
+            parser, messages, model, temperature, max_tokens, timeout,
+            use_cache, coalesce, priority
+        ):
+            yield event.text
+    
+    async def stream_events(
+        self,
+        messages: List[Dict[str, str]],
+        **kwargs: Any
+    ) -> AsyncGenerator[ThinkEvent, None]:
+        """Stream a chat completion as typed content and think events.
+        
+        Args:
+            messages: List of message dictionaries with 'role' and 'content'
+            **kwargs: Same options as ``stream_completion``
+            
+        Yields:
+            ThinkEvent items of kind "content" or "think"
+        """
+        parser = ThinkTagParser(keep_think=True)
+        async for event in self._parse_think_tags(parser, messages, **kwargs):
+            yield event
+    
+    async def complete(
+        self,
+        messages: List[Dict[str, str]],
+        model: str = "deepseek-r1-671b",
+        temperature: float = 0.7,
+        max_tokens: int = 1000,
+        timeout: float = 120.0,
+        use_cache: Optional[bool] = None,
+        coalesce: Optional[bool] = None,
+        priority: int = PRIORITY_NORMAL
+    ) -> Completion:
+        """Request a chat completion without streaming.
+        
+        The request goes through the same cache, rate limiter, concurrency,
+        endpoint and circuit breaker controls as ``stream_completion``, without
+        the per-chunk overhead of a stream.
+        
+        Args:
+            messages: List of message dictionaries with 'role' and 'content'
+            model: Model to use for completion
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens to generate
+            timeout: Request timeout in seconds
+            use_cache: Force (True) or bypass (False) the response cache
+            coalesce: Set to False to opt out of single-flight coalescing when
+                an independent sample is required
+            priority: Concurrency lane; lower values are admitted first
+            
+        Returns:
+            Completion with the content, the reasoning and the token usage
+        """
+        self._validate_messages(messages)
+        key = None
+        cache = self.cache
+        if cache is not None and cache.is_cacheable(temperature, use_cache):
+            key = cache.make_key(messages, model, temperature, max_tokens)
+            cached = await cache.get(key)
+            if cached is not None:
+                return self._to_completion(cached)
+        
+        payload = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "stream": False
+        }
+        if self.single_flight is not None and coalesce is not False:
+            # Separate key space: these flights carry decoded bodies, not chunks
+            flight_key = (key or ResponseCache.make_key(messages, model, temperature, max_tokens)) + ":complete"
+            upstream = functools.partial(self._complete_flight, payload, timeout, priority)
+            async with aclosing(self.single_flight.stream(flight_key, upstream)) as stream:
+                async for data in stream:
+                    break
+        else:
+            data = await self._complete_request(payload, timeout, priority)
+        try:
+            raw = data["choices"][0]["message"]["content"] or ""
+        except (KeyError, IndexError, TypeError):
+            raise Exception(f"Unexpected API response: {str(data)[:200]}")
+        if key is not None:
+            await cache.set(key, raw)
+        return self._to_completion(raw, data.get("usage"))
+    
+    async def complete_many(
+        self,
+        batch: List[List[Dict[str, str]]],
+        return_exceptions: bool = False,
+        **kwargs: Any
+    ) -> List[Union[Completion, Exception]]:
+        """Run several non-streaming completions concurrently.
+        
+        Concurrency is bounded by the client's governor and rate limiter, so
+        large batches queue instead of flooding the provider. If one request
+        fails and return_exceptions is False, the others are cancelled.
+        
+        Args:
+            batch: One message list per request
+            return_exceptions: Return failures in place of results instead of raising
+            **kwargs: Same options as ``complete``
+            
+        Returns:
+            Results in the order of the batch
+        """
+        tasks = [asyncio.ensure_future(self.complete(messages, **kwargs)) for messages in batch]
+        try:
+            return await asyncio.gather(*tasks, return_exceptions=return_exceptions)
+        finally:
+            for task in tasks:
+                task.cancel()
+            # Wait for the cancelled requests to release their connections
+            await asyncio.gather(*tasks, return_exceptions=True)
+    
+    async def complete_as_completed(
+        self,
+        batch: List[List[Dict[str, str]]],
+        return_exceptions: bool = False,
+        **kwargs: Any
+    ) -> AsyncGenerator[Tuple[int, Union[Completion, Exception]], None]:
+        """Run several non-streaming completions and yield them as they finish.
+        
+        Args:
+            batch: One message list per request
+            return_exceptions: Yield failures instead of raising them
+            **kwargs: Same options as ``complete``
+            
+        Yields:
+            Tuples of the request's index in the batch and its result
+        """
+        indexes = {
+            asyncio.ensure_future(self.complete(messages, **kwargs)): index
+            for index, messages in enumerate(batch)
+        }
+        pending = set(indexes)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in sorted(done, key=indexes.get):
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        if not return_exceptions:
+                            raise
+                        result = e
+                    yield indexes[task], result
+        finally:
+            for task in pending:
+                task.cancel()
+    
+    async def complete_n(
+        self,
+        messages: List[Dict[str, str]],
+        n: int,
+        model: str = "deepseek-r1-671b",
+        temperature: float = 0.7,
+        max_tokens: int = 1000,
+        timeout: float = 120.0,
+        priority: int = PRIORITY_NORMAL,
+        return_exceptions: bool = False
+    ) -> List[Union[Completion, Exception]]:
+        """Sample several completions of one prompt in a single request.
+        
+        The prompt is uploaded once with the ``n`` parameter. If the backend
+        returns fewer choices than requested, the missing samples are fetched
+        with separate, uncoalesced requests. Once the backend rejects ``n``
+        outright, later calls skip it.
+        
+        Args:
+            messages: List of message dictionaries with 'role' and 'content'
+            n: Number of samples
+            model: Model to use for completion
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens to generate per sample
+            timeout: Request timeout in seconds
+            priority: Concurrency lane; lower values are admitted first
+            return_exceptions: Return failed samples as exceptions in place of
+                completions instead of raising
+            
+        Returns:
+            n completions; those from one request share its usage
+        """
+        if n < 1:
+            raise ValueError("n must be at least 1")
+        self._validate_messages(messages)
+        options = {
+            "model": model,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "timeout": timeout,
+            "priority": priority
+        }
+        if n == 1:
+            return await self.complete_many([messages], return_exceptions, coalesce=False, **options)
+        
+        completions: List[Union[Completion, Exception]] = []
+        if self._n_supported is not False:
+            payload = {
+                "model": model,
+                "messages": messages,
+                "temperature": temperature,
+                "max_tokens": max_tokens,
+                "n": n,
+                "stream": False
+            }
+            self._stats["multi_sample_requests"] += 1
+            try:
+                data = await self._complete_request(payload, timeout, priority)
+            except Exception as e:
+                if not self._rejects_n(e):
+                    if return_exceptions:
+                        return [e] * n
+                    raise
+                self._n_supported = False
+            else:
+                usage = data.get("usage")
+                choices = sorted(data.get("choices") or [], key=lambda c: c.get("index", 0))
+                for choice in choices[:n]:
+                    try:
+                        raw = choice["message"]["content"] or ""
+                    except (KeyError, TypeError):
+                        continue
+                    completions.append(self._to_completion(raw, usage))
+                if len(choices) > 1:
+                    self._n_supported = True
+        
+        missing = n - len(completions)
+        if missing:
+            self._stats["multi_sample_fallbacks"] += 1
+            completions += await self.complete_many(
+                [messages] * missing, return_exceptions, coalesce=False, **options
+            )
+        return completions
+    
+    async def stream_choices(
+        self,
+        messages: List[Dict[str, str]],
+        n: int,
+        model: str = "deepseek-r1-671b",
+        temperature: float = 0.7,
+        max_tokens: int = 1000,
+        timeout: float = 120.0,
+        priority: int = PRIORITY_NORMAL
+    ) -> AsyncGenerator[Tuple[int, str], None]:
+        """Stream several sampled completions of one prompt in a single request.
+        
+        Choices are demultiplexed by their ``index`` and think sections are
+        removed from each of them. If the backend ignores or rejects ``n``,
+        the missing choices are streamed with separate requests and merged in.
+        
+        Args:
+            messages: List of message dictionaries with 'role' and 'content'
+            n: Number of samples
+            model: Model to use for completion
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens to generate per sample
+            timeout: Request timeout in seconds
+            priority: Concurrency lane; lower values are admitted first
             
-        handler = ThinkTagHandler()
-        max_retries = 3
-        retry_delay = 1.0
+        Yields:
+            Tuples of the choice index and a content chunk
+        """
+        if n < 1:
+            raise ValueError("n must be at least 1")
+        self._validate_messages(messages)
+        options = {
+            "model": model,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "timeout": timeout,
+            "priority": priority
+        }
+        
+        seen = set()
+        if n > 1 and self._n_supported is not False:
+            payload = {
+                "model": model,
+                "messages": messages,
+                "temperature": temperature,
+                "max_tokens": max_tokens,
+                "n": n,
+                "stream": True
+            }
+            self._stats["multi_sample_requests"] += 1
+            parsers = [ThinkTagParser(keep_think=False) for _ in range(n)]
+            retry_delay = self.retry_delay
+            for attempt in range(self.max_retries):
+                try:
+                    async with self._request(payload, timeout, priority) as (response, estimate):
+                        sse = ChoiceSSEParser(on_error=self._on_malformed_event)
+                        async for raw in response.content.iter_any():
+                            for index, content in sse.feed(raw):
+                                if 0 <= index < n:
+                                    seen.add(index)
+                                    for event in parsers[index].feed(content):
+                                        yield index, event.text
+                            if sse.done:
+                                break
+                        for index, content in sse.close():
+                            if 0 <= index < n:
+                                seen.add(index)
+                                for event in parsers[index].feed(content):
+                                    yield index, event.text
+                        self._stats["events"] += sse.events
+                        self._reconcile(estimate, sse.usage)
+                    break
+                except _RejectedRequest as e:
+                    if not self._rejects_n(e):
+                        raise
+                    self._n_supported = False
+                    break
+                except (aiohttp.ClientError, asyncio.TimeoutError, _RetryableStatus) as e:
+                    if seen:
+                        raise Exception(f"API request failed after a partial response: {str(e)}")
+                    if attempt == self.max_retries - 1:
+                        raise Exception(f"API request failed after {self.max_retries} attempts: {str(e)}")
+                    retry_delay = await self._wait_before_retry(e, attempt, retry_delay)
+            for index in seen:
+                for event in parsers[index].close():
+                    yield index, event.text
+            if len(seen) > 1:
+                self._n_supported = True
+        
+        missing = [index for index in range(n) if index not in seen]
+        if missing:
+            if n > 1:
+                self._stats["multi_sample_fallbacks"] += 1
+            streams = {
+                index: self.stream_completion(messages, coalesce=False, **options)
+                for index in missing
+            }
+            async with aclosing(self._merge_streams(streams)) as merged:
+                async for index, chunk in merged:
+                    yield index, chunk
+    
+    async def _merge_streams(
+        self,
+        streams: Dict[int, AsyncGenerator[str, None]]
+    ) -> AsyncGenerator[Tuple[int, str], None]:
+        """Interleave several streams, tagging each chunk with its stream's key."""
+        queue: asyncio.Queue = asyncio.Queue()
+        
+        async def pump(index: int, stream: AsyncGenerator[str, None]) -> None:
+            try:
+                async with aclosing(stream):
+                    async for chunk in stream:
+                        await queue.put((index, chunk))
+                await queue.put((index, None))
+            except Exception as e:
+                await queue.put((index, e))
+        
+        tasks = [asyncio.ensure_future(pump(index, stream)) for index, stream in streams.items()]
+        remaining = len(tasks)
+        try:
+            while remaining:
+                index, item = await queue.get()
+                if item is None:
+                    remaining -= 1
+                elif isinstance(item, Exception):
+                    raise item
+                else:
+                    yield index, item
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+    
+    async def _parse_think_tags(
+        self,
+        parser: ThinkTagParser,
+        *args: Any,
+        **kwargs: Any
+    ) -> AsyncGenerator[ThinkEvent, None]:
+        """Run the raw completion stream through a think-tag parser."""
+        async with aclosing(self._stream_raw(*args, **kwargs)) as stream:
+            async for chunk in stream:
+                for event in parser.feed(chunk):
+                    yield event
+            for event in parser.close():
+                yield event
+    
+    async def _stream_raw(
+        self,
+        messages: List[Dict[str, str]],
+        model: str = "deepseek-r1-671b",
+        temperature: float = 0.7,
+        max_tokens: int = 1000,
+        timeout: float = 120.0,
+        use_cache: Optional[bool] = None,
+        coalesce: Optional[bool] = None,
+        priority: int = PRIORITY_NORMAL
+    ) -> AsyncGenerator[str, None]:
+        """Stream raw completion text through the cache and single-flight layers."""
+        self._validate_messages(messages)
+        
+        payload = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "stream": True
+        }
+        if self.rate_limiter is not None and self.rate_limiter.tokens is not None:
+            # Ask for usage so token estimates can be reconciled
+            payload["stream_options"] = {"include_usage": True}
+        key = None
+        
+        cache = self.cache
+        if cache is not None and cache.is_cacheable(temperature, use_cache):
+            key = cache.make_key(messages, model, temperature, max_tokens)
+            cached = await cache.get(key)
+            if cached is not None:
+                async for chunk in cache.replay(cached):
+                    yield chunk
+                return
+            upstream = functools.partial(
+                self._stream_and_cache, cache, key, payload, timeout, priority
+            )
+        else:
+            upstream = functools.partial(self._stream_request, payload, timeout, priority)
+        
+        if self.single_flight is not None and coalesce is not False:
+            key = key or ResponseCache.make_key(messages, model, temperature, max_tokens)
+            stream = self.single_flight.stream(key, upstream)
+        else:
+            stream = upstream()
+        
+        # Close the inner stream promptly so a consumer that stops early
+        # releases its connection (or its single-flight slot) right away.
+        async with aclosing(stream):
+            async for chunk in stream:
+                yield chunk
+    
+    async def _stream_and_cache(
+        self,
+        cache: ResponseCache,
+        key: str,
+        payload: Dict[str, Any],
+        timeout: float,
+        priority: int
+    ) -> AsyncGenerator[str, None]:
+        """Stream a request and store the response once it completes."""
+        # Only complete responses are stored; a consumer that stops early
+        # closes this generator before the set below is reached.
+        chunks = []
+        async with aclosing(self._stream_request(payload, timeout, priority)) as stream:
+            async for chunk in stream:
+                chunks.append(chunk)
+                yield chunk
+        await cache.set(key, "".join(chunks))
+    
+    async def _stream_request(
+        self,
+        payload: Dict[str, Any],
+        timeout: float,
+        priority: int = PRIORITY_NORMAL
+    ) -> AsyncGenerator[str, None]:
+        """Send a streaming request with retries and yield content chunks.
+        
+        Chunks that were already yielded are never repeated. When a stream
+        fails mid-response, resumable clients send a continuation request with
+        the partial output as an assistant message; other clients fail.
+        """
+        max_retries = self.max_retries
+        retry_delay = self.retry_delay
+        request = payload
+        delivered: List[str] = []
         
         for attempt in range(max_retries):
+            if self.hedging is not None:
+                attempt_stream = self._hedged_attempt(request, timeout, priority)
+            else:
+                attempt_stream = self._stream_attempt(request, timeout, priority)
+            try:
+                async with aclosing(attempt_stream) as stream:
+                    async for content in stream:
+                        delivered.append(content)
+                        yield content
+                return
+                        
+            except (aiohttp.ClientError, asyncio.TimeoutError, _RetryableStatus) as e:
+                if attempt == max_retries - 1:
+                    raise Exception(f"API request failed after {max_retries} attempts: {str(e)}")
+                if delivered:
+                    if not self.resumable:
+                        raise Exception(f"API request failed after a partial response: {str(e)}")
+                    request = self._continuation_payload(payload, "".join(delivered))
+                    if request is None:
+                        # The completion budget was already spent
+                        return
+                retry_delay = await self._wait_before_retry(e, attempt, retry_delay)
+    
+    async def _wait_before_retry(self, error: Exception, attempt: int, retry_delay: float) -> float:
+        """Sleep before the next attempt and return the next backoff delay."""
+        delay = getattr(error, "retry_after", None)
+        if delay is None:
+            # Exponential backoff with jitter so parallel retries spread out
+            delay = retry_delay * random.uniform(0.5, 1.5)
+            retry_delay *= 2
+        elif self.rate_limiter is not None:
+            # Hold back every request sharing the quota, not just this one
+            self.rate_limiter.pause(delay)
+            delay = 0.0
+        print(f"Attempt {attempt + 1} failed, retrying in {delay:.1f} seconds...")
+        await asyncio.sleep(delay)
+        return retry_delay
+    
+    def _continuation_payload(
+        self,
+        payload: Dict[str, Any],
+        partial: str
+    ) -> Optional[Dict[str, Any]]:
+        """Build a request that continues a partial response.
+        
+        Args:
+            payload: Original request payload
+            partial: Content delivered before the failure
+            
+        Returns:
+            Continuation payload, or None if no completion budget is left
+        """
+        partial_tokens = len(partial) // _CHARS_PER_TOKEN
+        remaining = payload["max_tokens"] - partial_tokens
+        if remaining <= 0:
+            return None
+        self._stats["resumes"] += 1
+        self._stats["resume_tokens_saved"] += partial_tokens
+        request = dict(payload)
+        request["messages"] = payload["messages"] + [{"role": "assistant", "content": partial}]
+        request["max_tokens"] = remaining
+        return request
+    
+    async def _hedged_attempt(
+        self,
+        payload: Dict[str, Any],
+        timeout: float,
+        priority: int
+    ) -> AsyncGenerator[str, None]:
+        """Send one streaming request, hedging it if the first token is slow.
+        
+        The primary request runs in the caller's task, so the caller's own
+        timeout and cancellation apply to it directly; only the hedge runs in
+        a helper task. The stream that produces its first chunk first is
+        committed to: a hedge that wins interrupts the caller's wait on the
+        primary, and the loser is cancelled and closed, which releases its
+        slot and its connection. If one stream fails, the other is still
+        awaited.
+        """
+        policy = self.hedging
+        policy.record_request()
+        delay = policy.delay()
+        # Set once a stream has won, so the loser's cancellation is not scored
+        race = {"decided": False}
+        caller = asyncio.current_task()
+        streams = [self._stream_attempt(payload, timeout, priority, race)]
+        starts = [time.monotonic()]
+        hedges: List[asyncio.Task] = []
+        waiting = True
+        
+        def hedge_done(task: asyncio.Task) -> None:
+            if not waiting or task.cancelled():
+                return
+            error = task.exception()
+            if error is None or isinstance(error, StopAsyncIteration):
+                race["decided"] = True
+                caller.cancel()
+        
+        def start_hedge() -> None:
+            estimate = 0
+            if self.rate_limiter is not None:
+                estimate = self.rate_limiter.estimate_tokens(payload["messages"], payload["max_tokens"])
+            if policy.try_hedge(self.governor, self.rate_limiter, estimate):
+                streams.append(self._stream_attempt(payload, timeout, priority, race))
+                starts.append(time.monotonic())
+                hedge = asyncio.ensure_future(streams[1].__anext__())
+                hedge.add_done_callback(hedge_done)
+                hedges.append(hedge)
+        
+        timer = asyncio.get_running_loop().call_later(delay, start_hedge) if delay is not None else None
+        winner = None
+        first = None
+        errors = []
+        try:
             try:
-                async with aiohttp.ClientSession() as session:
+                first = await streams[0].__anext__()
+                winner = 0
+            except StopAsyncIteration:
+                winner = 0
+            except asyncio.CancelledError:
+                # Withdraw the hedge's interruption; any other cancellation stands
+                if not race["decided"] or caller.uncancel():
+                    raise
+                winner = 1
+            except Exception as e:
+                errors.append(e)
+            finally:
+                waiting = False
+                if timer is not None:
+                    timer.cancel()
+            if winner is None and hedges:
+                winner = 1
+                try:
+                    first = await hedges[0]
+                except StopAsyncIteration:
+                    pass
+                except Exception as e:
+                    errors.append(e)
+                    winner = None
+            elif winner == 1:
+                try:
+                    first = hedges[0].result()
+                except StopAsyncIteration:
+                    pass
+            if winner is None:
+                raise errors[0]
+        finally:
+            race["decided"] = winner is not None
+            for hedge in hedges:
+                hedge.cancel()
+            await asyncio.gather(*hedges, return_exceptions=True)
+            for index, stream in enumerate(streams):
+                if index != winner:
+                    await stream.aclose()
+        
+        if len(streams) > 1:
+            policy.record_win(hedged=winner == 1)
+        async with aclosing(streams[winner]) as stream:
+            if first is None:
+                return
+            policy.record_ttft(time.monotonic() - starts[winner])
+            yield first
+            async for content in stream:
+                yield content
+    
+    @asynccontextmanager
+    async def _request(
+        self,
+        payload: Dict[str, Any],
+        timeout: float,
+        priority: int,
+        hedge_race: Optional[Dict[str, bool]] = None
+    ) -> AsyncIterator[Tuple[aiohttp.ClientResponse, int]]:
+        """Send one request while holding a concurrency slot.
+        
+        The request fails fast while the circuit breaker is open and is then
+        admitted by the rate limiter, if any. The governor, endpoint pool and
+        breaker are told about overload responses, errors and timeouts, and
+        about the latency to response headers of successful requests. A
+        request cancelled by its caller's own timeout (``asyncio.timeout``)
+        before the response arrived counts as a timeout; a request cancelled
+        for any other reason, such as losing a hedge race or an early stop,
+        is abandoned without scoring the endpoint or the breaker.
+        
+        Args:
+            payload: Request body
+            timeout: Total timeout of the request in seconds
+            priority: Scheduling priority for the concurrency slot
+            hedge_race: Shared state of a hedge race, whose ``"decided"`` flag
+                is set once the winning stream is known
+        
+        Yields:
+            The successful response and the token estimate it was admitted with
+        """
+        if self._cancelled:
+            self._settle_cancelled()
+        if self.breaker is not None:
+            self.breaker.check()
+        outcome = None
+        endpoint = None
+        cancelled = False
+        try:
+            estimate = 0
+            if self.rate_limiter is not None:
+                estimate = self.rate_limiter.estimate_tokens(payload["messages"], payload["max_tokens"])
+                await self.rate_limiter.acquire(estimate)
+            session = await self._get_session()
+            async with self.governor.slot(priority):
+                endpoint = self.endpoints.acquire() if self.endpoints is not None else None
+                if endpoint is not None:
+                    url = endpoint.url
+                    headers = self.headers
+                    if endpoint.api_key is not None:
+                        headers = dict(headers, Authorization=f"Bearer {endpoint.api_key}")
+                else:
+                    url = self.base_url
+                    headers = self.headers
+                start = time.monotonic()
+                latency = None
+                failed = False
+                abandoned = False
+                try:
                     async with session.post(
-                        f"{self.base_url}/chat/completions",
-                        headers=self.headers,
-                        json={
-                            "model": model,
-                            "messages": messages,
-                            "temperature": temperature,
-                            "max_tokens": max_tokens,
-                            "stream": True
-                        },
+                        f"{url}/chat/completions",
+                        headers=headers,
+                        json=payload,
                         timeout=aiohttp.ClientTimeout(total=timeout)
                     ) as response:
                         if response.status != 200:
                             error_text = await response.text()
-                            raise Exception(f"API request failed: {response.status} - {error_text}")
-                        
-                        async for line in response.content:
-                            if not line:
-                                continue
-                                
-                            chunk = line.decode('utf-8').strip()
-                            if not chunk or chunk == 'data: [DONE]':
-                                continue
-                                
-                            if not chunk.startswith('data: '):
-                                print(f"Unexpected chunk format: {chunk}")
-                                continue
-                                
-                            try:
-                                data = json.loads(chunk[6:])  # Skip 'data: ' prefix
-                                if not isinstance(data, dict) or 'choices' not in data:
-                                    continue
-                                    
-                                if not data.get('choices') or not isinstance(data['choices'], list):
-                                    continue
-                                delta = data['choices'][0].get('delta', {})
-                                if not isinstance(delta, dict):
-                                    continue
-                                content = delta.get('content', '')
-                                if content:
-                                    yield content
-                            except json.JSONDecodeError as e:
-                                print(f"Failed to parse chunk: {chunk} - {str(e)}")
-                            except Exception as e:
-                                print(f"Error processing chunk: {str(e)}")
-                                continue
-                        return
-                        
-            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                            message = f"API request failed: {response.status} - {error_text}"
+                            if response.status == 429 or response.status >= 500:
+                                self.governor.record_overload()
+                                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                                raise _RetryableStatus(message, retry_after)
+                            outcome = SUCCESS  # The provider answered; the request was bad
+                            raise _RejectedRequest(message, response.status, error_text)
+                        outcome = SUCCESS
+                        latency = time.monotonic() - start
+                        self.governor.record_success(latency)
+                        yield response, estimate
+                except asyncio.TimeoutError:
+                    failed = True
+                    outcome = TIMEOUT
+                    self.governor.record_overload()
+                    raise
+                except (aiohttp.ClientError, _RetryableStatus):
+                    failed = True
+                    outcome = ERROR
+                    raise
+                except asyncio.CancelledError:
+                    if outcome is None:
+                        if hedge_race is not None and hedge_race["decided"]:
+                            abandoned = True
+                        else:
+                            # Only known to be a timeout once the cancellation unwinds
+                            cancelled = True
+                            latency = time.monotonic() - start
+                    raise
+                finally:
+                    if endpoint is not None and not cancelled:
+                        if abandoned:
+                            self.endpoints.abandon(endpoint)
+                        else:
+                            self.endpoints.release(endpoint, latency, failed)
+        finally:
+            if cancelled:
+                self._defer_cancelled(endpoint, latency)
+            elif self.breaker is not None:
+                self.breaker.record(outcome)
+    
+    def _defer_cancelled(self, endpoint: Optional[Endpoint], latency: float) -> None:
+        """Score a request cancelled before its response once the cause is known.
+        
+        Called while the cancellation of the current task is unwinding. The
+        request is settled once the task has either withdrawn the
+        cancellation or finished.
+        """
+        task = asyncio.current_task()
+        self._cancelled.append((task, task.cancelling(), endpoint, latency))
+        asyncio.get_running_loop().call_soon(self._settle_cancelled)
+        task.add_done_callback(lambda _: self._settle_cancelled())
+    
+    def _settle_cancelled(self) -> None:
+        """Score the cancelled requests whose cause is now known.
+        
+        ``asyncio.timeout`` withdraws its cancellation (``Task.uncancel``)
+        when it turns it into a TimeoutError, so a task whose cancellation
+        count dropped was cancelled by the caller's own timeout. A task that
+        finished without withdrawing it was cancelled deliberately, e.g. by
+        an early stop, and its requests are abandoned: the breaker records
+        no outcome for them.
+        """
+        pending = []
+        for entry in self._cancelled:
+            task, cancelling, endpoint, latency = entry
+            if task.cancelling() < cancelling:
+                timed_out = True
+            elif task.done():
+                timed_out = False
+            else:
+                pending.append(entry)
+                continue
+            if endpoint is not None:
+                if timed_out:
+                    self.endpoints.release(endpoint, latency, failed=True)
+                else:
+                    self.endpoints.abandon(endpoint)
+            if self.breaker is not None:
+                self.breaker.record(TIMEOUT if timed_out else None)
+        self._cancelled = pending
+    
+    async def _stream_attempt(
+        self,
+        payload: Dict[str, Any],
+        timeout: float,
+        priority: int,
+        hedge_race: Optional[Dict[str, bool]] = None
+    ) -> AsyncGenerator[str, None]:
+        """Send one streaming request and yield its content chunks."""
+        async with self._request(payload, timeout, priority, hedge_race) as (response, estimate):
+            parser = SSEParser(on_error=self._on_malformed_event)
+            async for raw in response.content.iter_any():
+                for content in parser.feed(raw):
+                    yield content
+                if parser.done:
+                    break
+            for content in parser.close():
+                yield content
+            self._stats["events"] += parser.events
+            self._reconcile(estimate, parser.usage)
+    
+    async def _complete_request(
+        self,
+        payload: Dict[str, Any],
+        timeout: float,
+        priority: int
+    ) -> Dict[str, Any]:
+        """Send a non-streaming request with retries and return the decoded body."""
+        max_retries = self.max_retries
+        retry_delay = self.retry_delay
+        
+        for attempt in range(max_retries):
+            try:
+                async with self._request(payload, timeout, priority) as (response, estimate):
+                    data = await response.json()
+                self._reconcile(estimate, data.get("usage"))
+                return data
+            except (aiohttp.ClientError, asyncio.TimeoutError, _RetryableStatus) as e:
                 if attempt == max_retries - 1:
                     raise Exception(f"API request failed after {max_retries} attempts: {str(e)}")
-                print(f"Attempt {attempt + 1} failed, retrying in {retry_delay} seconds...")
-                await asyncio.sleep(retry_delay)
-                retry_delay *= 2  # Exponential backoff
+                retry_delay = await self._wait_before_retry(e, attempt, retry_delay)
+    
+    async def _complete_flight(
+        self,
+        payload: Dict[str, Any],
+        timeout: float,
+        priority: int
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """Yield the decoded body of a non-streaming request for single-flight."""
+        yield await self._complete_request(payload, timeout, priority)
+    
+    def _reconcile(self, estimate: int, usage: Optional[Dict[str, Any]]) -> None:
+        """Correct the rate limiter's token estimate with reported usage."""
+        if self.rate_limiter is not None and usage and "total_tokens" in usage:
+            self.rate_limiter.reconcile(estimate, usage["total_tokens"])
+    
+    @staticmethod
+    def _rejects_n(error: Exception) -> bool:
+        """Check whether the provider refused a request because of the n parameter."""
+        return (
+            isinstance(error, _RejectedRequest)
+            and error.status in (400, 422)
+            and _N_PARAMETER.search(error.body) is not None
+        )
+    
+    @staticmethod
+    def _validate_messages(messages: List[Dict[str, str]]) -> None:
+        """Check that a request has a non-empty list of messages."""
+        if not messages:
+            raise ValueError("Messages cannot be empty")
+        if not isinstance(messages, list):
+            raise ValueError("Messages must be a list")
+    
+    @staticmethod
+    def _to_completion(raw: str, usage: Optional[Dict[str, Any]] = None) -> Completion:
+        """Split raw completion text into content and reasoning."""
+        parser = ThinkTagParser(keep_think=True)
+        content: List[str] = []
+        think: List[str] = []
+        for event in parser.feed(raw) + parser.close():
+            (think if event.kind == "think" else content).append(event.text)
+        return Completion("".join(content), usage, "".join(think))
@@ -0,0 +1,205 @@
+"""
+Adaptive concurrency control for venice.ai requests.
+
+This module provides a governor that limits the number of in-flight requests
+and adapts the limit with additive-increase/multiplicative-decrease (AIMD):
+- Successful requests slowly raise the limit
+- 429/5xx responses, timeouts and latency inflation cut it sharply
+- Requests beyond the limit wait in per-priority lanes
+"""
+
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, Optional
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+
+class ConcurrencyGovernor:
+    """AIMD concurrency limiter with priority lanes.
+
+    One governor should be shared by every client talking to the same
+    provider so that nested workflows (orchestrator -> parallel -> evaluator)
+    draw from a single budget. Slots are held only for the duration of an
+    HTTP request, never while waiting on other requests, so nesting cannot
+    deadlock.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 8,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        increase: float = 1.0,
+        decrease_factor: float = 0.5,
+        latency_tolerance: float = 2.0,
+        decrease_cooldown: float = 1.0
+    ):
+        """Initialize the governor.
+
+        Args:
+            initial_limit: Starting number of concurrent requests
+            min_limit: Lower bound for the limit
+            max_limit: Upper bound for the limit
+            increase: Amount the limit grows per limit's worth of successes
+            decrease_factor: Factor applied to the limit on congestion
+            latency_tolerance: Ratio of smoothed to baseline latency treated
+                as congestion
+            decrease_cooldown: Minimum seconds between two decreases, so one
+                congestion episode only cuts the limit once
+        """
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError("Limits must satisfy 1 <= min_limit <= initial_limit <= max_limit")
+        if not 0.0 < decrease_factor < 1.0:
+            raise ValueError("decrease_factor must be between 0 and 1")
+
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.decrease_cooldown = decrease_cooldown
+
+        self._limit = float(initial_limit)
+        self._in_flight = 0
+        self._lanes: Dict[int, Deque[asyncio.Future]] = {}
+        self._queued = 0
+        self._baseline_latency: Optional[float] = None
+        self._smoothed_latency: Optional[float] = None
+        self._last_decrease = float("-inf")
+        self._stats = {
+            "admitted": 0,
+            "queued": 0,
+            "peak_queue_depth": 0,
+            "total_wait": 0.0,
+            "max_wait": 0.0,
+            "increases": 0,
+            "decreases": 0,
+            "overloads": 0
+        }
+
+    @property
+    def limit(self) -> int:
+        """Get the current concurrency limit."""
+        return max(self.min_limit, int(self._limit))
+
+    @property
+    def in_flight(self) -> int:
+        """Get the number of requests currently holding a slot."""
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        """Get the number of requests waiting for a slot."""
+        return self._queued
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        """Get limit, queue and wait time metrics."""
+        stats = dict(self._stats)
+        stats["limit"] = self.limit
+        stats["in_flight"] = self._in_flight
+        stats["queue_depth"] = self._queued
+        stats["avg_wait"] = (
+            stats["total_wait"] / stats["admitted"] if stats["admitted"] else 0.0
+        )
+        stats["baseline_latency"] = self._baseline_latency
+        return stats
+
+    @asynccontextmanager
+    async def slot(self, priority: int = PRIORITY_NORMAL) -> AsyncIterator[None]:
+        """Hold a concurrency slot for the duration of the block."""
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def acquire(self, priority: int = PRIORITY_NORMAL) -> None:
+        """Wait for a slot; lower priority values are served first."""
+        start = time.monotonic()
+        if self._queued == 0 and self._in_flight < self.limit:
+            self._in_flight += 1
+        else:
+            waiter = asyncio.get_running_loop().create_future()
+            self._lanes.setdefault(priority, deque()).append(waiter)
+            self._queued += 1
+            self._stats["queued"] += 1
+            self._stats["peak_queue_depth"] = max(self._stats["peak_queue_depth"], self._queued)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # The slot was handed over just before cancellation
+                    self.release()
+                else:
+                    self._queued -= 1
+                raise
+
+        wait = time.monotonic() - start
+        self._stats["admitted"] += 1
+        self._stats["total_wait"] += wait
+        self._stats["max_wait"] = max(self._stats["max_wait"], wait)
+
+    def release(self) -> None:
+        """Return a slot and admit waiting requests."""
+        self._in_flight -= 1
+        self._dispatch()
+
+    def record_success(self, latency: float) -> None:
+        """Record a successful response and its latency to first byte."""
+        if self._baseline_latency is None or latency < self._baseline_latency:
+            self._baseline_latency = latency
+        else:
+            # Let the baseline drift up slowly if the provider gets slower
+            self._baseline_latency += 0.01 * (latency - self._baseline_latency)
+        if self._smoothed_latency is None:
+            self._smoothed_latency = latency
+        else:
+            self._smoothed_latency += 0.2 * (latency - self._smoothed_latency)
+
+        if self._smoothed_latency > self.latency_tolerance * self._baseline_latency:
+            self._decrease()
+        elif self._limit < self.max_limit:
+            self._limit = min(float(self.max_limit), self._limit + self.increase / self._limit)
+            self._stats["increases"] += 1
+            self._dispatch()
+
+    def record_overload(self) -> None:
+        """Record a 429/5xx response or timeout."""
+        self._stats["overloads"] += 1
+        self._decrease()
+
+    def _decrease(self) -> None:
+        """Cut the limit multiplicatively, at most once per cooldown."""
+        now = time.monotonic()
+        if now - self._last_decrease < self.decrease_cooldown:
+            return
+        self._last_decrease = now
+        self._limit = max(float(self.min_limit), self._limit * self.decrease_factor)
+        self._smoothed_latency = self._baseline_latency
+        self._stats["decreases"] += 1
+
+    def _dispatch(self) -> None:
+        """Hand free slots to waiters in priority order."""
+        while self._queued and self._in_flight < self.limit:
+            waiter = self._next_waiter()
+            if waiter is None:
+                return
+            self._in_flight += 1
+            waiter.set_result(None)
+
+    def _next_waiter(self) -> Optional[asyncio.Future]:
+        """Pop the oldest live waiter from the highest priority lane."""
+        for priority in sorted(self._lanes):
+            lane = self._lanes[priority]
+            while lane:
+                waiter = lane.popleft()
+                if not waiter.cancelled():
+                    self._queued -= 1
+                    return waiter
+        return None
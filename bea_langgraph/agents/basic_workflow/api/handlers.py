@@ -5,9 +5,9 @@ This module provides utilities for processing think tags in streaming responses
 from the venice.ai API.
 """
 
-from typing import AsyncGenerator, Optional, List
-import json
-import re
+from typing import List, Optional
+from ....common.streaming import ThinkTagParser
+from .sse import SSEParser
 
 class ResponseHandler:
     """Base class for API response handlers."""
@@ -28,46 +28,47 @@ class ResponseHandler:
             return None
 
 class ThinkTagHandler(ResponseHandler):
-    """Handler for processing think tags in API responses."""
+    """Handler for processing think tags in API responses.
     
-    def __init__(self):
-        self._think_buffer = []
-        self._in_think_section = False
-        self._think_pattern = re.compile(r'<think>(.*?)</think>', re.DOTALL)
+    Accepts content chunks or raw ``data:`` lines of the event stream,
+    returns content with think sections removed and accumulates the reasoning
+    for ``get_think_content``. Unless ``sse`` says otherwise, the input kind is
+    detected once from the first non-empty chunk, so content that happens to
+    start with "data:" later in a stream is never parsed as an event.
+    """
+    
+    def __init__(self, sse: Optional[bool] = None):
+        """Initialize the handler.
+        
+        Args:
+            sse: Whether chunks are raw event-stream lines rather than
+                content; None detects it from the first non-empty chunk
+        """
+        super().__init__()
+        self._parser = ThinkTagParser()
+        self._sse = sse
+        self._events = SSEParser()
+        self._think_buffer: List[str] = []
+    
+    @property
+    def in_think(self) -> bool:
+        """Check whether the handler is inside a think section."""
+        return self._parser.in_think
     
     def process_chunk(self, chunk: str) -> Optional[str]:
         """Process a response chunk and handle think tags."""
-        try:
-            content = chunk.strip()
-            if not content:
-                return None
-                
-            # Handle think tags
-            if '<think>' in content:
-                self._in_think_section = True
-                content = content.replace('<think>', '')
-            
-            if self._in_think_section:
-                if '</think>' in content:
-                    self._in_think_section = False
-                    content = content.replace('</think>', '')
-                    self._think_buffer.append(content)
-                    think_content = ''.join(self._think_buffer)
-                    self._think_buffer = []
-                    if think_content.strip():
-                        return f"__THINK__: {think_content.strip()}"
-                    return None
-                self._think_buffer.append(content)
-                return None
-            
-            return content if content.strip() else None
-            
-        except Exception as e:
-            print(f"Error processing chunk: {str(e)}")
-            return None
-            
-        except json.JSONDecodeError:
-            return None
+        if self._sse is None and chunk.strip():
+            self._sse = chunk.startswith("data:")
+        if self._sse:
+            chunk = "".join(self._events.feed(chunk.encode("utf-8") + b"\n"))
+        
+        content = []
+        for event in self._parser.feed(chunk):
+            if event.kind == "think":
+                self._think_buffer.append(event.text)
+            else:
+                content.append(event.text)
+        return "".join(content) or None
             
     def get_think_content(self) -> str:
         """Get the accumulated think section content."""
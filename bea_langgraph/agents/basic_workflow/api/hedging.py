@@ -0,0 +1,117 @@
+"""
+Hedged requests for venice.ai streaming completions.
+
+This module decides when a slow stream deserves a duplicate request:
+- The hedge delay is a percentile of recently observed time-to-first-token
+- Hedges are budgeted as a fraction of all requests
+- Hedges are only sent when the concurrency governor and the rate limiter
+  have spare capacity
+"""
+
+import math
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from .concurrency import ConcurrencyGovernor
+from .ratelimit import RateLimiter
+
+
+class HedgingPolicy:
+    """Budgeted hedging policy driven by recent time-to-first-token.
+
+    If the first token of a stream has not arrived after ``delay()`` seconds,
+    the client may launch a duplicate request and keep whichever stream
+    produces a token first. Hedging never queues behind other work: a hedge
+    is skipped when the governor has no free slot or the rate limiter would
+    have to wait, so it cannot amplify overload.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 95.0,
+        max_extra: float = 0.05,
+        min_samples: int = 20,
+        window: int = 200,
+        min_delay: float = 0.0
+    ):
+        """Initialize the policy.
+
+        Args:
+            percentile: TTFT percentile after which a request is hedged
+            max_extra: Maximum hedges as a fraction of all requests
+            min_samples: TTFT samples required before hedging starts
+            window: Number of recent TTFT samples considered
+            min_delay: Lower bound for the hedge delay in seconds
+        """
+        if not 0.0 < percentile <= 100.0:
+            raise ValueError("percentile must be in (0, 100]")
+        if not 0.0 <= max_extra <= 1.0:
+            raise ValueError("max_extra must be between 0 and 1")
+
+        self.percentile = percentile
+        self.max_extra = max_extra
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._stats = {
+            "requests": 0,
+            "hedges": 0,
+            "hedge_wins": 0,
+            "skipped_budget": 0,
+            "skipped_overload": 0
+        }
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        """Get hedge counters and the current hedge delay."""
+        stats = dict(self._stats)
+        stats["delay"] = self.delay()
+        return stats
+
+    def delay(self) -> Optional[float]:
+        """Get the hedge delay, or None while there are too few samples."""
+        if len(self._samples) < max(1, self.min_samples):
+            return None
+        ordered = sorted(self._samples)
+        index = max(0, math.ceil(self.percentile / 100.0 * len(ordered)) - 1)
+        return max(self.min_delay, ordered[index])
+
+    def record_request(self) -> None:
+        """Count a request towards the hedging budget."""
+        self._stats["requests"] += 1
+
+    def record_ttft(self, seconds: float) -> None:
+        """Record the time to first token of a stream."""
+        self._samples.append(seconds)
+
+    def record_win(self, hedged: bool) -> None:
+        """Record which stream of a hedged request produced first."""
+        if hedged:
+            self._stats["hedge_wins"] += 1
+
+    def try_hedge(
+        self,
+        governor: Optional[ConcurrencyGovernor] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        tokens: int = 0
+    ) -> bool:
+        """Check the budget and capacity, and reserve a hedge if both allow.
+
+        Args:
+            governor: Concurrency governor the hedge would draw a slot from
+            rate_limiter: Rate limiter the hedge would be admitted by
+            tokens: Estimated tokens of the hedge
+
+        Returns:
+            True if a duplicate request should be sent
+        """
+        if self._stats["hedges"] + 1 > self.max_extra * self._stats["requests"]:
+            self._stats["skipped_budget"] += 1
+            return False
+        if governor is not None and (
+            governor.queue_depth > 0 or governor.in_flight >= governor.limit
+        ) or (rate_limiter is not None and not rate_limiter.can_admit(tokens)):
+            self._stats["skipped_overload"] += 1
+            return False
+        self._stats["hedges"] += 1
+        return True
@@ -0,0 +1,211 @@
+"""
+Request and token rate limiting for venice.ai quotas.
+
+This module provides a scheduler for requests-per-minute (RPM) and
+tokens-per-minute (TPM) quotas:
+- Two token buckets refilled continuously at the quota rate
+- Prompt token estimation from messages plus the completion budget
+- Global pauses honoring Retry-After headers
+- Reconciliation of estimates against reported usage
+"""
+
+import asyncio
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header into a delay in seconds.
+
+    Args:
+        value: Header value, either delay seconds or an HTTP date
+
+    Returns:
+        Non-negative delay in seconds, or None if the header is missing or invalid
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at is None:
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class TokenBucket:
+    """Continuously refilled token bucket.
+
+    The balance may go negative when actual usage exceeds what was reserved;
+    the debt is paid off by the refill before new requests are admitted.
+    """
+
+    def __init__(self, per_minute: float, burst_seconds: float = 60.0):
+        """Initialize a full bucket.
+
+        Args:
+            per_minute: Refill rate in units per minute
+            burst_seconds: Capacity expressed in seconds of refill
+        """
+        if per_minute <= 0:
+            raise ValueError("per_minute must be positive")
+        if burst_seconds <= 0:
+            raise ValueError("burst_seconds must be positive")
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def wait_time(self, amount: float) -> float:
+        """Get the seconds until the bucket can cover an amount."""
+        self._refill()
+        # Requests larger than the bucket are admitted once it is full
+        deficit = min(amount, self.capacity) - self.tokens
+        return deficit / self.rate if deficit > 0 else 0.0
+
+    def consume(self, amount: float) -> None:
+        """Take an amount from the bucket."""
+        self._refill()
+        self.tokens -= amount
+
+    def refund(self, amount: float) -> None:
+        """Return an amount to the bucket, up to its capacity."""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+    def _refill(self) -> None:
+        """Add the tokens accrued since the last update."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+class RateLimiter:
+    """Dual token-bucket scheduler for RPM and TPM quotas.
+
+    A request is admitted only when both buckets can cover it. Waiters are
+    served in arrival order, so a large request is not starved by a stream of
+    small ones. Share one limiter between every client using the same API key.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        burst_seconds: float = 60.0,
+        chars_per_token: float = 4.0,
+        tokens_per_message: int = 4
+    ):
+        """Initialize the limiter.
+
+        Args:
+            requests_per_minute: Request quota (None for no limit)
+            tokens_per_minute: Prompt plus completion token quota (None for no limit)
+            burst_seconds: Bucket capacity expressed in seconds of quota
+            chars_per_token: Characters per token used for estimation
+            tokens_per_message: Formatting overhead added per message
+        """
+        self.requests = (
+            TokenBucket(requests_per_minute, burst_seconds) if requests_per_minute else None
+        )
+        self.tokens = (
+            TokenBucket(tokens_per_minute, burst_seconds) if tokens_per_minute else None
+        )
+        self.chars_per_token = chars_per_token
+        self.tokens_per_message = tokens_per_message
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+        self._stats = {
+            "admitted": 0,
+            "delayed": 0,
+            "total_wait": 0.0,
+            "retry_after_pauses": 0,
+            "estimated_tokens": 0,
+            "reported_tokens": 0,
+            "reconciled": 0
+        }
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        """Get admission, wait and token accounting metrics."""
+        return dict(self._stats)
+
+    def estimate_tokens(self, messages: List[Dict[str, str]], max_tokens: int) -> int:
+        """Estimate the tokens a request will count against the quota.
+
+        Args:
+            messages: Chat messages of the request
+            max_tokens: Completion budget of the request
+
+        Returns:
+            Estimated prompt tokens plus max_tokens
+        """
+        chars = sum(len(message.get("content") or "") for message in messages)
+        prompt = int(chars / self.chars_per_token) + self.tokens_per_message * len(messages)
+        return prompt + max_tokens
+
+    async def acquire(self, tokens: int = 0) -> None:
+        """Wait until both budgets allow a request of the given size.
+
+        Args:
+            tokens: Estimated tokens of the request
+        """
+        start = time.monotonic()
+        async with self._lock:
+            while True:
+                wait = self._blocked_until - time.monotonic()
+                if self.requests is not None:
+                    wait = max(wait, self.requests.wait_time(1))
+                if self.tokens is not None:
+                    wait = max(wait, self.tokens.wait_time(tokens))
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+
+            if self.requests is not None:
+                self.requests.consume(1)
+            if self.tokens is not None:
+                self.tokens.consume(tokens)
+
+        waited = time.monotonic() - start
+        self._stats["admitted"] += 1
+        self._stats["estimated_tokens"] += tokens
+        self._stats["total_wait"] += waited
+        if waited > 0.001:
+            self._stats["delayed"] += 1
+
+    def can_admit(self, tokens: int = 0) -> bool:
+        """Check whether a request could be admitted without waiting."""
+        if self._lock.locked() or self._blocked_until > time.monotonic():
+            return False
+        if self.requests is not None and self.requests.wait_time(1) > 0:
+            return False
+        return self.tokens is None or self.tokens.wait_time(tokens) <= 0
+
+    def pause(self, seconds: float) -> None:
+        """Hold back every request for a number of seconds, e.g. after a 429."""
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+        self._stats["retry_after_pauses"] += 1
+
+    def reconcile(self, estimated: int, actual: int) -> None:
+        """Correct the token bucket once a response reports its usage.
+
+        Args:
+            estimated: Tokens reserved when the request was admitted
+            actual: Total tokens reported by the provider
+        """
+        self._stats["reported_tokens"] += actual
+        self._stats["reconciled"] += 1
+        if self.tokens is None:
+            return
+        if actual < estimated:
+            self.tokens.refund(estimated - actual)
+        elif actual > estimated:
+            self.tokens.consume(actual - estimated)
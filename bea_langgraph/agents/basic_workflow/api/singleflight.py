@@ -0,0 +1,116 @@
+"""
+Single-flight coalescing for streaming completions.
+
+This module lets concurrent, identical requests share one upstream stream.
+The first caller starts the upstream request; later callers attach to it and
+every consumer receives the full chunk sequence from the beginning.
+"""
+
+import asyncio
+from typing import AsyncGenerator, Callable, Dict, List, Optional
+
+
+class _Flight:
+    """State of one in-flight upstream stream."""
+
+    def __init__(self):
+        self.chunks: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.task: Optional[asyncio.Task] = None
+        self.consumers = 0
+        self.changed = asyncio.Event()
+
+    def notify(self) -> None:
+        """Wake every consumer waiting for new chunks."""
+        changed, self.changed = self.changed, asyncio.Event()
+        changed.set()
+
+
+class SingleFlight:
+    """Fan-out tee that coalesces identical in-flight streams.
+
+    The upstream stream runs in its own task and appends chunks to a shared,
+    append-only log. Each consumer reads the log at its own cursor, so a slow
+    consumer never holds back the others. The upstream task is cancelled once
+    every consumer has gone away.
+    """
+
+    def __init__(self):
+        """Initialize with no flights in progress."""
+        self._flights: Dict[str, _Flight] = {}
+        self._stats = {"upstream_requests": 0, "coalesced_requests": 0}
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Get upstream and coalesced request counters."""
+        stats = dict(self._stats)
+        stats["in_flight"] = len(self._flights)
+        return stats
+
+    async def stream(
+        self,
+        key: str,
+        factory: Callable[[], AsyncGenerator[str, None]]
+    ) -> AsyncGenerator[str, None]:
+        """Stream chunks for a request, sharing an in-flight upstream if any.
+
+        Args:
+            key: Canonical key identifying identical requests
+            factory: Callable that starts the upstream stream when needed
+
+        Yields:
+            Every chunk of the upstream stream, starting from the first
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight()
+            self._flights[key] = flight
+            flight.task = asyncio.create_task(self._run(key, flight, factory))
+            self._stats["upstream_requests"] += 1
+        else:
+            self._stats["coalesced_requests"] += 1
+
+        flight.consumers += 1
+        index = 0
+        try:
+            while True:
+                if index < len(flight.chunks):
+                    chunk = flight.chunks[index]
+                    index += 1
+                    yield chunk
+                elif flight.done:
+                    if flight.error is not None:
+                        raise flight.error
+                    return
+                else:
+                    await flight.changed.wait()
+        finally:
+            flight.consumers -= 1
+            if flight.consumers == 0 and not flight.done:
+                flight.task.cancel()
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+
+    async def _run(
+        self,
+        key: str,
+        flight: _Flight,
+        factory: Callable[[], AsyncGenerator[str, None]]
+    ) -> None:
+        """Drive the upstream stream and publish its chunks to the flight."""
+        upstream = factory()
+        try:
+            async for chunk in upstream:
+                flight.chunks.append(chunk)
+                flight.notify()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            flight.error = e
+        finally:
+            await upstream.aclose()
+            flight.done = True
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            flight.notify()
@@ -0,0 +1,238 @@
+"""
+Incremental Server-Sent Events parser for streaming completions.
+
+This module parses the raw bytes of a streaming chat completion response and
+extracts the generated content without decoding or stripping every line.
+orjson is used for JSON decoding when it is installed.
+"""
+
+import json
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+_decode = json.JSONDecoder().decode
+
+
+def _json_loads(data: bytes) -> Any:
+    """Decode a JSON payload with the standard library."""
+    # Decoding first skips json's byte-encoding detection, and calling the
+    # decoder directly skips json.loads' keyword handling
+    return _decode(data.decode("utf-8"))
+
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:  # pragma: no cover - depends on the environment
+    _loads = _json_loads
+
+_DONE = b"[DONE]"
+
+
+class SSEParser:
+    """Incremental parser for OpenAI-style chat completion event streams.
+
+    Raw chunks can be fed exactly as they arrive from the network; lines and
+    events split across reads are reassembled internally. Each ``data:`` line
+    that holds a complete JSON payload is dispatched immediately, which covers
+    servers that omit the blank line between events. Payloads spread over
+    several ``data:`` lines are joined with newlines and dispatched at the
+    blank line that ends the event, as the SSE specification requires. A
+    ``data:`` line that is a complete JSON object on its own starts a new
+    event even without that blank line, so one malformed line never swallows
+    the events after it.
+
+    Malformed events are counted and reported to ``on_error`` rather than
+    printed, so the streaming loop never writes to stdout. Token usage reported
+    by a content-free event (usually the last one) is kept in ``usage``.
+    """
+
+    def __init__(self, on_error: Optional[Callable[[bytes, Exception], None]] = None):
+        """Initialize the parser.
+
+        Args:
+            on_error: Optional callback receiving the raw payload and the
+                exception for every malformed event
+        """
+        self.on_error = on_error
+        self.events = 0
+        self.malformed = 0
+        self.done = False
+        self.usage: Optional[Dict[str, Any]] = None
+        self._buffer = b""
+        self._pending: List[bytes] = []
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Get the number of parsed and malformed events."""
+        return {"events": self.events, "malformed_events": self.malformed}
+
+    def feed(self, chunk: bytes) -> List[str]:
+        """Feed a raw network chunk and return any completed content pieces."""
+        data = self._buffer + chunk if self._buffer else chunk
+        lines = data.split(b"\n")
+        self._buffer = lines.pop()
+        strip_cr = b"\r" in data
+        contents: List[str] = []
+        loads = _loads
+        pending = self._pending
+        events = 0
+        for line in lines:
+            if strip_cr and line.endswith(b"\r"):
+                line = line[:-1]
+            # Fast path: outside a multi-line payload, blank lines end nothing
+            # and a single-line JSON event is dispatched at once
+            if not pending:
+                if not line:
+                    continue
+                if line.startswith(b"data: {"):
+                    try:
+                        event = loads(line[6:])
+                    except ValueError:
+                        pending.append(line[6:])
+                        continue
+                    events += 1
+                    try:
+                        content = event["choices"][0]["delta"]["content"]
+                    except (KeyError, IndexError, TypeError):
+                        self._record_usage(event)
+                        continue
+                    if content.__class__ is str:
+                        if content:
+                            contents.append(content)
+                    elif content is not None:
+                        self._report(line[6:], TypeError("content is not a string"))
+                    continue
+            self._process_line(line, contents)
+        self.events += events
+        return contents
+
+    def close(self) -> List[str]:
+        """Flush a trailing line and any pending event at end of stream."""
+        contents: List[str] = []
+        if self._buffer:
+            line = self._buffer.rstrip(b"\r")
+            self._buffer = b""
+            self._process_line(line, contents)
+        self._dispatch_pending(contents)
+        return contents
+
+    def _process_line(self, line: bytes, contents: List[str]) -> None:
+        """Handle one complete line of the event stream."""
+        if not line:
+            self._dispatch_pending(contents)
+            return
+        if not line.startswith(b"data:"):
+            # Comments and other fields (event, id, retry) carry no content
+            return
+
+        data = line[6:] if line[5:6] == b" " else line[5:]
+        if self._pending:
+            if data == _DONE:
+                # The pending payload ended without a blank line
+                self._dispatch_pending(contents)
+                self.done = True
+                return
+            if data.startswith(b"{"):
+                try:
+                    event = _loads(data)
+                except ValueError:
+                    pass
+                else:
+                    # A new event: the pending payload ended without a blank line
+                    self._dispatch_pending(contents)
+                    self._handle_event(event, contents)
+                    return
+            self._pending.append(data)
+            return
+        if data == _DONE:
+            self.done = True
+            return
+        try:
+            event = _loads(data)
+        except ValueError:
+            # Possibly the first line of a multi-line payload
+            self._pending.append(data)
+            return
+        self._handle_event(event, contents)
+
+    def _dispatch_pending(self, contents: List[str]) -> None:
+        """Dispatch a payload accumulated over several data lines."""
+        if not self._pending:
+            return
+        data = b"\n".join(self._pending)
+        self._pending.clear()
+        if data == _DONE:
+            self.done = True
+            return
+        try:
+            event = _loads(data)
+        except ValueError as e:
+            self._report(data, e)
+            return
+        self._handle_event(event, contents)
+
+    def _handle_event(self, event: Any, contents: List[str]) -> None:
+        """Extract the delta content of a decoded event."""
+        self.events += 1
+        try:
+            content = event["choices"][0]["delta"]["content"]
+        except (KeyError, IndexError, TypeError):
+            # Role-only deltas, usage-only events and similar carry no content
+            self._record_usage(event)
+            return
+        if content.__class__ is str:
+            if content:
+                contents.append(content)
+        elif content is not None:
+            self._report(json.dumps(event).encode(), TypeError("content is not a string"))
+
+    def _record_usage(self, event: Any) -> None:
+        """Keep the token usage reported by a content-free event."""
+        if event.__class__ is dict and event.get("usage"):
+            self.usage = event["usage"]
+
+    def _report(self, data: bytes, error: Exception) -> None:
+        """Count a malformed event and notify the error callback."""
+        self.malformed += 1
+        if self.on_error is not None:
+            self.on_error(data, error)
+
+
+class ChoiceSSEParser(SSEParser):
+    """SSE parser that demultiplexes the choices of an ``n > 1`` stream.
+
+    ``feed`` and ``close`` return ``(index, content)`` pairs, one for every
+    choice delta in the event, instead of plain content strings.
+    """
+
+    def feed(self, chunk: bytes) -> List[Tuple[int, str]]:
+        """Feed a raw network chunk and return completed (index, content) pairs."""
+        data = self._buffer + chunk if self._buffer else chunk
+        lines = data.split(b"\n")
+        self._buffer = lines.pop()
+        contents: List[Tuple[int, str]] = []
+        for line in lines:
+            self._process_line(line.rstrip(b"\r"), contents)
+        return contents
+
+    def _handle_event(self, event: Any, contents: List[Tuple[int, str]]) -> None:
+        """Extract the delta content of every choice in a decoded event."""
+        self.events += 1
+        try:
+            choices = event["choices"]
+        except (KeyError, TypeError):
+            choices = None
+        if not choices:
+            self._record_usage(event)
+            return
+        for choice in choices:
+            try:
+                content = choice["delta"]["content"]
+            except (KeyError, TypeError):
+                continue
+            if content.__class__ is str:
+                if content:
+                    contents.append((choice.get("index", 0), content))
+            elif content is not None:
+                self._report(json.dumps(event).encode(), TypeError("content is not a string"))
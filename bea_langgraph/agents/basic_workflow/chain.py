@@ -9,6 +9,17 @@ import asyncio
 from typing import Dict, Any, List, Tuple, cast, Union
 from .models import DocumentState, WorkflowConfig
 from .api.client import VeniceClient
+from ...common.streaming import StreamAccumulator
+
+
+def _complete_document(acc: StreamAccumulator) -> bool:
+    """Stop once a document has sufficient content and structure."""
+    return acc.length > 200 and acc.paragraph_breaks >= 2
+
+
+def _complete_feedback(acc: StreamAccumulator) -> bool:
+    """Stop once review feedback has sufficient content."""
+    return acc.length > 200 and acc.newlines >= 3
 
 
 class DocumentWorkflow:
@@ -64,28 +75,24 @@ class DocumentWorkflow:
         
         try:
             print("Generating document...")
-            content_buffer = []
+            content = StreamAccumulator(stop_when=_complete_document)
             try:
                 async with asyncio.timeout(30):  # Timeout for generation step
                     async for chunk in self.client.stream_completion(messages, timeout=30.0):
-                        if chunk.startswith("<think>"):
-                            print(f"\nThinking: {chunk[7:-8]}")  # Strip <think> tags
-                            continue
-                        content_buffer.append(chunk)
-                        content = ''.join(content_buffer)
-                        print(f"\rGenerating document... ({len(content)} chars)", end="", flush=True)
+                        done = content.append(chunk)
+                        print(f"\rGenerating document... ({content.length} chars)", end="", flush=True)
                         # Break if we have a complete document with sufficient content
-                        if len(content) > 200 and content.count('\n\n') >= 2:
+                        if done:
                             break
             except asyncio.TimeoutError:
                 print("\nGeneration timed out, using partial content")
-                if not content_buffer:
+                if not content.chunks:
                     raise Exception("No content generated before timeout")
             except Exception as e:
                 print(f"\nError during generation: {str(e)}")
                 raise
             
-            doc_state.content = "".join(content_buffer)
+            doc_state.content = content.text
             print("\nDocument generation complete")
             return doc_state
         except Exception as e:
@@ -101,25 +108,20 @@ class DocumentWorkflow:
         
         try:
             print("\nReviewing document...")
-            feedback_buffer = []
+            feedback = StreamAccumulator(stop_when=_complete_feedback)
             try:
                 async with asyncio.timeout(30):
                     async for chunk in self.client.stream_completion(messages, timeout=30.0):
-                        if chunk.startswith("<think>"):
-                            print(f"\nThinking: {chunk[7:-8]}")  # Strip <think> tags
-                            continue
-                        feedback_buffer.append(chunk)
                         print(".", end="", flush=True)
-                        feedback = ''.join(feedback_buffer)
                         # Break if we have complete feedback
-                        if len(feedback) > 200 and feedback.count('\n') >= 3:
+                        if feedback.append(chunk):
                             break
             except Exception as e:
                 print(f"\nError during review: {str(e)}")
                 raise
             
             print("\nDocument review complete")
-            return "".join(feedback_buffer)
+            return feedback.text
         except Exception as e:
             print(f"\nError during document review: {str(e)}")
             raise
@@ -133,25 +135,20 @@ class DocumentWorkflow:
         
         try:
             print("\nRevising document...")
-            revised_content = []
+            revised_content = StreamAccumulator(stop_when=_complete_document)
             try:
                 async with asyncio.timeout(120):
                     async for chunk in self.client.stream_completion(messages, timeout=120.0):
-                        if chunk.startswith("<think>"):
-                            print(f"\nThinking: {chunk[7:-8]}")  # Strip <think> tags
-                            continue
-                        revised_content.append(chunk)
                         print(".", end="", flush=True)
-                        content = ''.join(revised_content)
                         # Break if we have a complete revision
-                        if len(content) > 200 and content.count('\n\n') >= 2:
+                        if revised_content.append(chunk):
                             break
             except Exception as e:
                 print(f"\nError during revision: {str(e)}")
                 raise
             
             print("\nDocument revision complete")
-            doc_state.add_revision("".join(revised_content))
+            doc_state.add_revision(revised_content.text)
             return doc_state
         except Exception as e:
             print(f"\nError during document revision: {str(e)}")
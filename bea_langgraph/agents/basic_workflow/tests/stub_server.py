@@ -0,0 +1,105 @@
+"""Stand-in chat completions server for client tests.
+
+Tests supply only the request handler; this module serves it on a local
+port and provides helpers for writing streamed (SSE) replies, along with a
+configurable endpoint for the common cases.
+"""
+
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Union
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+Handler = Callable[[web.Request], Awaitable[web.StreamResponse]]
+
+DONE = b"data: [DONE]\n\n"
+
+
+def sse_event(content: str, index: Optional[int] = None) -> bytes:
+    """Encode one streamed delta, tagged with a choice index if given."""
+    choice = {"delta": {"content": content}}
+    if index is not None:
+        choice = {"index": index, **choice}
+    return f"data: {json.dumps({'choices': [choice]})}\n\n".encode()
+
+
+async def stream_reply(request: web.Request, chunks: Iterable[bytes]) -> web.StreamResponse:
+    """Answer a request with the given raw SSE chunks followed by [DONE]."""
+    response = web.StreamResponse()
+    await response.prepare(request)
+    for chunk in chunks:
+        await response.write(chunk)
+    await response.write(DONE)
+    await response.write_eof()
+    return response
+
+
+class StubEndpoint:
+    """Stand-in endpoint that records its requests and streams one reply.
+
+    Requests are numbered from 1 in arrival order, and the reply and delay
+    may depend on that number, so tests can stall or answer particular
+    requests differently. Set ``status`` to change the response status
+    between requests.
+    """
+
+    def __init__(
+        self,
+        reply: Union[str, Callable[[int], str]] = "ok",
+        delay: Union[float, Callable[[int], float]] = 0.0,
+        status: int = 200,
+        drop: int = 0,
+        partial: Sequence[str] = ()
+    ):
+        """Initialize the endpoint.
+
+        Args:
+            reply: Streamed content, or a callable of the request number
+            delay: Seconds to wait before answering, or a callable of the
+                request number
+            status: Response status; anything but 200 answers with an error
+            drop: Number of first requests whose connection is dropped
+                mid-stream, after sending ``partial``
+            partial: Content chunks sent before a dropped connection
+        """
+        self.reply = reply
+        self.delay = delay
+        self.status = status
+        self.drop = drop
+        self.partial = partial
+        self.requests: List[Dict[str, Any]] = []
+
+    async def __call__(self, request: web.Request) -> web.StreamResponse:
+        """Answer one request."""
+        self.requests.append(await request.json())
+        number = len(self.requests)
+        delay = self.delay(number) if callable(self.delay) else self.delay
+        if delay:
+            await asyncio.sleep(delay)
+        if self.status != 200:
+            return web.Response(status=self.status, text="unavailable")
+        if number <= self.drop:
+            response = web.StreamResponse()
+            await response.prepare(request)
+            for chunk in self.partial:
+                await response.write(sse_event(chunk))
+            request.transport.close()
+            return response
+        reply = self.reply(number) if callable(self.reply) else self.reply
+        return await stream_reply(request, [sse_event(reply)])
+
+
+@asynccontextmanager
+async def serve(handler: Handler) -> AsyncIterator[str]:
+    """Serve a handler at /chat/completions on a local port.
+
+    Yields:
+        Base URL of the server
+    """
+    app = web.Application()
+    app.router.add_post("/chat/completions", handler)
+    async with TestServer(app) as server:
+        yield f"http://{server.host}:{server.port}"
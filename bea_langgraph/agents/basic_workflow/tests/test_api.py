@@ -37,6 +37,17 @@ def test_think_tag_handling():
     # Verify think content
     assert handler.get_think_content() == "reasoning"
 
+def test_content_is_never_parsed_as_sse():
+    """Test that content chunks starting with "data:" are kept as content."""
+    handler = ThinkTagHandler(sse=False)
+    assert handler.process_chunk("data: {\"key\": 1}\n") == "data: {\"key\": 1}\n"
+    assert handler.process_chunk("<think>data: hidden</think>shown") == "shown"
+    assert handler.get_think_content() == "data: hidden"
+    
+    handler = ThinkTagHandler()
+    assert handler.process_chunk("The format is") == "The format is"
+    assert handler.process_chunk("data: value") == "data: value"
+
 @pytest.mark.asyncio
 async def test_stream_completion(api_client, monkeypatch):
     """Test streaming completion with think tag handling."""
@@ -51,6 +62,9 @@ async def test_stream_completion(api_client, monkeypatch):
             self._index = 0
             self.content = self
 
+        def iter_any(self):
+            return self
+
         def __aiter__(self):
             return self
 
@@ -94,3 +108,42 @@ async def test_stream_completion(api_client, monkeypatch):
     
     assert len(chunks) == 1
     assert chunks[0] == "test content"
+
+@pytest.mark.asyncio
+async def test_pooled_session_reuse():
+    """Test that sequential requests share one pooled connection."""
+    from .stub_server import serve, sse_event, stream_reply
+    
+    async def completions(request):
+        return await stream_reply(request, [sse_event("ok")])
+    
+    async with serve(completions) as base_url:
+        async with VeniceClient("test_key", base_url=base_url) as client:
+            for _ in range(3):
+                chunks = [c async for c in client.stream_completion([{"role": "user", "content": "hi"}])]
+                assert chunks == ["ok"]
+            
+            stats = client.connection_stats
+            assert stats["sessions_created"] == 1
+            assert stats["requests"] == 3
+            assert stats["connections_created"] == 1
+            assert stats["connections_reused"] == 2
+        
+        assert client._session is None
+
+@pytest.mark.asyncio
+async def test_stream_events_separates_reasoning(api_client, monkeypatch):
+    """Test that think sections split across chunks become think events."""
+    async def fake_stream_request(payload, timeout, priority):
+        for chunk in ["<thi", "nk>step ", "one</th", "ink>", "answer"]:
+            yield chunk
+    
+    monkeypatch.setattr(api_client, "_stream_request", fake_stream_request)
+    messages = [{"role": "user", "content": "test prompt"}]
+    
+    events = [e async for e in api_client.stream_events(messages)]
+    assert "".join(e.text for e in events if e.kind == "think") == "step one"
+    assert "".join(e.text for e in events if e.kind == "content") == "answer"
+    
+    chunks = [c async for c in api_client.stream_completion(messages)]
+    assert chunks == ["answer"]
@@ -0,0 +1,141 @@
+"""Tests for load balancing across endpoints."""
+
+import asyncio
+import time
+import pytest
+from ..api.balancer import Endpoint, EndpointPool
+from ..api.client import VeniceClient
+from .stub_server import StubEndpoint, serve
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+def test_prefers_cheaper_endpoint():
+    """Test that power-of-two-choices picks the lower latency endpoint."""
+    pool = EndpointPool(["http://fast", "http://slow"])
+    pool.endpoints[0].latency = 0.1
+    pool.endpoints[1].latency = 1.0
+    picks = [pool._choose().url for _ in range(20)]
+    assert picks == ["http://fast"] * 20
+
+def test_in_flight_spreads_load():
+    """Test that queued requests on one endpoint shift load to the other."""
+    pool = EndpointPool([("http://a", 1.0), ("http://b", 1.0)])
+    for endpoint in pool.endpoints:
+        endpoint.latency = 0.1
+    chosen = [pool.acquire().url for _ in range(4)]
+    assert chosen.count("http://a") == 2
+    assert chosen.count("http://b") == 2
+
+def test_ejection_and_probe():
+    """Test that failing endpoints are ejected and probed back in."""
+    pool = EndpointPool(
+        [Endpoint("http://a"), Endpoint("http://b")],
+        max_consecutive_failures=2,
+        eject_duration=0.05
+    )
+    bad = pool.endpoints[1]
+    for _ in range(2):
+        pool.endpoints[1].in_flight += 1
+        pool.release(bad, None, failed=True)
+    assert bad.ejected_until is not None
+    assert all(pool._choose() is pool.endpoints[0] for _ in range(10))
+    
+    time.sleep(0.06)
+    probe = pool.acquire()
+    assert probe is bad and bad.probing
+    assert pool._choose() is pool.endpoints[0]  # only one probe at a time
+    pool.release(bad, 0.1, failed=False)
+    assert bad.ejected_until is None
+    assert bad.stats()["ejections"] == 1
+
+@pytest.mark.asyncio
+async def test_client_balances_across_local_servers():
+    """Test that traffic avoids a failing endpoint and favours a fast one."""
+    fast = StubEndpoint("fast")
+    slow = StubEndpoint("slow", delay=0.05)
+    down = StubEndpoint("down", status=503)
+    
+    async with serve(fast) as fast_url, serve(slow) as slow_url, serve(down) as down_url:
+        pool = EndpointPool([fast_url, slow_url, down_url], eject_duration=60)
+        async with VeniceClient("test_key", endpoints=pool, retry_delay=0.0) as client:
+            replies = []
+            for _ in range(30):
+                chunks = [c async for c in client.stream_completion(MESSAGES)]
+                replies.append("".join(chunks))
+    
+    assert set(replies) <= {"fast", "slow"}
+    assert len(replies) == 30
+    assert len(fast.requests) > len(slow.requests)
+    assert len(down.requests) <= 3
+    assert pool.endpoints[2].ejected_until is not None
+    assert all(endpoint.in_flight == 0 for endpoint in pool.endpoints)
+
+def test_abandoned_probe_keeps_endpoint_ejected():
+    """Test that a probe cancelled for unrelated reasons neither restores nor scores the endpoint."""
+    pool = EndpointPool([Endpoint("http://a"), Endpoint("http://b")], max_consecutive_failures=1, eject_duration=0.01)
+    bad = pool.endpoints[1]
+    bad.in_flight += 1
+    pool.release(bad, None, failed=True)
+    time.sleep(0.02)
+    
+    probe = pool.acquire()
+    assert probe is bad and bad.probing
+    error_rate = bad.error_rate
+    pool.abandon(bad)
+    assert bad.ejected_until is not None and not bad.probing
+    assert bad.error_rate == error_rate and bad.in_flight == 0
+    assert pool.acquire() is bad  # the next request probes again
+
+@pytest.mark.asyncio
+async def test_caller_timeouts_eject_hanging_endpoint():
+    """Test that requests the caller gives up on count as endpoint failures."""
+    async with serve(StubEndpoint("hang", delay=5)) as hang_url:
+        pool = EndpointPool([hang_url], max_consecutive_failures=3, eject_duration=60)
+        async with VeniceClient("test_key", endpoints=pool) as client:
+            for _ in range(3):
+                with pytest.raises(TimeoutError):
+                    async with asyncio.timeout(0.1):
+                        await client.complete(MESSAGES)
+    
+    stats = pool.endpoints[0].stats()
+    assert stats["failures"] == 3
+    assert stats["ejected"]
+    assert stats["latency"] >= 0.1
+    assert stats["in_flight"] == 0
+
+@pytest.mark.asyncio
+async def test_hedge_loser_is_not_scored():
+    """Test that the cancelled loser of a hedge race does not count as a failure."""
+    from ..api.hedging import HedgingPolicy
+    
+    policy = HedgingPolicy(max_extra=1.0, min_samples=5)
+    for _ in range(5):
+        policy.record_ttft(0.02)
+    async with serve(StubEndpoint(delay=lambda number: 5 if number == 1 else 0)) as base_url:
+        pool = EndpointPool([base_url])
+        async with VeniceClient("test_key", endpoints=pool, hedging=policy) as client:
+            chunks = [c async for c in client.stream_completion(MESSAGES)]
+    
+    assert chunks == ["ok"]
+    stats = pool.endpoints[0].stats()
+    assert stats["requests"] == 2
+    assert stats["failures"] == 0 and stats["error_rate"] == 0.0
+    assert stats["in_flight"] == 0
+
+@pytest.mark.asyncio
+async def test_cancelled_requests_are_abandoned():
+    """Test that requests cancelled for reasons other than a timeout do not eject the endpoint."""
+    async with serve(StubEndpoint("hang", delay=5)) as hang_url:
+        pool = EndpointPool([hang_url], max_consecutive_failures=3, eject_duration=60)
+        async with VeniceClient("test_key", endpoints=pool) as client:
+            tasks = [asyncio.ensure_future(client.complete(MESSAGES, coalesce=False)) for _ in range(4)]
+            await asyncio.sleep(0.1)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await asyncio.sleep(0)
+    
+    stats = pool.endpoints[0].stats()
+    assert stats["requests"] == 4
+    assert stats["failures"] == 0 and not stats["ejected"]
+    assert stats["in_flight"] == 0
@@ -0,0 +1,205 @@
+"""Tests for the circuit breaker."""
+
+import time
+import pytest
+from aiohttp import web
+from ..api.breaker import (
+    CircuitBreaker,
+    CircuitOpenError,
+    CLOSED,
+    ERROR,
+    HALF_OPEN,
+    OPEN,
+    SUCCESS,
+    TIMEOUT
+)
+from ..api.client import VeniceClient
+from .stub_server import serve
+
+def run(breaker, outcomes):
+    """Send admitted requests with the given outcomes through a breaker."""
+    for outcome in outcomes:
+        breaker.check()
+        breaker.record(outcome)
+
+def test_opens_on_error_rate():
+    """Test that the circuit opens once the error rate crosses the threshold."""
+    events = []
+    breaker = CircuitBreaker(min_requests=4, error_threshold=0.5, on_state_change=lambda *e: events.append(e))
+    run(breaker, [SUCCESS, SUCCESS, ERROR])
+    assert breaker.state == CLOSED
+    run(breaker, [ERROR])
+    assert breaker.state == OPEN
+    assert events == [(CLOSED, OPEN)]
+    
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+    assert breaker.stats["rejected"] == 1
+
+def test_opens_on_timeout_rate():
+    """Test that timeouts trip the circuit at their own, lower threshold."""
+    breaker = CircuitBreaker(min_requests=4, error_threshold=0.9, timeout_threshold=0.25)
+    run(breaker, [SUCCESS, SUCCESS, SUCCESS, TIMEOUT])
+    assert breaker.state == OPEN
+
+def test_half_open_trial():
+    """Test the half-open trial closes on success and reopens on failure."""
+    events = []
+    breaker = CircuitBreaker(min_requests=1, open_duration=0.02, on_state_change=lambda *e: events.append(e))
+    run(breaker, [ERROR])
+    time.sleep(0.03)
+    
+    breaker.check()
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.check()  # only one trial at a time
+    breaker.record(ERROR)
+    assert breaker.state == OPEN
+    
+    time.sleep(0.03)
+    run(breaker, [SUCCESS])
+    assert breaker.state == CLOSED
+    assert events == [(CLOSED, OPEN), (OPEN, HALF_OPEN), (HALF_OPEN, OPEN), (OPEN, HALF_OPEN), (HALF_OPEN, CLOSED)]
+
+def test_cancelled_trial_frees_slot():
+    """Test that a cancelled half-open trial lets another request try."""
+    breaker = CircuitBreaker(min_requests=1, open_duration=0.01)
+    run(breaker, [ERROR])
+    time.sleep(0.02)
+    breaker.check()
+    breaker.record(None)
+    breaker.check()
+    assert breaker.state == HALF_OPEN
+
+@pytest.mark.asyncio
+async def test_client_fails_fast_when_provider_degrades():
+    """Test that the client stops calling a failing provider."""
+    calls = []
+    
+    async def completions(request):
+        calls.append(1)
+        return web.Response(status=503, text="down")
+    
+    breaker = CircuitBreaker(min_requests=3, open_duration=60)
+    async with serve(completions) as base_url:
+        async with VeniceClient(
+            "test_key",
+            base_url=base_url,
+            breaker=breaker,
+            retry_delay=0.0
+        ) as client:
+            messages = [{"role": "user", "content": "hi"}]
+            for _ in range(3):
+                with pytest.raises(Exception):
+                    async for _ in client.stream_completion(messages):
+                        pass
+    
+    assert len(calls) == 3
+    assert breaker.state == OPEN
+    assert breaker.stats["rejected"] == 2
+
+@pytest.mark.asyncio
+async def test_caller_timeouts_open_the_circuit():
+    """Test that requests abandoned by the caller's timeout count as timeouts."""
+    import asyncio
+    
+    async def completions(request):
+        await asyncio.sleep(5)
+        return web.Response(status=503, text="too late")
+    
+    breaker = CircuitBreaker(min_requests=3, open_duration=60)
+    async with serve(completions) as base_url:
+        async with VeniceClient("test_key", base_url=base_url, breaker=breaker) as client:
+            messages = [{"role": "user", "content": "hi"}]
+            for _ in range(3):
+                with pytest.raises(TimeoutError):
+                    async with asyncio.timeout(0.1):
+                        await client.complete(messages)
+            with pytest.raises(CircuitOpenError):
+                await client.complete(messages)
+    
+    assert breaker.stats["timeouts"] == 3
+    assert breaker.state == OPEN
+
+@pytest.mark.asyncio
+async def test_hedge_loser_is_not_a_timeout():
+    """Test that cancelling the losing stream of a hedge race records nothing."""
+    from ..api.hedging import HedgingPolicy
+    from .stub_server import StubEndpoint
+    
+    policy = HedgingPolicy(max_extra=1.0, min_samples=5)
+    for _ in range(5):
+        policy.record_ttft(0.02)
+    breaker = CircuitBreaker(min_requests=1)
+    async with serve(StubEndpoint(delay=lambda number: 5 if number == 1 else 0)) as base_url:
+        async with VeniceClient("test_key", base_url=base_url, breaker=breaker, hedging=policy) as client:
+            chunks = [c async for c in client.stream_completion([{"role": "user", "content": "hi"}])]
+    
+    assert chunks == ["ok"]
+    assert breaker.stats["timeouts"] == 0
+    assert breaker.stats["successes"] == 1
+    assert breaker.state == CLOSED
+
+def reply(content):
+    """Build a non-streaming completion response."""
+    return web.json_response({"choices": [{"message": {"content": content}}]})
+
+@pytest.mark.asyncio
+async def test_early_stopped_votes_are_not_timeouts():
+    """Test that voters cancelled once the vote is decided leave the circuit closed."""
+    import asyncio
+    from ...parallelization.models import ParallelConfig
+    from ...parallelization.examples.voting.workflow import VotingWorkflow
+    requests = []
+    
+    async def completions(request):
+        requests.append(1)
+        if len(requests) > 3:
+            await asyncio.sleep(5)
+        return reply("A")
+    
+    breaker = CircuitBreaker(min_requests=1)
+    async with serve(completions) as base_url:
+        async with VeniceClient("test_key", base_url=base_url, breaker=breaker) as client:
+            workflow = VotingWorkflow(ParallelConfig(max_concurrent_tasks=5), client)
+            result = await workflow.vote("Pick A or B", num_voters=5, adaptive=True)
+            await asyncio.sleep(0)
+    
+    assert result.early_stopped
+    assert breaker.stats["timeouts"] == 0
+    assert breaker.stats["successes"] == 3
+    assert breaker.state == CLOSED
+
+@pytest.mark.asyncio
+async def test_cancelled_synthesis_merge_is_not_a_timeout():
+    """Test that the running merge cancelled once the workers finish leaves the circuit closed."""
+    import asyncio
+    from ...orchestrator.models import OrchestratorConfig, Task
+    from ...orchestrator.workflow import OrchestratorWorkflow
+    merges = []
+    
+    async def completions(request):
+        messages = (await request.json())["messages"]
+        system, user = messages[0]["content"], messages[-1]["content"]
+        if system.startswith("Break down"):
+            return reply("1. Fetch A\n2. Fetch B\n3. Fetch C")
+        if system.startswith("Update the running synthesis"):
+            merges.append(1)
+            await asyncio.sleep(5)
+        if user.startswith("Subtask results to synthesize"):
+            return reply("final")
+        if user == "3. Fetch C":
+            await asyncio.sleep(0.3)
+        return reply(f"result of {user}")
+    
+    breaker = CircuitBreaker(min_requests=1)
+    async with serve(completions) as base_url:
+        async with VeniceClient("test_key", base_url=base_url, breaker=breaker) as client:
+            workflow = OrchestratorWorkflow(OrchestratorConfig(streaming_synthesis=True), client)
+            task = await workflow.execute(Task(description="Fetch everything"))
+            await asyncio.sleep(0)
+    
+    assert task.result == "final"
+    assert merges
+    assert breaker.stats["timeouts"] == 0
+    assert breaker.state == CLOSED
@@ -0,0 +1,100 @@
+"""Tests for the completion response cache."""
+
+import pytest
+from ..api.cache import ResponseCache
+from ..api.client import VeniceClient
+
+MESSAGES = [{"role": "user", "content": "test prompt"}]
+
+def test_key_is_canonical():
+    """Test that equivalent requests hash to the same key."""
+    key1 = ResponseCache.make_key([{"role": "user", "content": "hi"}], "m", 0, 10)
+    key2 = ResponseCache.make_key([{"content": "hi", "role": "user"}], "m", 0.0, 10)
+    key3 = ResponseCache.make_key([{"role": "user", "content": "hi"}], "m", 0, 11)
+    assert key1 == key2
+    assert key1 != key3
+
+def test_sampled_requests_are_opt_in():
+    """Test the temperature caching policy."""
+    cache = ResponseCache()
+    assert cache.is_cacheable(0.0)
+    assert not cache.is_cacheable(0.7)
+    assert cache.is_cacheable(0.7, use_cache=True)
+    assert not cache.is_cacheable(0.0, use_cache=False)
+    assert ResponseCache(cache_sampled=True).is_cacheable(0.7)
+
+@pytest.mark.asyncio
+async def test_lru_eviction():
+    """Test size-based eviction of least recently used entries."""
+    cache = ResponseCache(max_entries=2)
+    await cache.set("a", "1")
+    await cache.set("b", "2")
+    assert await cache.get("a") == "1"
+    await cache.set("c", "3")
+    
+    assert await cache.get("b") is None
+    assert await cache.get("a") == "1"
+    assert await cache.get("c") == "3"
+    assert cache.stats["evictions"] == 1
+    assert cache.stats["hits"] == 3
+    assert cache.stats["misses"] == 1
+
+@pytest.mark.asyncio
+async def test_byte_limit_counts_encoded_size():
+    """Test that max_bytes measures UTF-8 bytes rather than characters."""
+    cache = ResponseCache(max_bytes=10)
+    await cache.set("a", "☃☃☃")  # 3 characters, 9 bytes
+    assert cache.stats["bytes"] == 9
+    await cache.set("b", "xy")
+    
+    assert await cache.get("a") is None
+    assert await cache.get("b") == "xy"
+    assert cache.stats["bytes"] == 2
+
+@pytest.mark.asyncio
+async def test_ttl_expiry():
+    """Test that expired entries are not served."""
+    cache = ResponseCache(ttl=0.0)
+    await cache.set("a", "1")
+    assert await cache.get("a") is None
+    assert cache.stats["expirations"] == 1
+
+@pytest.mark.asyncio
+async def test_disk_tier_persists(tmp_path):
+    """Test that the SQLite tier survives across cache instances."""
+    path = str(tmp_path / "cache.db")
+    cache = ResponseCache(path=path)
+    await cache.set("a", "persisted")
+    cache.close()
+    
+    cache = ResponseCache(path=path)
+    assert await cache.get("a") == "persisted"
+    assert cache.stats["disk_hits"] == 1
+    assert await cache.get("a") == "persisted"
+    assert cache.stats["memory_hits"] == 1
+    cache.close()
+
+@pytest.mark.asyncio
+async def test_client_replays_cached_stream(monkeypatch):
+    """Test that a cached response is replayed without a second request."""
+    cache = ResponseCache(replay_chunk_size=4)
+    client = VeniceClient("test_key", cache=cache)
+    calls = []
+    
+    async def fake_stream_request(payload, timeout, priority):
+        calls.append(payload)
+        yield "cached "
+        yield "content"
+    
+    monkeypatch.setattr(client, "_stream_request", fake_stream_request)
+    
+    first = [c async for c in client.stream_completion(MESSAGES, temperature=0)]
+    second = [c async for c in client.stream_completion(MESSAGES, temperature=0)]
+    
+    assert "".join(first) == "".join(second) == "cached content"
+    assert second == ["cach", "ed c", "onte", "nt"]
+    assert len(calls) == 1
+    
+    # Sampled requests bypass the cache unless the caller opts in
+    [c async for c in client.stream_completion(MESSAGES, temperature=0.7)]
+    assert len(calls) == 2
@@ -0,0 +1,128 @@
+"""Tests for non-streaming and batched completions."""
+
+import asyncio
+import pytest
+from aiohttp import web
+from ..api.cache import ResponseCache
+from ..api.client import VeniceClient
+from .stub_server import serve
+
+def make_handler(requests):
+    """Create a handler that answers non-streaming requests after a delay.
+    
+    The delay in milliseconds is taken from the prompt, so tests control the
+    order in which responses finish.
+    """
+    async def completions(request):
+        body = await request.json()
+        requests.append(body)
+        prompt = body["messages"][-1]["content"]
+        if prompt == "fail":
+            return web.Response(status=400, text="bad request")
+        await asyncio.sleep(int(prompt) / 1000)
+        return web.json_response({
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": f"<think>why</think>answer {prompt}"}}],
+            "usage": {"prompt_tokens": 5, "completion_tokens": 3, "total_tokens": 8}
+        })
+    
+    return completions
+
+def messages(prompt):
+    """Build a single-message request."""
+    return [{"role": "user", "content": prompt}]
+
+@pytest.mark.asyncio
+async def test_complete_returns_text_and_usage():
+    """Test that complete sends stream false and separates the reasoning."""
+    requests = []
+    async with serve(make_handler(requests)) as base_url:
+        async with VeniceClient("test_key", base_url=base_url) as client:
+            result = await client.complete(messages("0"))
+    
+    assert result.text == "answer 0"
+    assert result.think == "why"
+    assert result.usage["total_tokens"] == 8
+    assert requests[0]["stream"] is False
+
+@pytest.mark.asyncio
+async def test_complete_uses_cache():
+    """Test that deterministic completions are served from the cache."""
+    requests = []
+    cache = ResponseCache()
+    async with serve(make_handler(requests)) as base_url:
+        async with VeniceClient("test_key", base_url=base_url, cache=cache) as client:
+            first = await client.complete(messages("0"), temperature=0)
+            second = await client.complete(messages("0"), temperature=0)
+            streamed = [c async for c in client.stream_completion(messages("0"), temperature=0)]
+    
+    assert first.text == second.text == "".join(streamed) == "answer 0"
+    assert second.usage is None
+    assert len(requests) == 1
+
+@pytest.mark.asyncio
+async def test_complete_many_keeps_order():
+    """Test that batch results come back in request order."""
+    requests = []
+    async with serve(make_handler(requests)) as base_url:
+        async with VeniceClient("test_key", base_url=base_url) as client:
+            results = await client.complete_many([messages("30"), messages("0"), messages("10")])
+            failed = await client.complete_many([messages("0"), messages("fail")], return_exceptions=True)
+    
+    assert [r.text for r in results] == ["answer 30", "answer 0", "answer 10"]
+    assert failed[0].text == "answer 0"
+    assert isinstance(failed[1], Exception)
+
+@pytest.mark.asyncio
+async def test_complete_many_releases_cancelled_requests():
+    """Test that a failed batch has finished cancelling the rest when it raises."""
+    requests = []
+    async with serve(make_handler(requests)) as base_url:
+        async with VeniceClient("test_key", base_url=base_url) as client:
+            with pytest.raises(Exception):
+                await client.complete_many([messages("fail"), messages("5000"), messages("5000")])
+            assert client.governor.in_flight == 0
+
+@pytest.mark.asyncio
+async def test_complete_with_collects_streams_of_streaming_only_clients():
+    """Test that workflows can use clients that only implement stream_completion."""
+    from ..api.client import complete_with
+    
+    class StreamingOnlyClient:
+        async def stream_completion(self, messages):
+            for chunk in ["stre", "amed"]:
+                yield chunk
+    
+    result = await complete_with(StreamingOnlyClient(), messages("0"), coalesce=False)
+    assert result.text == "streamed"
+
+@pytest.mark.asyncio
+async def test_complete_as_completed_yields_in_finish_order():
+    """Test that results are yielded as soon as each request finishes."""
+    requests = []
+    async with serve(make_handler(requests)) as base_url:
+        async with VeniceClient("test_key", base_url=base_url) as client:
+            order = [
+                index async for index, _ in client.complete_as_completed(
+                    [messages("60"), messages("0"), messages("30")]
+                )
+            ]
+    
+    assert order == [1, 2, 0]
+
+@pytest.mark.asyncio
+async def test_complete_coalesces_identical_requests():
+    """Test that single-flight shares one non-streaming request."""
+    requests = []
+    async with serve(make_handler(requests)) as base_url:
+        async with VeniceClient(
+            "test_key",
+            base_url=base_url,
+            single_flight=True
+        ) as client:
+            shared = await asyncio.gather(*[client.complete(messages("20")) for _ in range(3)])
+            independent = await asyncio.gather(
+                *[client.complete(messages("20"), coalesce=False) for _ in range(2)]
+            )
+    
+    assert all(r.text == "answer 20" for r in shared + independent)
+    assert len(requests) == 1 + 2
@@ -0,0 +1,116 @@
+"""Tests for the adaptive concurrency governor."""
+
+import asyncio
+import pytest
+from ..api.client import VeniceClient
+from ..api.concurrency import (
+    ConcurrencyGovernor,
+    PRIORITY_HIGH,
+    PRIORITY_LOW
+)
+
+@pytest.mark.asyncio
+async def test_limit_is_enforced():
+    """Test that no more than the limit of requests run at once."""
+    governor = ConcurrencyGovernor(initial_limit=2, max_limit=2)
+    active = 0
+    peak = 0
+
+    async def request():
+        nonlocal active, peak
+        async with governor.slot():
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+
+    await asyncio.gather(*[request() for _ in range(6)])
+    assert peak == 2
+    assert governor.in_flight == 0
+    assert governor.stats["admitted"] == 6
+    assert governor.stats["peak_queue_depth"] == 4
+
+@pytest.mark.asyncio
+async def test_priority_lanes():
+    """Test that higher priority waiters are admitted first."""
+    governor = ConcurrencyGovernor(initial_limit=1, max_limit=1)
+    order = []
+    await governor.acquire()
+
+    async def request(name, priority):
+        async with governor.slot(priority):
+            order.append(name)
+
+    tasks = [
+        asyncio.create_task(request("low", PRIORITY_LOW)),
+        asyncio.create_task(request("normal", 1)),
+        asyncio.create_task(request("high", PRIORITY_HIGH))
+    ]
+    await asyncio.sleep(0)
+    governor.release()
+    await asyncio.gather(*tasks)
+    assert order == ["high", "normal", "low"]
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_leak_slot():
+    """Test that cancelling a queued request leaves the counters consistent."""
+    governor = ConcurrencyGovernor(initial_limit=1, max_limit=1)
+    await governor.acquire()
+    waiter = asyncio.create_task(governor.acquire())
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    assert governor.queue_depth == 0
+    governor.release()
+    assert governor.in_flight == 0
+    await asyncio.wait_for(governor.acquire(), timeout=1)
+
+def test_aimd_adjustments():
+    """Test additive increase on success and multiplicative decrease on overload."""
+    governor = ConcurrencyGovernor(initial_limit=4, max_limit=16, decrease_cooldown=0)
+    for _ in range(20):
+        governor.record_success(0.1)
+    assert governor.limit > 4
+
+    before = governor.limit
+    governor.record_overload()
+    assert governor.limit == max(1, int(before * 0.5))
+    assert governor.stats["overloads"] == 1
+
+    # Latency well above the baseline counts as congestion
+    governor.record_success(1.0)
+    governor.record_success(1.0)
+    assert governor.stats["decreases"] >= 2
+
+def test_decrease_cooldown():
+    """Test that a burst of overloads only cuts the limit once."""
+    governor = ConcurrencyGovernor(initial_limit=16, max_limit=16, decrease_cooldown=60)
+    for _ in range(5):
+        governor.record_overload()
+    assert governor.limit == 8
+    assert governor.stats["decreases"] == 1
+
+@pytest.mark.asyncio
+async def test_client_backs_off_on_429(monkeypatch):
+    """Test that rate-limited responses lower the client's concurrency limit."""
+    from aiohttp import web
+    from .stub_server import serve
+
+    async def completions(request):
+        return web.Response(status=429, text="slow down", headers={"Retry-After": "0"})
+
+    async with serve(completions) as base_url:
+        governor = ConcurrencyGovernor(initial_limit=8, max_limit=8)
+        async with VeniceClient(
+            "test_key",
+            base_url=base_url,
+            governor=governor
+        ) as client:
+            with pytest.raises(Exception, match="429"):
+                async for _ in client.stream_completion([{"role": "user", "content": "hi"}]):
+                    pass
+
+    assert governor.limit == 4
+    assert governor.in_flight == 0
@@ -0,0 +1,122 @@
+"""Tests for hedged requests."""
+
+import asyncio
+import time
+import pytest
+from ..api.client import VeniceClient
+from ..api.concurrency import ConcurrencyGovernor
+from ..api.hedging import HedgingPolicy
+from .stub_server import StubEndpoint, serve
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+def warmed_policy(ttft=0.02, **kwargs):
+    """Create a policy that already has enough TTFT samples to hedge."""
+    policy = HedgingPolicy(max_extra=1.0, min_samples=5, **kwargs)
+    for _ in range(5):
+        policy.record_ttft(ttft)
+    return policy
+
+def make_endpoint(stall_first=True):
+    """Create an endpoint whose first request stalls before its first token."""
+    return StubEndpoint(lambda number: f"reply {number}", delay=lambda number: 5 if stall_first and number == 1 else 0)
+
+def test_delay_percentile():
+    """Test the hedge delay is the configured percentile of recent TTFT."""
+    policy = HedgingPolicy(percentile=90, min_samples=10)
+    for i in range(9):
+        policy.record_ttft(i / 10)
+    assert policy.delay() is None
+    policy.record_ttft(5.0)
+    assert policy.delay() == pytest.approx(0.8)
+
+def test_budget_limits_hedges():
+    """Test that hedges never exceed the configured fraction of requests."""
+    policy = HedgingPolicy(max_extra=0.1)
+    for _ in range(10):
+        policy.record_request()
+    assert policy.try_hedge()
+    assert not policy.try_hedge()
+    assert policy.stats["skipped_budget"] == 1
+
+def test_no_hedge_when_governor_is_saturated():
+    """Test that hedging does not add load when no slot is free."""
+    policy = warmed_policy()
+    policy.record_request()
+    governor = ConcurrencyGovernor(initial_limit=1, max_limit=1)
+    governor._in_flight = 1
+    assert not policy.try_hedge(governor)
+    assert policy.stats["skipped_overload"] == 1
+
+@pytest.mark.asyncio
+async def test_slow_stream_is_hedged():
+    """Test that a stalled first token triggers a hedge that wins."""
+    endpoint = make_endpoint()
+    policy = warmed_policy()
+    async with serve(endpoint) as base_url:
+        async with VeniceClient(
+            "test_key",
+            base_url=base_url,
+            hedging=policy
+        ) as client:
+            start = time.monotonic()
+            chunks = [c async for c in client.stream_completion(MESSAGES)]
+            elapsed = time.monotonic() - start
+            
+            assert chunks == ["reply 2"]
+            assert elapsed < 2
+            assert len(endpoint.requests) == 2
+            assert policy.stats["hedges"] == 1
+            assert policy.stats["hedge_wins"] == 1
+            assert client.governor.in_flight == 0
+
+@pytest.mark.asyncio
+async def test_fast_stream_is_not_hedged():
+    """Test that streams within the hedge delay are left alone."""
+    endpoint = make_endpoint(stall_first=False)
+    policy = warmed_policy(ttft=1.0)
+    async with serve(endpoint) as base_url:
+        async with VeniceClient(
+            "test_key",
+            base_url=base_url,
+            hedging=policy
+        ) as client:
+            chunks = [c async for c in client.stream_completion(MESSAGES)]
+    
+    assert chunks == ["reply 1"]
+    assert len(endpoint.requests) == 1
+    assert policy.stats["hedges"] == 0
+
+@pytest.mark.asyncio
+async def test_consumer_cancelled_while_hedge_is_pending():
+    """Test that cancelling the consumer during a hedge race fails no endpoint."""
+    from ..api.balancer import EndpointPool
+    from ..api.breaker import CircuitBreaker
+    
+    policy = warmed_policy()
+    breaker = CircuitBreaker(min_requests=1)
+    async with serve(StubEndpoint(delay=5)) as base_url:
+        pool = EndpointPool([base_url], max_consecutive_failures=1, eject_duration=60)
+        async with VeniceClient("test_key", endpoints=pool, breaker=breaker, hedging=policy) as client:
+            consumer = asyncio.ensure_future(client.stream_completion(MESSAGES).__anext__())
+            await asyncio.sleep(0.2)
+            assert policy.stats["hedges"] == 1
+            consumer.cancel()
+            await asyncio.gather(consumer, return_exceptions=True)
+            await asyncio.sleep(0)
+            
+            stats = pool.endpoints[0].stats()
+            assert stats["failures"] == 0 and not stats["ejected"]
+            assert stats["in_flight"] == 0
+            assert breaker.stats["timeouts"] == 0
+            
+            # The consumer's own timeout still counts once, for the primary
+            async def consume():
+                async with asyncio.timeout(0.2):
+                    await client.stream_completion(MESSAGES).__anext__()
+            
+            with pytest.raises(TimeoutError):
+                await asyncio.ensure_future(consume())
+            await asyncio.sleep(0)
+            assert breaker.stats["timeouts"] == 1
+            assert client.governor.in_flight == 0
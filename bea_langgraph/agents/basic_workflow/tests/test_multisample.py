@@ -0,0 +1,153 @@
+"""Tests for multi-sample requests with the n parameter."""
+
+import json
+import pytest
+from aiohttp import web
+from ..api.client import VeniceClient
+from ..api.sse import ChoiceSSEParser
+from .stub_server import DONE, serve, sse_event
+
+MESSAGES = [{"role": "user", "content": "vote"}]
+
+def make_handler(requests, honor_n=True):
+    """Create a handler that may or may not honor the n parameter."""
+    async def completions(request):
+        body = await request.json()
+        requests.append(body)
+        n = body.get("n", 1) if honor_n else 1
+        if not body["stream"]:
+            return web.json_response({
+                "choices": [
+                    {"index": i, "message": {"content": f"<think>r{i}</think>answer {i}"}}
+                    for i in range(n)
+                ],
+                "usage": {"total_tokens": 10 * n}
+            })
+        response = web.StreamResponse()
+        await response.prepare(request)
+        for i in range(n):
+            await response.write(sse_event("<thi", i))
+        for i in range(n):
+            await response.write(sse_event(f"nk>r</think>answer {i}", i))
+        await response.write(DONE)
+        await response.write_eof()
+        return response
+    
+    return completions
+
+def test_choice_parser_demultiplexes():
+    """Test that every choice of an event is tagged with its index."""
+    parser = ChoiceSSEParser()
+    event = {"choices": [
+        {"index": 0, "delta": {"content": "a"}},
+        {"index": 1, "delta": {"content": "b"}}
+    ]}
+    data = f"data: {json.dumps(event)}\n\n".encode()
+    assert parser.feed(data[:10]) == []
+    assert parser.feed(data[10:]) == [(0, "a"), (1, "b")]
+    assert parser.feed(b'data: {"choices":[],"usage":{"total_tokens":4}}\n\n') == []
+    assert parser.usage == {"total_tokens": 4}
+
+@pytest.mark.asyncio
+async def test_complete_n_uses_one_request():
+    """Test that n samples come from a single request."""
+    requests = []
+    async with serve(make_handler(requests)) as base_url:
+        async with VeniceClient("test_key", base_url=base_url) as client:
+            results = await client.complete_n(MESSAGES, 3)
+            stats = client.connection_stats
+    
+    assert [r.text for r in results] == ["answer 0", "answer 1", "answer 2"]
+    assert len(requests) == 1
+    assert requests[0]["n"] == 3
+    assert stats["multi_sample_fallbacks"] == 0
+
+@pytest.mark.asyncio
+async def test_complete_n_falls_back_to_parallel_requests():
+    """Test that a backend ignoring n gets the missing samples separately."""
+    requests = []
+    async with serve(make_handler(requests, honor_n=False)) as base_url:
+        async with VeniceClient(
+            "test_key",
+            base_url=base_url,
+            single_flight=True
+        ) as client:
+            results = await client.complete_n(MESSAGES, 3)
+            assert len(results) == 3
+            assert len(requests) == 3  # no coalescing of the fallback samples
+            
+            await client.complete_n(MESSAGES, 2)
+            assert requests[3]["n"] == 2  # n is only skipped once rejected
+            assert client.connection_stats["multi_sample_fallbacks"] == 2
+
+@pytest.mark.asyncio
+async def test_complete_n_skips_rejected_n():
+    """Test that a backend rejecting n gets separate requests from then on."""
+    requests = []
+    honoring = make_handler(requests)
+    
+    async def completions(request):
+        if "n" in await request.json():
+            requests.append("rejected")
+            return web.Response(status=400, text='{"error": "Unrecognized parameter \'n\'"}')
+        return await honoring(request)
+    
+    async with serve(completions) as base_url:
+        async with VeniceClient("test_key", base_url=base_url) as client:
+            results = await client.complete_n(MESSAGES, 2)
+            assert [r.text for r in results] == ["answer 0", "answer 0"]
+            assert requests[0] == "rejected" and len(requests) == 3
+            
+            await client.complete_n(MESSAGES, 2)
+            assert len(requests) == 5
+            assert all("n" not in r for r in requests[3:])
+
+@pytest.mark.asyncio
+async def test_complete_n_keeps_partial_results():
+    """Test that one failed sample neither fails the others nor disables n."""
+    requests = []
+    
+    async def completions(request):
+        body = await request.json()
+        requests.append(body)
+        if "n" in body:
+            return web.json_response({"choices": [
+                {"index": 0, "message": {"content": "answer 0"}},
+                {"index": 1, "message": None}
+            ]})
+        return web.Response(status=400, text="bad request")
+    
+    async with serve(completions) as base_url:
+        async with VeniceClient("test_key", base_url=base_url) as client:
+            results = await client.complete_n(MESSAGES, 2, return_exceptions=True)
+            assert results[0].text == "answer 0"
+            assert isinstance(results[1], Exception)
+            
+            await client.complete_n(MESSAGES, 2, return_exceptions=True)
+            assert requests[2]["n"] == 2
+
+@pytest.mark.asyncio
+async def test_stream_choices_demultiplexes_by_index():
+    """Test that streamed choices are separated and think-free."""
+    requests = []
+    async with serve(make_handler(requests)) as base_url:
+        async with VeniceClient("test_key", base_url=base_url) as client:
+            texts = {}
+            async for index, chunk in client.stream_choices(MESSAGES, 2):
+                texts[index] = texts.get(index, "") + chunk
+    
+    assert texts == {0: "answer 0", 1: "answer 1"}
+    assert len(requests) == 1
+
+@pytest.mark.asyncio
+async def test_stream_choices_fallback():
+    """Test that missing streamed choices are fetched with separate requests."""
+    requests = []
+    async with serve(make_handler(requests, honor_n=False)) as base_url:
+        async with VeniceClient("test_key", base_url=base_url) as client:
+            texts = {}
+            async for index, chunk in client.stream_choices(MESSAGES, 3):
+                texts[index] = texts.get(index, "") + chunk
+    
+    assert texts == {0: "answer 0", 1: "answer 0", 2: "answer 0"}
+    assert len(requests) == 3
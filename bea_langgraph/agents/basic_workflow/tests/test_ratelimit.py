@@ -0,0 +1,105 @@
+"""Tests for RPM/TPM rate limiting."""
+
+import asyncio
+import time
+from email.utils import formatdate
+import pytest
+from ..api.client import VeniceClient
+from ..api.ratelimit import RateLimiter, TokenBucket, parse_retry_after
+
+def test_parse_retry_after():
+    """Test delay-seconds and HTTP-date Retry-After values."""
+    assert parse_retry_after("2") == 2.0
+    assert parse_retry_after("-1") == 0.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+    delay = parse_retry_after(formatdate(time.time() + 30, usegmt=True))
+    assert 25 < delay <= 30
+
+def test_estimate_tokens():
+    """Test that estimates cover the prompt and the completion budget."""
+    limiter = RateLimiter(tokens_per_minute=1000)
+    messages = [
+        {"role": "system", "content": "x" * 40},
+        {"role": "user", "content": "y" * 80}
+    ]
+    assert limiter.estimate_tokens(messages, max_tokens=100) == 30 + 8 + 100
+
+def test_bucket_debt_and_refund():
+    """Test that usage beyond the reservation is paid back before admitting more."""
+    bucket = TokenBucket(per_minute=600, burst_seconds=1)
+    bucket.consume(10)
+    assert bucket.wait_time(1) > 0
+    bucket.refund(10)
+    assert bucket.wait_time(10) == 0
+    assert bucket.wait_time(1000) == 0  # oversized requests wait for a full bucket
+
+@pytest.mark.asyncio
+async def test_requests_per_minute_paces_requests():
+    """Test that requests beyond the burst are spread at the quota rate."""
+    limiter = RateLimiter(requests_per_minute=1200, burst_seconds=0.05)
+    start = time.monotonic()
+    await asyncio.gather(*[limiter.acquire() for _ in range(5)])
+    elapsed = time.monotonic() - start
+    
+    # One request fits the burst, the other four wait 50ms each
+    assert 0.15 < elapsed < 1.0
+    assert limiter.stats["admitted"] == 5
+    assert limiter.stats["delayed"] == 4
+
+@pytest.mark.asyncio
+async def test_tokens_per_minute_and_reconcile():
+    """Test that reported usage frees the unused part of an estimate."""
+    limiter = RateLimiter(tokens_per_minute=6000, burst_seconds=1)
+    await limiter.acquire(100)
+    assert limiter.tokens.wait_time(100) > 0.5
+    
+    limiter.reconcile(estimated=100, actual=20)
+    assert limiter.tokens.wait_time(80) < 0.05
+    assert limiter.stats["reported_tokens"] == 20
+
+@pytest.mark.asyncio
+async def test_pause_holds_back_requests():
+    """Test that a Retry-After pause delays the next admission."""
+    limiter = RateLimiter(requests_per_minute=1000)
+    limiter.pause(0.1)
+    start = time.monotonic()
+    await limiter.acquire()
+    assert time.monotonic() - start >= 0.09
+    assert limiter.stats["retry_after_pauses"] == 1
+
+@pytest.mark.asyncio
+async def test_client_honors_retry_after_and_usage():
+    """Test a 429 with Retry-After followed by a response reporting usage."""
+    from aiohttp import web
+    from .stub_server import serve, sse_event, stream_reply
+    
+    attempts = []
+    
+    async def completions(request):
+        attempts.append(await request.json())
+        if len(attempts) == 1:
+            return web.Response(status=429, text="quota", headers={"Retry-After": "0.05"})
+        return await stream_reply(request, [
+            sse_event("ok"),
+            b'data: {"choices":[],"usage":{"total_tokens":12}}\n\n'
+        ])
+    
+    limiter = RateLimiter(requests_per_minute=600, tokens_per_minute=100_000)
+    async with serve(completions) as base_url:
+        async with VeniceClient(
+            "test_key",
+            base_url=base_url,
+            rate_limiter=limiter
+        ) as client:
+            messages = [{"role": "user", "content": "hi"}]
+            chunks = [c async for c in client.stream_completion(messages, max_tokens=50)]
+    
+    assert chunks == ["ok"]
+    assert len(attempts) == 2
+    assert attempts[0]["stream_options"] == {"include_usage": True}
+    stats = limiter.stats
+    assert stats["retry_after_pauses"] == 1
+    assert stats["admitted"] == 2
+    assert stats["reconciled"] == 1
+    assert stats["reported_tokens"] == 12
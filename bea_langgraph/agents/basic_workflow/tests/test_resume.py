@@ -0,0 +1,68 @@
+"""Tests for resuming streams that fail mid-response."""
+
+import pytest
+from ..api.client import VeniceClient
+from .stub_server import StubEndpoint, serve
+
+MESSAGES = [{"role": "user", "content": "write a story"}]
+
+def make_endpoint():
+    """Create an endpoint whose first response drops the connection mid-stream."""
+    return StubEndpoint(", the end.", drop=1, partial=["Once upon ", "a time"])
+
+@pytest.mark.asyncio
+async def test_resumable_stream_continues_without_duplicates():
+    """Test that a dropped stream is continued from the delivered content."""
+    endpoint = make_endpoint()
+    async with serve(endpoint) as base_url:
+        async with VeniceClient(
+            "test_key",
+            base_url=base_url,
+            resumable=True,
+            retry_delay=0.01
+        ) as client:
+            chunks = [c async for c in client.stream_completion(MESSAGES, max_tokens=100)]
+            stats = client.connection_stats
+    
+    assert "".join(chunks) == "Once upon a time, the end."
+    assert len(endpoint.requests) == 2
+    assert endpoint.requests[1]["messages"] == MESSAGES + [
+        {"role": "assistant", "content": "Once upon a time"}
+    ]
+    assert endpoint.requests[1]["max_tokens"] == 100 - 4
+    assert stats["resumes"] == 1
+    assert stats["resume_tokens_saved"] == 4
+
+@pytest.mark.asyncio
+async def test_partial_failure_is_not_replayed():
+    """Test that non-resumable clients fail instead of duplicating content."""
+    endpoint = make_endpoint()
+    chunks = []
+    async with serve(endpoint) as base_url:
+        async with VeniceClient(
+            "test_key",
+            base_url=base_url,
+            retry_delay=0.01
+        ) as client:
+            with pytest.raises(Exception, match="partial response"):
+                async for chunk in client.stream_completion(MESSAGES):
+                    chunks.append(chunk)
+    
+    assert "".join(chunks) == "Once upon a time"
+    assert len(endpoint.requests) == 1
+
+@pytest.mark.asyncio
+async def test_resume_stops_when_budget_is_spent():
+    """Test that no continuation is sent once max_tokens is used up."""
+    endpoint = make_endpoint()
+    async with serve(endpoint) as base_url:
+        async with VeniceClient(
+            "test_key",
+            base_url=base_url,
+            resumable=True,
+            retry_delay=0.01
+        ) as client:
+            chunks = [c async for c in client.stream_completion(MESSAGES, max_tokens=4)]
+    
+    assert "".join(chunks) == "Once upon a time"
+    assert len(endpoint.requests) == 1
@@ -0,0 +1,93 @@
+"""Tests for single-flight coalescing of identical requests."""
+
+import asyncio
+import pytest
+from ..api.client import VeniceClient
+from ..api.singleflight import SingleFlight
+
+MESSAGES = [{"role": "user", "content": "test prompt"}]
+
+def make_upstream(calls, chunks=("a", "b", "c"), fail=False):
+    """Create a slow fake upstream that records each request."""
+    async def upstream(*args):
+        calls.append(args)
+        for chunk in chunks:
+            await asyncio.sleep(0.01)
+            yield chunk
+        if fail:
+            raise Exception("upstream failed")
+    return upstream
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_upstream(monkeypatch):
+    """Test that identical concurrent requests open one upstream stream."""
+    client = VeniceClient("test_key", single_flight=True)
+    calls = []
+    monkeypatch.setattr(client, "_stream_request", make_upstream(calls))
+    
+    async def consume():
+        return [c async for c in client.stream_completion(MESSAGES)]
+    
+    results = await asyncio.gather(*[consume() for _ in range(5)])
+    
+    assert all(result == ["a", "b", "c"] for result in results)
+    assert len(calls) == 1
+    assert client.single_flight.stats["coalesced_requests"] == 4
+    assert client.single_flight.stats["in_flight"] == 0
+
+@pytest.mark.asyncio
+async def test_opt_out_gets_independent_stream(monkeypatch):
+    """Test that coalesce=False always issues its own request."""
+    client = VeniceClient("test_key", single_flight=True)
+    calls = []
+    monkeypatch.setattr(client, "_stream_request", make_upstream(calls))
+    
+    async def consume():
+        return [c async for c in client.stream_completion(MESSAGES, coalesce=False)]
+    
+    await asyncio.gather(consume(), consume())
+    assert len(calls) == 2
+
+@pytest.mark.asyncio
+async def test_late_consumer_receives_full_stream():
+    """Test that a consumer attaching mid-stream still sees every chunk."""
+    flight = SingleFlight()
+    calls = []
+    upstream = make_upstream(calls)
+    
+    first = flight.stream("key", upstream)
+    assert await first.__anext__() == "a"
+    late = [c async for c in flight.stream("key", upstream)]
+    rest = [c async for c in first]
+    
+    assert late == ["a", "b", "c"]
+    assert rest == ["b", "c"]
+    assert len(calls) == 1
+
+@pytest.mark.asyncio
+async def test_upstream_cancelled_when_all_consumers_leave():
+    """Test that abandoning every consumer cancels the upstream task."""
+    flight = SingleFlight()
+    upstream = make_upstream([], chunks=("a",) * 100)
+    
+    stream = flight.stream("key", upstream)
+    assert await stream.__anext__() == "a"
+    await stream.aclose()
+    
+    assert flight.stats["in_flight"] == 0
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_consumer():
+    """Test that an upstream failure is raised in each consumer."""
+    flight = SingleFlight()
+    upstream = make_upstream([], fail=True)
+    
+    async def consume():
+        chunks = []
+        with pytest.raises(Exception, match="upstream failed"):
+            async for chunk in flight.stream("key", upstream):
+                chunks.append(chunk)
+        return chunks
+    
+    results = await asyncio.gather(consume(), consume())
+    assert results == [["a", "b", "c"], ["a", "b", "c"]]
@@ -0,0 +1,86 @@
+"""Tests for the incremental server-sent events parser."""
+
+from ..api.sse import SSEParser
+
+def event(content: str) -> bytes:
+    """Build a chat completion event carrying delta content."""
+    return b'data: {"choices":[{"delta":{"content":"' + content.encode() + b'"}}]}\n\n'
+
+def test_events_split_across_reads():
+    """Test that lines and events split at arbitrary byte offsets are rejoined."""
+    stream = event("Hello") + event(", ") + event("world") + b"data: [DONE]\n\n"
+    for size in (1, 3, 7, len(stream)):
+        parser = SSEParser()
+        contents = []
+        for i in range(0, len(stream), size):
+            contents.extend(parser.feed(stream[i:i + size]))
+        contents.extend(parser.close())
+        assert contents == ["Hello", ", ", "world"]
+        assert parser.done
+
+def test_multibyte_characters_split_across_reads():
+    """Test that UTF-8 sequences split between reads decode correctly."""
+    stream = event("café ☃")
+    parser = SSEParser()
+    contents = []
+    for i in range(len(stream)):
+        contents.extend(parser.feed(stream[i:i + 1]))
+    assert contents == ["café ☃"]
+
+def test_multiline_data_field():
+    """Test that a payload spread over several data lines is joined."""
+    parser = SSEParser()
+    contents = parser.feed(
+        b'data: {"choices":\r\n'
+        b'data: [{"delta":{"content":"joined"}}]}\r\n'
+        b'\r\n'
+    )
+    assert contents == ["joined"]
+
+def test_lines_without_blank_separator():
+    """Test servers that send one data line per event without blank lines."""
+    parser = SSEParser()
+    contents = parser.feed(event("a")[:-1] + event("b")[:-1] + b"data: [DONE]\n")
+    assert contents == ["a", "b"]
+    assert parser.done
+
+def test_non_content_events_are_skipped():
+    """Test role-only deltas, comments and other fields."""
+    parser = SSEParser()
+    contents = parser.feed(
+        b": keep-alive\n\n"
+        b"event: message\n"
+        b'data: {"choices":[{"delta":{"role":"assistant"}}]}\n\n'
+        b'data: {"choices":[],"usage":{"total_tokens":3}}\n\n'
+        b'data: {"choices":[{"delta":{"content":null}}]}\n\n'
+    )
+    assert contents == []
+    assert parser.malformed == 0
+    assert parser.usage == {"total_tokens": 3}
+
+def test_malformed_events_reported():
+    """Test that malformed events go to the counter and callback."""
+    errors = []
+    parser = SSEParser(on_error=lambda data, error: errors.append(data))
+    contents = parser.feed(b"data: {not json\n\n" + event("ok"))
+    
+    assert contents == ["ok"]
+    assert parser.malformed == 1
+    assert errors == [b"{not json"]
+
+def test_malformed_line_without_blank_separator():
+    """Test that a malformed line does not swallow later unseparated events."""
+    parser = SSEParser()
+    contents = parser.feed(
+        b"data: {not json\n" + event("a")[:-1] + event("b")[:-1] + b"data: [DONE]\n"
+    )
+    assert contents == ["a", "b"]
+    assert parser.malformed == 1
+    assert parser.done
+
+def test_done_after_malformed_line():
+    """Test that [DONE] ends the stream even right after a malformed line."""
+    parser = SSEParser()
+    assert parser.feed(b'data: {"a":\ndata: [DONE]\n\n') == []
+    assert parser.done
+    assert parser.malformed == 1
@@ -8,7 +8,7 @@ content quality.
 from typing import List, Dict, Any, Tuple
 from ...models import EvaluationResult, EvaluatorConfig
 from ...workflow import EvaluatorWorkflow
-from ....basic_workflow.api.client import VeniceClient
+from ....basic_workflow.api.client import VeniceClient, complete_with
 
 class ImprovementWorkflow(EvaluatorWorkflow):
     """Implementation of content improvement workflow."""
@@ -53,11 +53,6 @@ class ImprovementWorkflow(EvaluatorWorkflow):
             Required Improvements:\n{improvements_text}"""}
         ]
         
-        result_buffer = []
-        async for chunk in self.client.stream_completion(messages):
-            if chunk.startswith("<think>"):
-                print(f"\nThinking: {chunk[7:-8]}")  # Strip <think> tags
-                continue
-            result_buffer.append(chunk)
-            
-        return "".join(result_buffer)
+        result = await complete_with(self.client, messages)
+
+        return result.text
@@ -8,7 +8,7 @@ providing functionality for content evaluation and iterative improvement.
 import asyncio
 from typing import List, Dict, Any, Optional, Tuple
 from .models import EvaluationResult, EvaluatorConfig
-from ..basic_workflow.api.client import VeniceClient
+from ..basic_workflow.api.client import VeniceClient, complete_with
 
 class EvaluatorWorkflow:
     """Implementation of evaluator-optimizer workflow."""
@@ -49,16 +49,11 @@ class EvaluatorWorkflow:
                 {"role": "user", "content": f"Content to evaluate:\n{content}\n\nCriteria:\n{', '.join(criteria)}"}
             ]
             
-            result_buffer = []
             async with asyncio.timeout(self.config.timeout_per_evaluation):
-                async for chunk in self.client.stream_completion(messages):
-                    if chunk.startswith("<think>"):
-                        print(f"\nThinking: {chunk[7:-8]}")  # Strip <think> tags
-                        continue
-                    result_buffer.append(chunk)
+                result = await complete_with(self.client, messages)
                     
             # Parse evaluation result
-            result_text = "".join(result_buffer)
+            result_text = result.text
             lines = result_text.split("\n")
             
             # Extract score, feedback, and improvements
@@ -99,15 +94,10 @@ class EvaluatorWorkflow:
                 Original Criteria:\n{', '.join(criteria)}"""}
             ]
             
-            result_buffer = []
             async with asyncio.timeout(self.config.timeout_per_improvement):
-                async for chunk in self.client.stream_completion(messages):
-                    if chunk.startswith("<think>"):
-                        print(f"\nThinking: {chunk[7:-8]}")  # Strip <think> tags
-                        continue
-                    result_buffer.append(chunk)
+                result = await complete_with(self.client, messages)
                     
-            return "".join(result_buffer)
+            return result.text
             
         except Exception as e:
             print(f"Error during improvement: {str(e)}")
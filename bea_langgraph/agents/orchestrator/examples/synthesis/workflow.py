@@ -32,26 +32,15 @@ class SynthesisWorkflow(OrchestratorWorkflow):
         result = await self.execute(task)
         return result.result
         
-    async def _synthesize_results(self, subtasks: List[SubTask]) -> str:
-        """Specialized synthesis for combining multiple results."""
-        # Prepare results for synthesis
-        results_text = "\n".join(
-            f"Result {subtask.task_id}:\n{subtask.result}"
-            for subtask in subtasks
-            if subtask.result and not subtask.result.startswith("Error:")
-        )
+    def _synthesis_item(self, subtask: SubTask) -> str:
+        """Format a result for the synthesis prompts."""
+        return f"Result {subtask.task_id}:\n{subtask.result}"
         
-        messages = [
+    def _synthesis_messages(self, parts: List[str], note: str = "") -> List[Dict[str, str]]:
+        """Specialized synthesis prompt for combining multiple results."""
+        results_text = "\n".join(parts)
+        return [
             {"role": "system", "content": """Synthesize these results into a coherent output.
             Focus on combining key insights and maintaining consistency."""},
-            {"role": "user", "content": f"Results to synthesize:\n{results_text}"}
+            {"role": "user", "content": f"Results to synthesize:\n{results_text}{note}"}
         ]
-        
-        result_buffer = []
-        async for chunk in self.client.stream_completion(messages):
-            if chunk.startswith("<think>"):
-                print(f"\nThinking: {chunk[7:-8]}")  # Strip <think> tags
-                continue
-            result_buffer.append(chunk)
-            
-        return "".join(result_buffer)
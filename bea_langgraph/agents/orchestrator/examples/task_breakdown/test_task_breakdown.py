@@ -30,3 +30,27 @@ async def test_task_breakdown():
     
     assert result
     assert len(result.split("\n")) <= config.max_subtasks * 2  # Reasonable size
+
+@pytest.mark.asyncio
+async def test_pipelined_breakdown_uses_specialized_prompt():
+    """Test that the streamed breakdown is requested with the specialized prompt."""
+    from ....basic_workflow.api.client import Completion
+    from ...models import Task
+    
+    class MockVeniceClient:
+        def __init__(self):
+            self.breakdown_prompts = []
+        
+        async def stream_completion(self, messages, **kwargs):
+            self.breakdown_prompts.append(messages[-1]["content"])
+            yield "1. Research\n2. Write\n"
+        
+        async def complete(self, messages, **kwargs):
+            return Completion(f"done: {messages[-1]['content']}")
+    
+    client = MockVeniceClient()
+    workflow = TaskBreakdownWorkflow(OrchestratorConfig(pipelined=True), client)
+    task = await workflow.execute(Task(description="Write a report"))
+    
+    assert client.breakdown_prompts == ["Complex task to break down:\nWrite a report"]
+    assert len(task.subtasks) == 2
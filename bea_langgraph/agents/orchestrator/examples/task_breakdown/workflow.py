@@ -22,28 +22,12 @@ class TaskBreakdownWorkflow(OrchestratorWorkflow):
         result = await self.execute(task)
         return result.result
         
-    async def _break_down_task(self, task: Task) -> List[SubTask]:
-        """Specialized task breakdown for complex tasks."""
-        messages = [
+    def _breakdown_messages(self, task: Task) -> List[Dict[str, str]]:
+        """Specialized task breakdown prompt for complex tasks."""
+        return [
             {"role": "system", "content": """Break down this complex task into smaller, manageable subtasks.
-            Each subtask should be self-contained and independently processable."""},
+            Each subtask should be self-contained and independently processable.
+            Write one numbered subtask per line; if a subtask needs the results of
+            earlier ones, end its line with (depends on: <numbers>)."""},
             {"role": "user", "content": f"Complex task to break down:\n{task.description}"}
         ]
-        
-        result_buffer = []
-        async for chunk in self.client.stream_completion(messages):
-            if chunk.startswith("<think>"):
-                print(f"\nThinking: {chunk[7:-8]}")  # Strip <think> tags
-                continue
-            result_buffer.append(chunk)
-            
-        # Parse subtasks from result
-        subtasks_text = "".join(result_buffer).split("\n")
-        return [
-            SubTask(
-                task_id=f"subtask_{i}",
-                description=text.strip()
-            )
-            for i, text in enumerate(subtasks_text)
-            if text.strip()
-        ][:self.config.max_subtasks]
@@ -12,6 +12,7 @@ class SubTask(BaseModel):
     """Model for a subtask that can be delegated to workers."""
     task_id: str
     description: str
+    depends_on: List[str] = Field(default_factory=list)
     result: Optional[str] = None
     metadata: Dict[str, Any] = Field(default_factory=dict)
     
@@ -35,6 +36,17 @@ class OrchestratorConfig(BaseModel):
     max_subtasks: int = Field(default=5, ge=1)
     timeout_per_subtask: float = Field(default=30.0, ge=0.0)
     synthesis_timeout: float = Field(default=60.0, ge=0.0)
+    pipelined: bool = Field(default=False)
+    # Overall budget for breakdown, workers and synthesis (None for no limit)
+    deadline: Optional[float] = Field(default=None, gt=0.0)
+    # Share of the deadline kept for synthesis; workers stop before it
+    synthesis_reserve: float = Field(default=0.2, ge=0.0, lt=1.0)
+    # Tree synthesis: results merged per call (None for no limit)
+    synthesis_fan_in: Optional[int] = Field(default=None, ge=2)
+    # Tree synthesis: token budget of the results merged per call (None for no limit)
+    synthesis_max_tokens: Optional[int] = Field(default=None, ge=1)
+    # Fold results into a running synthesis as workers finish
+    streaming_synthesis: bool = Field(default=False)
     
     class Config:
         validate_assignment = True
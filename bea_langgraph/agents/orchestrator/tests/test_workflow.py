@@ -44,3 +44,355 @@ async def test_subtask_limit():
     result = await workflow.execute(task)
     
     assert len(result.subtasks) <= config.max_subtasks
+
+class ScriptedClient:
+    """Mock client that returns a breakdown, then sleeps per subtask."""
+    
+    def __init__(self, breakdown, delays=None):
+        self.breakdown = breakdown
+        self.delays = delays or {}
+        self.prompts = []
+    
+    async def complete(self, messages, **kwargs):
+        import asyncio
+        from ...basic_workflow.api.client import Completion
+        content = messages[-1]["content"]
+        self.prompts.append(content)
+        if content.startswith("Task to break down"):
+            return Completion(self.breakdown)
+        if content.startswith("Subtask results to synthesize"):
+            return Completion("final")
+        for name, delay in self.delays.items():
+            if content.endswith(name):
+                await asyncio.sleep(delay)
+                if delay < 0:
+                    raise Exception("worker failed")
+        return Completion(f"result of {content.rsplit(' ', 1)[-1]}")
+
+def test_parse_dependencies():
+    """Test numbered subtasks with dependency annotations."""
+    workflow = OrchestratorWorkflow(OrchestratorConfig(max_subtasks=3), client=None)
+    subtasks = workflow._parse_subtasks(
+        "1. Gather data\n\n2. Clean data (depends on: 1)\n3. Analyze (depends on: 1, 2)\n4. Report (depends on: 3)"
+    )
+    
+    assert [s.description for s in subtasks] == ["1. Gather data", "2. Clean data", "3. Analyze"]
+    assert [s.depends_on for s in subtasks] == [[], ["subtask_0"], ["subtask_0", "subtask_1"]]
+
+def test_prose_in_parentheses_is_not_a_dependency():
+    """Test that only clauses listing step numbers are read as dependencies."""
+    workflow = OrchestratorWorkflow(OrchestratorConfig(), client=None)
+    subtasks = workflow._parse_subtasks(
+        "1. Draft\n2. Publish (after reviewing the draft)\n3. Announce (after steps 1 and 2)"
+    )
+    
+    assert subtasks[1].description == "2. Publish (after reviewing the draft)"
+    assert subtasks[1].depends_on == []
+    assert subtasks[2].description == "3. Announce"
+    assert subtasks[2].depends_on == ["subtask_0", "subtask_1"]
+
+def test_forward_references_and_restarted_numbering_cannot_form_a_cycle():
+    """Test that dependencies resolve to earlier lines only, as in the streamed breakdown."""
+    workflow = OrchestratorWorkflow(OrchestratorConfig(), client=None)
+    text = "1. Outline (depends on: 3)\n2. Draft (depends on: 1)\n3. Edit (depends on: 2)\n1. Publish\n2. Announce (depends on: 1, 2)"
+    subtasks = workflow._parse_subtasks(text)
+    
+    assert [s.depends_on for s in subtasks] == [[], ["subtask_0"], ["subtask_1"], [], ["subtask_3", "subtask_1"]]
+    assert [s.task_id for s in workflow._topological_order(subtasks)] == [f"subtask_{i}" for i in (0, 3, 1, 2, 4)]
+
+@pytest.mark.asyncio
+async def test_dag_runs_in_critical_path_time():
+    """Test that independent subtasks overlap and dependents get upstream results."""
+    client = ScriptedClient(
+        "1. Fetch A\n2. Fetch B\n3. Merge (depends on: 1, 2)",
+        delays={"A": 0.1, "B": 0.05, "Merge": 0.05}
+    )
+    workflow = OrchestratorWorkflow(OrchestratorConfig(), client)
+    task = await workflow.execute(Task(description="Combine A and B"))
+    
+    schedule = task.metadata["schedule"]
+    assert schedule["critical_path"] == ["subtask_0", "subtask_2"]
+    assert schedule["wall_time"] < 0.19
+    assert schedule["total_work"] >= 0.2
+    merge_prompt = next(p for p in client.prompts if p.endswith("Merge"))
+    assert "result of A" in merge_prompt and "result of B" in merge_prompt
+    assert task.subtasks[2].metadata["started_at"] >= task.subtasks[0].metadata["finished_at"]
+    assert task.result == "final"
+
+@pytest.mark.asyncio
+async def test_failed_dependency_skips_dependents():
+    """Test that subtasks depending on a failed subtask are not run."""
+    client = ScriptedClient("1. Flaky\n2. Later (depends on: 1)\n3. Other", delays={"Flaky": -1})
+    workflow = OrchestratorWorkflow(OrchestratorConfig(), client)
+    subtasks = await workflow._delegate_tasks(workflow._parse_subtasks(client.breakdown))
+    
+    assert subtasks[0].result == "Error: worker failed"
+    assert subtasks[1].metadata["skipped"]
+    assert subtasks[2].result == "result of Other"
+    assert not any(p.endswith("Later") for p in client.prompts)
+
+@pytest.mark.asyncio
+async def test_dependency_cycle_is_rejected():
+    """Test cycle detection before any subtask runs."""
+    client = ScriptedClient("")
+    workflow = OrchestratorWorkflow(OrchestratorConfig(), client)
+    subtasks = [
+        SubTask(task_id="a", description="A", depends_on=["c"]),
+        SubTask(task_id="b", description="B", depends_on=["a"]),
+        SubTask(task_id="c", description="C", depends_on=["b"])
+    ]
+    with pytest.raises(Exception, match="cycle: a -> c -> b -> a"):
+        await workflow._delegate_tasks(subtasks)
+    assert client.prompts == []
+
+class StreamingPlanClient(ScriptedClient):
+    """Mock client that streams the breakdown one line at a time."""
+    
+    def __init__(self, lines, line_delay, delays=None):
+        super().__init__("\n".join(lines), delays)
+        self.lines = lines
+        self.line_delay = line_delay
+        self.streamed = 0
+        self.stream_closed = False
+    
+    async def stream_completion(self, messages, **kwargs):
+        import asyncio
+        try:
+            for line in self.lines:
+                await asyncio.sleep(self.line_delay)
+                self.streamed += 1
+                # Split lines across chunks like a real token stream
+                yield line[:3]
+                yield line[3:] + "\n"
+        finally:
+            self.stream_closed = True
+
+@pytest.mark.asyncio
+async def test_pipelined_workers_start_during_breakdown():
+    """Test that subtasks are dispatched while the plan is still streaming."""
+    import time
+    lines = ["1. Alpha", "2. Beta", "3. Gamma (depends on: 1)", "4. Delta"]
+    client = StreamingPlanClient(lines, line_delay=0.05, delays={"Alpha": 0.05, "Beta": 0.05, "Gamma": 0.05, "Delta": 0.05})
+    workflow = OrchestratorWorkflow(OrchestratorConfig(pipelined=True), client)
+    
+    start = time.monotonic()
+    task = await workflow.execute(Task(description="Plan"))
+    elapsed = time.monotonic() - start
+    
+    assert [s.description for s in task.subtasks] == ["1. Alpha", "2. Beta", "3. Gamma", "4. Delta"]
+    assert task.subtasks[2].depends_on == ["subtask_0"]
+    # Alpha finished before the plan did; the whole run overlaps planning
+    assert task.subtasks[0].metadata["finished_at"] < 0.19
+    assert elapsed < 0.2 + 0.05 + 0.05
+    assert task.result == "final"
+
+@pytest.mark.asyncio
+async def test_pipelined_breakdown_stops_at_max_subtasks():
+    """Test that generation is cancelled once the subtask cap is reached."""
+    lines = [f"{i}. Step {i}" for i in range(1, 11)]
+    client = StreamingPlanClient(lines, line_delay=0.01)
+    workflow = OrchestratorWorkflow(OrchestratorConfig(max_subtasks=3, pipelined=True), client)
+    
+    task = await workflow.execute(Task(description="Plan"))
+    
+    assert len(task.subtasks) == 3
+    assert client.streamed == 3
+    assert client.stream_closed
+
+@pytest.mark.asyncio
+async def test_pipelined_breakdown_timeout_keeps_dispatched_subtasks():
+    """Test that a breakdown timeout synthesizes the subtasks already dispatched."""
+    client = ScriptedClient("")
+    
+    async def stall(messages, **kwargs):
+        import asyncio
+        yield "1. Alpha\n2. Beta\n3. Gam"
+        await asyncio.sleep(5)
+    
+    client.stream_completion = stall
+    workflow = OrchestratorWorkflow(OrchestratorConfig(pipelined=True, timeout_per_subtask=0.1), client)
+    
+    task = await workflow.execute(Task(description="Plan"))
+    
+    assert [s.result for s in task.subtasks] == ["result of Alpha", "result of Beta"]
+    assert task.metadata["breakdown_truncated"]
+    assert task.result == "final"
+
+@pytest.mark.asyncio
+async def test_slow_subtask_times_out_alone():
+    """Test that one slow worker does not discard the results of the others."""
+    client = ScriptedClient("1. Quick\n2. Slow\n3. Also quick", delays={"Quick": 0.01, "Slow": 5})
+    workflow = OrchestratorWorkflow(OrchestratorConfig(timeout_per_subtask=0.1), client)
+    
+    task = await workflow.execute(Task(description="Mixed"))
+    
+    assert task.subtasks[0].result == "result of Quick"
+    assert task.subtasks[1].result == "Error: Subtask subtask_1 timed out"
+    assert task.subtasks[2].result == "result of quick"
+    assert task.subtasks[1].metadata["timed_out"]
+    assert task.subtasks[1].metadata["duration"] < 0.5
+    assert task.metadata["timed_out"] == ["subtask_1"]
+    assert task.result == "final"
+    synthesis_prompt = client.prompts[-1]
+    assert "Subtask subtask_0: result of Quick" in synthesis_prompt
+    assert "timed out" in synthesis_prompt and "2. Slow" in synthesis_prompt
+
+@pytest.mark.asyncio
+async def test_deadline_bounds_every_stage():
+    """Test that the overall deadline cuts worker budgets and leaves time to synthesize."""
+    import time
+    client = ScriptedClient("1. Slow\n2. Later (depends on: 1)", delays={"Slow": 5})
+    config = OrchestratorConfig(timeout_per_subtask=30, deadline=0.5, synthesis_reserve=0.2)
+    workflow = OrchestratorWorkflow(config, client)
+    
+    start = time.monotonic()
+    task = await workflow.execute(Task(description="Bounded"))
+    elapsed = time.monotonic() - start
+    
+    assert elapsed < 0.5
+    assert task.subtasks[0].metadata["timeout"] <= 0.4
+    assert task.subtasks[0].metadata["timed_out"]
+    assert task.subtasks[1].metadata["skipped"]
+    assert task.result == "final"
+    assert task.metadata["elapsed"] < 0.5
+
+@pytest.mark.asyncio
+async def test_synthesis_timeout_is_not_reported_as_deadline():
+    """Test that synthesis_timeout expiry keeps its own error without a deadline."""
+    class SlowSynthesisClient(ScriptedClient):
+        async def complete(self, messages, **kwargs):
+            import asyncio
+            if messages[-1]["content"].startswith("Subtask results to synthesize"):
+                await asyncio.sleep(5)
+            return await super().complete(messages, **kwargs)
+    
+    workflow = OrchestratorWorkflow(OrchestratorConfig(synthesis_timeout=0.05), SlowSynthesisClient("1. Step"))
+    with pytest.raises(TimeoutError):
+        await workflow.execute(Task(description="Slow synthesis"))
+    
+    config = OrchestratorConfig(synthesis_timeout=30, deadline=0.2)
+    workflow = OrchestratorWorkflow(config, SlowSynthesisClient("1. Step"))
+    with pytest.raises(Exception, match="Task deadline exceeded during synthesis"):
+        await workflow.execute(Task(description="Slow synthesis"))
+
+@pytest.mark.asyncio
+async def test_tree_synthesis_bounds_prompt_size():
+    """Test that a large fan-out is synthesized through bounded merge prompts."""
+    client = ScriptedClient("")
+    workflow = OrchestratorWorkflow(OrchestratorConfig(synthesis_fan_in=4), client)
+    subtasks = [SubTask(task_id=f"s{i}", description=f"Part {i}", result=f"finding {i}") for i in range(10)]
+    
+    stats = {}
+    result = await workflow._synthesize_results(subtasks, stats)
+    
+    assert result == "final"
+    merges = [p for p in client.prompts if p.startswith("Results to merge")]
+    assert len(merges) == 3
+    assert all(p.count("finding") <= 4 for p in merges)
+    assert stats == {"levels": 2, "calls": 4, "batches": [3, 1]}
+
+class FoldingClient(ScriptedClient):
+    """Mock client that answers running-synthesis merges with a numbered partial."""
+    
+    def __init__(self, breakdown, delays=None, merge_delay=0.01):
+        super().__init__(breakdown, delays)
+        self.merge_delay = merge_delay
+        self.merges = []
+    
+    async def complete(self, messages, **kwargs):
+        import asyncio
+        from ...basic_workflow.api.client import Completion
+        content = messages[-1]["content"]
+        if content.startswith("Synthesis so far"):
+            self.merges.append(content)
+            await asyncio.sleep(self.merge_delay)
+            return Completion(f"partial {len(self.merges)}")
+        return await super().complete(messages, **kwargs)
+
+@pytest.mark.asyncio
+async def test_streaming_synthesis_folds_results_as_they_finish():
+    """Test that only the last results are left for the final merge."""
+    client = FoldingClient(
+        "1. Fetch A\n2. Fetch B\n3. Fetch C\n4. Fetch D",
+        delays={"A": 0.02, "B": 0.05, "C": 0.1, "D": 0.2}
+    )
+    workflow = OrchestratorWorkflow(OrchestratorConfig(streaming_synthesis=True), client)
+    
+    task = await workflow.execute(Task(description="Fetch everything"))
+    
+    assert task.result == "final"
+    assert client.merges
+    assert "Synthesis so far:\n(none yet)" in client.merges[0]
+    assert "result of A" in client.merges[0] and "result of B" in client.merges[0]
+    final_prompt = client.prompts[-1]
+    assert final_prompt.startswith("Subtask results to synthesize")
+    assert "partial 2" in final_prompt
+    assert "Subtask subtask_3: result of D" in final_prompt
+    assert "result of A" not in final_prompt
+    assert task.metadata["synthesis"]["merges"] == len(client.merges) == 2
+    assert task.metadata["synthesis"]["folded"] == 3
+    assert task.metadata["synthesis_time"] < 0.1
+
+@pytest.mark.asyncio
+async def test_streaming_synthesis_does_not_wait_for_slow_merge():
+    """Test that a merge in flight when the workers finish is folded into the final prompt."""
+    client = FoldingClient("1. Fetch A\n2. Fetch B\n3. Fetch C", delays={"A": 0.01, "B": 0.02, "C": 0.05}, merge_delay=1)
+    workflow = OrchestratorWorkflow(OrchestratorConfig(streaming_synthesis=True), client)
+    
+    task = await workflow.execute(Task(description="Fetch everything"))
+    
+    assert len(client.merges) == 1
+    assert task.metadata["synthesis"]["merges"] == 0
+    final_prompt = client.prompts[-1]
+    assert all(f"result of {name}" in final_prompt for name in "ABC")
+    assert task.metadata["elapsed"] < 0.5
+
+@pytest.mark.asyncio
+async def test_streaming_synthesis_falls_back_when_a_merge_fails():
+    """Test that a timed-out running merge falls back to synthesizing every result."""
+    client = FoldingClient("1. Fetch A\n2. Fetch B\n3. Fetch C", delays={"A": 0.01, "B": 0.02, "C": 0.4}, merge_delay=3)
+    workflow = OrchestratorWorkflow(OrchestratorConfig(streaming_synthesis=True, synthesis_timeout=0.2), client)
+    
+    task = await workflow.execute(Task(description="Fetch everything"))
+    
+    assert task.result == "final"
+    assert task.metadata["elapsed"] < 1
+    final_prompt = client.prompts[-1]
+    assert all(f"result of {name}" in final_prompt for name in "ABC")
+
+@pytest.mark.asyncio
+async def test_streaming_synthesis_honours_synthesis_timeout():
+    """Test that the final merge is bounded by synthesis_timeout without a deadline."""
+    import time
+    
+    class SlowFinalClient(FoldingClient):
+        async def complete(self, messages, **kwargs):
+            import asyncio
+            if messages[-1]["content"].startswith("Subtask results to synthesize"):
+                await asyncio.sleep(3)
+            return await super().complete(messages, **kwargs)
+    
+    client = SlowFinalClient("1. Fetch A\n2. Fetch B", delays={"A": 0.01, "B": 0.02})
+    workflow = OrchestratorWorkflow(OrchestratorConfig(streaming_synthesis=True, synthesis_timeout=0.3), client)
+    
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        await workflow.execute(Task(description="Fetch everything"))
+    assert time.monotonic() - start < 1
+
+@pytest.mark.asyncio
+async def test_concurrent_runs_keep_their_own_synthesis_stats():
+    """Test that synthesis statistics are reported per run, not shared by the workflow."""
+    import asyncio
+    small = FoldingClient("1. Fetch A\n2. Fetch B", delays={"A": 0.01, "B": 0.02})
+    workflow = OrchestratorWorkflow(OrchestratorConfig(synthesis_fan_in=2), small)
+    
+    tasks = await asyncio.gather(
+        workflow.execute(Task(description="Two results")),
+        workflow._synthesize_results(
+            [SubTask(task_id=f"s{i}", description=f"Part {i}", result=f"finding {i}") for i in range(4)],
+            {}
+        )
+    )
+    
+    assert tasks[0].metadata["synthesis"] == {"levels": 1, "calls": 1, "batches": [1]}
@@ -3,12 +3,31 @@ Orchestrator workflow implementation.
 
 This module implements the orchestrator-workers pattern from Anthropic's research,
 providing functionality for task breakdown, delegation, and result synthesis.
+Subtasks may declare dependencies on each other; they are scheduled as a DAG so
+that independent subtasks run in parallel and dependent ones receive the
+results they build on. In pipelined mode workers start while the breakdown is
+still being generated. Large fan-outs can be synthesized as a tree of
+token-bounded merges instead of one prompt holding every result, or folded
+into a running synthesis as the workers finish.
 """
 
 import asyncio
-from typing import List, Dict, Any, Optional
+import re
+import time
+from contextlib import aclosing
+from typing import AsyncGenerator, AsyncIterator, Callable, List, Dict, Any, Optional, Tuple
 from .models import Task, SubTask, OrchestratorConfig
-from ..basic_workflow.api.client import VeniceClient
+from ..basic_workflow.api.client import VeniceClient, complete_with
+from ...common.reduce import tree_reduce
+
+_STEP_NUMBER = re.compile(r"^\s*(?:[-*]\s*)?(?:(?:step|subtask)\s*)?(\d+)[.):]\s+", re.IGNORECASE)
+# Only clauses listing step numbers are annotations; "(after reviewing the draft)" is prose
+_DEPENDENCIES = re.compile(
+    r"\s*[(\[]\s*(?:depends on|after|requires)\s*:?\s*"
+    r"((?:(?:steps?|subtasks?)\s*)?\d+(?:\s*(?:,|and|&)\s*(?:(?:steps?|subtasks?)\s*)?\d+)*)"
+    r"\s*[)\]]\s*$",
+    re.IGNORECASE
+)
 
 class OrchestratorWorkflow:
     """Implementation of orchestrator-workers workflow."""
@@ -19,18 +38,91 @@ class OrchestratorWorkflow:
         self.client = client
         
     async def execute(self, task: Task) -> Task:
-        """Execute a complex task using orchestrator-workers pattern."""
+        """Execute a complex task using orchestrator-workers pattern.
+        
+        With ``config.pipelined`` the breakdown is streamed and each subtask
+        is dispatched to a worker as soon as its line is complete, overlapping
+        planning with execution.
+        
+        With ``config.deadline`` every stage gets what is left of the overall
+        budget: the breakdown and the workers must finish before the share
+        reserved for synthesis, and subtasks still running at that point time
+        out. Synthesis then proceeds with the subtasks that completed and is
+        told which ones are missing.
+        
+        With ``config.streaming_synthesis`` results are folded into a running
+        synthesis as workers finish, so only one small merge is left once the
+        last worker is done. ``metadata["synthesis_time"]`` records how long
+        synthesis took after the workers and ``metadata["synthesis"]`` the
+        merge statistics of tree or streaming synthesis.
+        """
         try:
-            # Break down task into subtasks
-            subtasks = await self._break_down_task(task)
-            task.subtasks = subtasks
+            start = time.monotonic()
+            deadline_at = start + self.config.deadline if self.config.deadline is not None else None
+            workers_deadline_at = None
+            if deadline_at is not None:
+                workers_deadline_at = deadline_at - self.config.deadline * self.config.synthesis_reserve
             
-            # Process subtasks with workers
-            results = await self._delegate_tasks(subtasks)
+            folding = None
+            on_finish = None
+            synthesis_stats: Dict[str, Any] = {}
+            if self.config.streaming_synthesis:
+                # Fold results into a running synthesis while workers run
+                finished: asyncio.Queue = asyncio.Queue()
+                on_finish = finished.put_nowait
+                folding = asyncio.ensure_future(self._fold_results(finished, deadline_at, synthesis_stats))
+            
+            try:
+                if self.config.pipelined:
+                    # Break down and delegate at the same time
+                    results = await self._run_dag(
+                        self._stream_breakdown(task, workers_deadline_at),
+                        workers_deadline_at,
+                        on_finish
+                    )
+                    task.subtasks = results
+                else:
+                    # Break down task into subtasks
+                    async with asyncio.timeout(self._remaining(workers_deadline_at)):
+                        subtasks = await self._break_down_task(task)
+                    task.subtasks = subtasks
+                    
+                    # Process subtasks with workers
+                    results = await self._delegate_tasks(subtasks, workers_deadline_at, on_finish)
+                    task.subtasks = results
+            except BaseException:
+                if folding is not None:
+                    folding.cancel()
+                    if folding.done() and not folding.cancelled():
+                        folding.exception()  # A failed fold is superseded by this error
+                raise
+            task.metadata["schedule"] = self._schedule_report(results)
+            timed_out = [s.task_id for s in results if s.metadata.get("timed_out")]
+            if timed_out:
+                task.metadata["timed_out"] = timed_out
             
             # Synthesize results
-            final_result = await self._synthesize_results(results)
+            synthesis_budget = self._synthesis_budget(deadline_at)
+            workers_done = time.monotonic()
+            try:
+                async with asyncio.timeout(synthesis_budget):
+                    if folding is not None:
+                        finished.put_nowait(None)
+                        final_result = await self._finish_streaming_synthesis(
+                            folding, results, deadline_at, synthesis_stats
+                        )
+                    else:
+                        final_result = await self._synthesize_results(results, synthesis_stats)
+            except TimeoutError:
+                if deadline_at is not None and time.monotonic() >= deadline_at:
+                    raise Exception("Task deadline exceeded during synthesis")
+                raise
             task.result = final_result
+            # Time from the last worker finishing to the final result
+            task.metadata["synthesis_time"] = time.monotonic() - workers_done
+            if synthesis_stats:
+                task.metadata["synthesis"] = synthesis_stats
+            task.metadata["elapsed"] = time.monotonic() - start
             
             return task
             
@@ -38,106 +130,571 @@ class OrchestratorWorkflow:
             print(f"Error in orchestrator workflow: {str(e)}")
             raise
             
+    def _breakdown_messages(self, task: Task) -> List[Dict[str, str]]:
+        """Build the request messages for a task breakdown."""
+        return [
+            {"role": "system", "content": (
+                "Break down this task into smaller, manageable subtasks. "
+                "Write one numbered subtask per line. If a subtask needs the results "
+                "of earlier ones, end its line with (depends on: <numbers>)."
+            )},
+            {"role": "user", "content": f"Task to break down: {task.description}"}
+        ]
+            
     async def _break_down_task(self, task: Task) -> List[SubTask]:
         """Break down complex task into subtasks."""
         try:
-            messages = [
-                {"role": "system", "content": "Break down this task into smaller, manageable subtasks."},
-                {"role": "user", "content": f"Task to break down: {task.description}"}
-            ]
+            messages = self._breakdown_messages(task)
             
-            result_buffer = []
             async with asyncio.timeout(self.config.timeout_per_subtask):
-                async for chunk in self.client.stream_completion(messages):
-                    if chunk.startswith("<think>"):
-                        print(f"\nThinking: {chunk[7:-8]}")  # Strip <think> tags
-                        continue
-                    result_buffer.append(chunk)
+                result = await complete_with(self.client, messages)
                     
             # Parse subtasks from result
-            subtasks_text = "".join(result_buffer).split("\n")
-            subtasks = [
-                SubTask(
-                    task_id=f"subtask_{i}",
-                    description=text.strip()
-                )
-                for i, text in enumerate(subtasks_text)
-                if text.strip()
-            ][:self.config.max_subtasks]
-            
-            return subtasks
+            return self._parse_subtasks(result.text)
             
         except Exception as e:
             print(f"Error breaking down task: {str(e)}")
             raise
             
-    async def _delegate_tasks(self, subtasks: List[SubTask]) -> List[SubTask]:
-        """Delegate subtasks to workers."""
+    async def _stream_breakdown(
+        self,
+        task: Task,
+        deadline_at: Optional[float] = None
+    ) -> AsyncGenerator[SubTask, None]:
+        """Stream the task breakdown and yield each subtask as its line completes.
+        
+        Once ``max_subtasks`` subtasks have been yielded the stream is closed,
+        which cancels the rest of the generation. Dependencies may only refer to
+        earlier lines; other references are dropped. If the breakdown times out
+        after some subtasks were yielded, it ends there and
+        ``task.metadata["breakdown_truncated"]`` is set, so the subtasks already
+        dispatched still finish and are synthesized.
+        
+        Args:
+            task: Task to break down
+            deadline_at: Monotonic time by which the breakdown must finish
+        
+        Yields:
+            Subtasks in breakdown order
+        """
+        messages = self._breakdown_messages(task)
+        deadline = time.monotonic() + self.config.timeout_per_subtask
+        if deadline_at is not None:
+            deadline = min(deadline, deadline_at)
+        steps: Dict[str, str] = {}
+        buffer = ""
+        index = 0
+        async with aclosing(self.client.stream_completion(messages)) as stream:
+            while index < self.config.max_subtasks:
+                try:
+                    chunk = await asyncio.wait_for(anext(stream), max(0.0, deadline - time.monotonic()))
+                except StopAsyncIteration:
+                    break
+                except asyncio.TimeoutError:
+                    if not index:
+                        raise Exception("Task breakdown timed out")
+                    # The unfinished last line is dropped
+                    task.metadata["breakdown_truncated"] = True
+                    return
+                buffer += chunk
+                *lines, buffer = buffer.split("\n")
+                for line in lines:
+                    if line.strip() and index < self.config.max_subtasks:
+                        yield self._parse_subtask_line(line, index, steps)
+                        index += 1
+        if buffer.strip() and index < self.config.max_subtasks:
+            yield self._parse_subtask_line(buffer, index, steps)
+            
+    def _parse_subtask_line(self, line: str, index: int, steps: Dict[str, str]) -> SubTask:
+        """Parse one breakdown line, resolving dependencies on earlier lines.
+        
+        Args:
+            line: Non-empty breakdown line
+            index: Position of the line among non-empty lines
+            steps: Step numbers seen so far mapped to subtask ids; updated in place
+        """
+        task_id = f"subtask_{index}"
+        dependencies = _DEPENDENCIES.search(line)
+        numbers = re.findall(r"\d+", dependencies.group(1)) if dependencies else []
+        depends_on = [steps[n] for n in dict.fromkeys(numbers) if n in steps]
+        number = _STEP_NUMBER.match(line)
+        steps[number.group(1) if number else str(index + 1)] = task_id
+        description = line[:dependencies.start()] if dependencies else line
+        return SubTask(task_id=task_id, description=description.strip(), depends_on=depends_on)
+            
+    def _parse_subtasks(self, text: str) -> List[SubTask]:
+        """Parse one subtask per line, with optional dependency annotations.
+        
+        Lines may be numbered ("2. ...") and may end with "(depends on: 1, 2)";
+        the numbers refer to the step numbers, or to line positions when the
+        lines are not numbered. Lines are resolved like the streamed
+        breakdown: dependencies may only refer to earlier lines, so the
+        subtasks always form a DAG. References to later or unknown steps are
+        dropped, and a repeated step number refers to its latest line.
+        """
+        lines = [line for line in text.split("\n") if line.strip()]
+        steps: Dict[str, str] = {}
+        return [
+            self._parse_subtask_line(line, index, steps)
+            for index, line in enumerate(lines[:self.config.max_subtasks])
+        ]
+            
+    async def _delegate_tasks(
+        self,
+        subtasks: List[SubTask],
+        deadline_at: Optional[float] = None,
+        on_finish: Optional[Callable[[SubTask], None]] = None
+    ) -> List[SubTask]:
+        """Delegate subtasks to workers, scheduling them by their dependencies.
+        
+        A subtask starts as soon as every subtask it depends on has finished,
+        so the delegation takes critical-path time rather than the sum of its
+        stages. Each subtask gets its own timeout, cut short by ``deadline_at``
+        (a monotonic time) if given; one slow subtask never discards the
+        others. Subtasks whose dependencies failed are skipped. Start, finish
+        and duration (seconds from the start of the delegation), the timeout
+        applied and whether it expired are recorded in each subtask's metadata.
+        """
         try:
-            # Process subtasks concurrently
-            async with asyncio.timeout(self.config.timeout_per_subtask):
-                results = await asyncio.gather(
-                    *[self._process_subtask(subtask) for subtask in subtasks],
-                    return_exceptions=True
-                )
+            order = self._topological_order(subtasks)
             
-            # Handle results and exceptions
-            processed_subtasks = []
-            for subtask, result in zip(subtasks, results):
-                if isinstance(result, Exception):
-                    print(f"Error processing subtask {subtask.task_id}: {str(result)}")
-                    subtask.result = f"Error: {str(result)}"
-                else:
-                    subtask.result = result
-                processed_subtasks.append(subtask)
-                
-            return processed_subtasks
+            async def ordered() -> AsyncGenerator[SubTask, None]:
+                for subtask in order:
+                    yield subtask
+            
+            await self._run_dag(ordered(), deadline_at, on_finish)
+            return subtasks
             
         except Exception as e:
             print(f"Error delegating tasks: {str(e)}")
             raise
             
+    async def _run_dag(
+        self,
+        source: AsyncIterator[SubTask],
+        deadline_at: Optional[float] = None,
+        on_finish: Optional[Callable[[SubTask], None]] = None
+    ) -> List[SubTask]:
+        """Run subtasks from a source as soon as their dependencies allow.
+        
+        The source must produce every subtask after the subtasks it depends
+        on; it is consumed concurrently with the running workers.
+        
+        Args:
+            source: Subtasks in topological order, possibly still being generated
+            deadline_at: Monotonic time after which no subtask may still run
+            on_finish: Called with each subtask once it has settled
+            
+        Returns:
+            The subtasks in the order the source produced them
+        """
+        subtasks: List[SubTask] = []
+        by_id: Dict[str, SubTask] = {}
+        waiting: Dict[str, int] = {}
+        dependents: Dict[str, List[str]] = {}
+        settled = set()
+        start = time.monotonic()
+        running: Dict[asyncio.Future, SubTask] = {}
+        
+        def launch(subtask: SubTask) -> None:
+            failed = [
+                dependency for dependency in subtask.depends_on
+                if by_id[dependency].result is None or by_id[dependency].result.startswith("Error:")
+            ]
+            if failed:
+                subtask.result = f"Error: Skipped because dependency {', '.join(failed)} failed"
+                subtask.metadata["skipped"] = True
+                finish(subtask)
+                return
+            timeout = self.config.timeout_per_subtask
+            remaining = self._remaining(deadline_at)
+            if remaining is not None and remaining < timeout:
+                timeout = remaining
+            if timeout <= 0:
+                subtask.result = f"Error: Subtask {subtask.task_id} timed out before it could start"
+                subtask.metadata["timed_out"] = True
+                subtask.metadata["timeout"] = 0.0
+                finish(subtask)
+                return
+            subtask.metadata["timeout"] = timeout
+            subtask.metadata["upstream_results"] = {
+                dependency: by_id[dependency].result for dependency in subtask.depends_on
+            }
+            subtask.metadata["started_at"] = time.monotonic() - start
+            running[asyncio.ensure_future(self._run_subtask(subtask))] = subtask
+            
+        def finish(subtask: SubTask) -> None:
+            settled.add(subtask.task_id)
+            if on_finish is not None:
+                on_finish(subtask)
+            for dependent in dependents[subtask.task_id]:
+                waiting[dependent] -= 1
+                if waiting[dependent] == 0:
+                    launch(by_id[dependent])
+                    
+        def add(subtask: SubTask) -> None:
+            subtasks.append(subtask)
+            by_id[subtask.task_id] = subtask
+            dependents[subtask.task_id] = []
+            pending = [dependency for dependency in subtask.depends_on if dependency not in settled]
+            waiting[subtask.task_id] = len(pending)
+            for dependency in pending:
+                dependents[dependency].append(subtask.task_id)
+            if not pending:
+                launch(subtask)
+        
+        next_subtask: Optional[asyncio.Future] = asyncio.ensure_future(anext(source))
+        try:
+            while next_subtask is not None or running:
+                waiting_on = set(running)
+                if next_subtask is not None:
+                    waiting_on.add(next_subtask)
+                done, _ = await asyncio.wait(waiting_on, return_when=asyncio.FIRST_COMPLETED)
+                if next_subtask in done:
+                    try:
+                        add(next_subtask.result())
+                        next_subtask = asyncio.ensure_future(anext(source))
+                    except StopAsyncIteration:
+                        next_subtask = None
+                for future in done:
+                    subtask = running.pop(future, None)
+                    if subtask is None:
+                        continue
+                    subtask.metadata.pop("upstream_results", None)
+                    subtask.metadata["finished_at"] = time.monotonic() - start
+                    subtask.metadata["duration"] = subtask.metadata["finished_at"] - subtask.metadata["started_at"]
+                    finish(subtask)
+        finally:
+            pending = list(running)
+            if next_subtask is not None:
+                pending.append(next_subtask)
+            for future in pending:
+                future.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            if hasattr(source, "aclose"):
+                await source.aclose()
+            
+        return subtasks
+            
+    async def _run_subtask(self, subtask: SubTask) -> None:
+        """Process a subtask under its timeout and record the result or error."""
+        try:
+            async with asyncio.timeout(subtask.metadata.get("timeout", self.config.timeout_per_subtask)):
+                subtask.result = await self._process_subtask(subtask)
+        except Exception as e:
+            if isinstance(e, TimeoutError):
+                subtask.metadata["timed_out"] = True
+                e = Exception(f"Subtask {subtask.task_id} timed out")
+            print(f"Error processing subtask {subtask.task_id}: {str(e)}")
+            subtask.result = f"Error: {str(e)}"
+            
+    @staticmethod
+    def _timeout_note(subtasks: List[SubTask]) -> str:
+        """Describe the subtasks that timed out, for the synthesis prompt."""
+        timed_out = [
+            f"Subtask {subtask.task_id}: {subtask.description}"
+            for subtask in subtasks
+            if subtask.metadata.get("timed_out")
+        ]
+        if not timed_out:
+            return ""
+        return "\n\nThese subtasks timed out and have no result; note what is missing:\n" + "\n".join(timed_out)
+        
+    @staticmethod
+    def _remaining(deadline_at: Optional[float]) -> Optional[float]:
+        """Get the seconds left until a monotonic deadline (None for no deadline)."""
+        if deadline_at is None:
+            return None
+        return max(0.0, deadline_at - time.monotonic())
+        
+    @staticmethod
+    def _topological_order(subtasks: List[SubTask]) -> List[SubTask]:
+        """Order subtasks so that dependencies come first.
+        
+        Raises:
+            Exception: If a dependency is unknown or the dependencies contain a cycle
+        """
+        by_id = {subtask.task_id: subtask for subtask in subtasks}
+        waiting = {}
+        for subtask in subtasks:
+            for dependency in subtask.depends_on:
+                if dependency not in by_id:
+                    raise Exception(f"Subtask {subtask.task_id} depends on unknown subtask {dependency}")
+            waiting[subtask.task_id] = len(subtask.depends_on)
+        
+        ready = [subtask for subtask in subtasks if not subtask.depends_on]
+        order = []
+        while ready:
+            subtask = ready.pop(0)
+            order.append(subtask)
+            for other in subtasks:
+                if subtask.task_id in other.depends_on:
+                    waiting[other.task_id] -= 1
+                    if waiting[other.task_id] == 0:
+                        ready.append(other)
+        if len(order) < len(subtasks):
+            # Walk dependencies from an unscheduled subtask until one repeats
+            path = [next(s.task_id for s in subtasks if waiting[s.task_id] > 0)]
+            while True:
+                step = next(d for d in by_id[path[-1]].depends_on if waiting[d] > 0)
+                if step in path:
+                    cycle = path[path.index(step):] + [step]
+                    raise Exception(f"Subtask dependencies contain a cycle: {' -> '.join(cycle)}")
+                path.append(step)
+        return order
+        
+    @staticmethod
+    def _schedule_report(subtasks: List[SubTask]) -> Dict[str, Any]:
+        """Summarize how long the delegation took against its critical path.
+        
+        The critical path is traced back from the last subtask to finish,
+        following whichever dependency finished last at each step.
+        """
+        timed = {s.task_id: s for s in subtasks if "finished_at" in s.metadata}
+        if not timed:
+            return {"wall_time": 0.0, "total_work": 0.0, "critical_path": [], "critical_path_time": 0.0}
+        last = max(timed.values(), key=lambda s: s.metadata["finished_at"])
+        path = [last]
+        while True:
+            upstream = [timed[d] for d in path[-1].depends_on if d in timed]
+            if not upstream:
+                break
+            path.append(max(upstream, key=lambda s: s.metadata["finished_at"]))
+        path.reverse()
+        total_work = sum(s.metadata["duration"] for s in timed.values())
+        wall_time = last.metadata["finished_at"]
+        return {
+            "wall_time": wall_time,
+            "total_work": total_work,
+            "parallelism": total_work / wall_time if wall_time > 0 else 1.0,
+            "critical_path": [s.task_id for s in path],
+            "critical_path_time": sum(s.metadata["duration"] for s in path)
+        }
+            
     async def _process_subtask(self, subtask: SubTask) -> str:
-        """Process a single subtask."""
+        """Process a single subtask, given the results of its dependencies."""
+        content = subtask.description
+        upstream = subtask.metadata.get("upstream_results")
+        if upstream:
+            context = "\n\n".join(f"Result of {task_id}:\n{result}" for task_id, result in upstream.items())
+            content = f"Results of the subtasks this one builds on:\n{context}\n\nSubtask:\n{content}"
         messages = [
             {"role": "system", "content": "Process this subtask efficiently and accurately."},
-            {"role": "user", "content": subtask.description}
+            {"role": "user", "content": content}
         ]
         
-        result_buffer = []
-        async for chunk in self.client.stream_completion(messages):
-            if chunk.startswith("<think>"):
-                print(f"\nThinking: {chunk[7:-8]}")  # Strip <think> tags
-                continue
-            result_buffer.append(chunk)
-            
-        return "".join(result_buffer)
+        result = await complete_with(self.client, messages)
+        return result.text
+        
+    async def _synthesize_results(
+        self,
+        subtasks: List[SubTask],
+        stats: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """Synthesize results from completed subtasks.
         
-    async def _synthesize_results(self, subtasks: List[SubTask]) -> str:
-        """Synthesize results from completed subtasks."""
+        Subtasks that timed out are named in the prompt so the final result
+        can say what is missing instead of silently leaving it out. Merge
+        statistics are written to ``stats`` if given.
+        """
         try:
             # Prepare results for synthesis
-            results_text = "\n".join(
-                f"Subtask {subtask.task_id}: {subtask.result}"
+            results = [
+                self._synthesis_item(subtask)
                 for subtask in subtasks
                 if subtask.result and not subtask.result.startswith("Error:")
-            )
-            
-            messages = [
-                {"role": "system", "content": "Synthesize these subtask results into a coherent final result."},
-                {"role": "user", "content": f"Subtask results to synthesize:\n{results_text}"}
             ]
+            note = self._timeout_note(subtasks)
             
-            result_buffer = []
             async with asyncio.timeout(self.config.synthesis_timeout):
-                async for chunk in self.client.stream_completion(messages):
-                    if chunk.startswith("<think>"):
-                        print(f"\nThinking: {chunk[7:-8]}")  # Strip <think> tags
-                        continue
-                    result_buffer.append(chunk)
-                    
-            return "".join(result_buffer)
+                return await self._tree_synthesize(
+                    results, lambda parts: self._synthesis_messages(parts, note), stats
+                )
             
         except Exception as e:
             print(f"Error synthesizing results: {str(e)}")
             raise
+            
+    def _synthesis_item(self, subtask: SubTask) -> str:
+        """Format a completed subtask for a synthesis prompt."""
+        return f"Subtask {subtask.task_id}: {subtask.result}"
+        
+    def _synthesis_messages(self, parts: List[str], note: str = "") -> List[Dict[str, str]]:
+        """Build the final synthesis prompt over formatted results."""
+        results_text = "\n".join(parts)
+        return [
+            {"role": "system", "content": "Synthesize these subtask results into a coherent final result."},
+            {"role": "user", "content": f"Subtask results to synthesize:\n{results_text}{note}"}
+        ]
+        
+    async def _fold_results(
+        self,
+        finished: "asyncio.Queue[Optional[SubTask]]",
+        deadline_at: Optional[float] = None,
+        stats: Optional[Dict[str, Any]] = None
+    ) -> Tuple[Optional[str], List[str]]:
+        """Fold finished subtasks into a running synthesis as they arrive.
+        
+        One merge runs at a time; results that arrive while it is in flight
+        are folded together by the next one. Folding stops at a ``None``
+        sentinel, which is put on the queue once the last worker is done. A
+        merge still in flight at that point is cancelled and its results are
+        handed back, since waiting for it would take longer than including
+        them in the final prompt. Each merge is bounded by
+        ``synthesis_timeout`` and the task deadline.
+        
+        Args:
+            finished: Queue of finished subtasks, ended by ``None``
+            deadline_at: Monotonic time by which the task must finish
+            stats: Dictionary to fill with the number of completed merges
+                and of merge calls, counting the final one
+            
+        Returns:
+            The running synthesis (None if nothing was merged yet) and the
+            results not folded into it
+        """
+        partial: Optional[str] = None
+        pending: List[str] = []
+        merging: Optional[asyncio.Future] = None
+        merged: List[str] = []
+        merges = calls = 0
+        getter = asyncio.ensure_future(finished.get())
+        try:
+            while True:
+                waiting_on = {getter} if merging is None else {getter, merging}
+                done, _ = await asyncio.wait(waiting_on, return_when=asyncio.FIRST_COMPLETED)
+                if merging in done:
+                    partial = merging.result().text
+                    merging, merged = None, []
+                    merges += 1
+                if getter in done:
+                    arrived = [getter.result()]
+                    while not finished.empty():
+                        arrived.append(finished.get_nowait())
+                    pending.extend(
+                        self._synthesis_item(subtask)
+                        for subtask in arrived
+                        if subtask is not None and subtask.result and not subtask.result.startswith("Error:")
+                    )
+                    if arrived[-1] is None:
+                        if merging is not None:
+                            merging.cancel()
+                            pending = merged + pending
+                        if stats is not None:
+                            stats.update({"merges": merges, "calls": calls + 1})
+                        return partial, pending
+                    getter = asyncio.ensure_future(finished.get())
+                # A lone result is not worth a merge; wait for a second one
+                if merging is None and len(pending) + (partial is not None) >= 2:
+                    merged, pending = pending, []
+                    merging = asyncio.ensure_future(
+                        self._bounded_complete(self._fold_messages(partial, merged), deadline_at)
+                    )
+                    calls += 1
+        finally:
+            getter.cancel()
+            if merging is not None:
+                merging.cancel()
+                
+    async def _finish_streaming_synthesis(
+        self,
+        folding: asyncio.Future,
+        subtasks: List[SubTask],
+        deadline_at: Optional[float] = None,
+        stats: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """Wait for the running synthesis and merge in the last results.
+        
+        If an intermediate merge failed, every result is still available, so
+        the subtasks are synthesized the barrier way instead. The number of
+        results folded before the final merge is added to ``stats`` if given.
+        """
+        try:
+            try:
+                partial, pending = await folding
+            except Exception as e:
+                print(f"Streaming synthesis failed, synthesizing all results at once: {str(e)}")
+                return await self._synthesize_results(subtasks, stats)
+            if stats is not None:
+                stats["folded"] = sum(
+                    1 for subtask in subtasks
+                    if subtask.result and not subtask.result.startswith("Error:")
+                ) - len(pending)
+            parts = ([f"Synthesis of the earlier subtask results:\n{partial}"] if partial is not None else []) + pending
+            result = await self._bounded_complete(
+                self._synthesis_messages(parts, self._timeout_note(subtasks)),
+                deadline_at
+            )
+            return result.text
+            
+        except Exception as e:
+            print(f"Error synthesizing results: {str(e)}")
+            raise
+        
+    async def _bounded_complete(self, messages: List[Dict[str, str]], deadline_at: Optional[float] = None) -> Any:
+        """Send a synthesis request bounded by ``synthesis_timeout`` and the deadline."""
+        async with asyncio.timeout(self._synthesis_budget(deadline_at)):
+            return await complete_with(self.client, messages)
+            
+    def _synthesis_budget(self, deadline_at: Optional[float] = None) -> float:
+        """Get the time a synthesis call may take: ``synthesis_timeout`` capped by the deadline."""
+        remaining = self._remaining(deadline_at)
+        if remaining is None:
+            return self.config.synthesis_timeout
+        return min(remaining, self.config.synthesis_timeout)
+        
+    @staticmethod
+    def _fold_messages(partial: Optional[str], parts: List[str]) -> List[Dict[str, str]]:
+        """Build the prompt that folds new results into the running synthesis."""
+        results_text = "\n".join(parts)
+        return [
+            {"role": "system", "content": "Update the running synthesis with these new subtask results. Keep every key "
+                                          "point, finding and open issue; more results will be added later."},
+            {"role": "user", "content": f"Synthesis so far:\n{partial or '(none yet)'}\n\nNew subtask results:\n{results_text}"}
+        ]
+        
+    async def _tree_synthesize(
+        self,
+        results: List[str],
+        final_messages: Callable[[List[str]], List[Dict[str, str]]],
+        stats: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """Reduce results to one synthesis through a tree of merge prompts.
+        
+        Results are grouped into batches of at most ``synthesis_fan_in``
+        results and ``synthesis_max_tokens`` tokens, which are merged in
+        parallel into partial syntheses, level by level, until one batch is
+        left for the final prompt. With neither limit set this is a single
+        call over all results.
+        
+        Args:
+            results: Formatted results to synthesize
+            final_messages: Builds the final synthesis prompt for a batch
+            stats: Dictionary to fill with the number of levels, calls and
+                the batch count of each level
+            
+        Returns:
+            Final synthesis
+        """
+        async def combine(parts: List[str], final: bool) -> str:
+            messages = final_messages(parts) if final else self._merge_messages(parts)
+            result = await complete_with(self.client, messages)
+            return result.text
+        
+        return await tree_reduce(
+            results,
+            combine,
+            fan_in=self.config.synthesis_fan_in,
+            max_tokens=self.config.synthesis_max_tokens,
+            stats=stats
+        )
+        
+    @staticmethod
+    def _merge_messages(parts: List[str]) -> List[Dict[str, str]]:
+        """Build the prompt that merges a batch of results into a partial synthesis."""
+        results_text = "\n\n".join(parts)
+        return [
+            {"role": "system", "content": "Merge these results into one concise partial synthesis that keeps every key point, "
+                                          "finding and open issue. It will be combined with other partial syntheses later."},
+            {"role": "user", "content": f"Results to merge:\n{results_text}"}
+        ]
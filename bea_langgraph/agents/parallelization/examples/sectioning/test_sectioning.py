@@ -36,3 +36,111 @@ async def test_empty_document():
     result = await workflow.process_document(document, criteria)
     
     assert result == ""
+
+@pytest.mark.asyncio
+async def test_stream_document_in_order():
+    """Test that processed sections stream in document order."""
+    import asyncio
+    from ....basic_workflow.api.client import Completion
+    
+    class MockVeniceClient:
+        async def complete(self, messages, **kwargs):
+            section = messages[-1]["content"].rsplit("\n", 1)[-1]
+            # Earlier sections take longer, so they finish out of order
+            await asyncio.sleep(0.01 * (5 - int(section[-1])))
+            return Completion(f"processed {section}")
+    
+    workflow = SectioningWorkflow(ParallelConfig(max_concurrent_tasks=5), MockVeniceClient())
+    document = "\n\n".join(f"Section {i}" for i in range(5))
+    
+    chunks = [chunk async for chunk in workflow.stream_document(document, ["clarity"], max_buffered=2)]
+    assert chunks == [f"processed Section {i}" for i in range(5)]
+
+@pytest.mark.asyncio
+async def test_token_budgeted_sections():
+    """Test that small markdown blocks are packed into fewer sections."""
+    from ....basic_workflow.api.client import Completion
+    
+    class MockVeniceClient:
+        def __init__(self):
+            self.prompts = []
+        
+        async def complete(self, messages, **kwargs):
+            self.prompts.append(messages[-1]["content"])
+            return Completion("ok")
+    
+    document = "# Checklist\n\n" + "\n\n".join(f"- step {i}" for i in range(20))
+    client = MockVeniceClient()
+    workflow = SectioningWorkflow(ParallelConfig(), client, max_section_tokens=500)
+    await workflow.process_document(document, ["clarity"])
+    
+    assert len(client.prompts) == 1
+    assert "- step 19" in client.prompts[0]
+
+@pytest.mark.asyncio
+async def test_repeated_and_unchanged_sections_are_not_resent(tmp_path):
+    """Test in-document deduplication and the persistent section cache."""
+    from ....basic_workflow.api.cache import ResponseCache
+    from ....basic_workflow.api.client import Completion
+    
+    class MockVeniceClient:
+        def __init__(self):
+            self.sections = []
+        
+        async def complete(self, messages, **kwargs):
+            section = messages[-1]["content"].rsplit("Section:\n", 1)[-1]
+            self.sections.append(section)
+            return Completion(f"processed {section}")
+    
+    footer = "Confidential. Do not distribute."
+    document = "\n\n".join(["Intro.", footer, "Body.", footer, "End.", footer])
+    path = str(tmp_path / "sections.db")
+    
+    client = MockVeniceClient()
+    workflow = SectioningWorkflow(ParallelConfig(), client, section_cache=ResponseCache(path=path))
+    stats = {}
+    result = await workflow.process_document(document, ["clarity"], stats=stats)
+    assert sorted(client.sections) == sorted(["Intro.", footer, "Body.", "End."])
+    assert result.count(f"processed {footer}") == 3
+    assert stats == {"sections": 6, "cached": 0, "deduplicated": 2, "processed": 4}
+    workflow.section_cache.close()
+    
+    # A later run with one edited section only sends that section
+    client = MockVeniceClient()
+    workflow = SectioningWorkflow(ParallelConfig(), client, section_cache=ResponseCache(path=path))
+    edited = document.replace("Body.", "New body.")
+    stats = {}
+    chunks = [chunk async for chunk in workflow.stream_document(edited, ["clarity"], stats=stats)]
+    assert client.sections == ["New body."]
+    assert chunks[2] == "processed New body."
+    assert len(chunks) == 6
+    assert stats["cached"] == 5
+    
+    # Different criteria are cached separately
+    stats = {}
+    await workflow.process_document(edited, ["brevity"], stats=stats)
+    assert stats["cached"] == 0
+    workflow.section_cache.close()
+
+@pytest.mark.asyncio
+async def test_tree_reduce_aggregates_once():
+    """Test that the merge tree runs once per document."""
+    from ....basic_workflow.api.client import Completion
+    
+    class MockVeniceClient:
+        def __init__(self):
+            self.merges = 0
+        
+        async def complete(self, messages, **kwargs):
+            if messages[-1]["content"].startswith("Results to combine"):
+                self.merges += 1
+                return Completion("merged")
+            return Completion("processed")
+    
+    client = MockVeniceClient()
+    config = ParallelConfig(aggregation_strategy="tree_reduce", aggregation_fan_in=2)
+    workflow = SectioningWorkflow(config, client)
+    result = await workflow.process_document("\n\n".join(f"Section {i}" for i in range(4)), ["clarity"])
+    
+    assert result == "merged"
+    assert client.merges == 3
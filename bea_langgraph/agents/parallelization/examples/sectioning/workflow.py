@@ -2,35 +2,210 @@
 Document sectioning example using parallelization pattern.
 
 This example demonstrates using parallel processing to handle document sections
-independently and then combining the results.
+independently and then combining the results, or streaming them in document
+order as they become ready. Sections are either blank-line separated blocks or
+token-budgeted chunks that follow the markdown structure. Repeated sections are
+processed once and results can be cached across runs.
 """
 
 import asyncio
-from typing import List, Dict, Any
+import hashlib
+import json
+from contextlib import aclosing
+from typing import AsyncGenerator, List, Dict, Any, Optional
 from ...models import ParallelTask, ParallelConfig, ParallelResult
 from ...workflow import ParallelWorkflow
+from ....basic_workflow.api.cache import ResponseCache
 from ....basic_workflow.api.client import VeniceClient
+from .....common.chunking import Chunk, chunk_markdown, estimate_tokens
 
 class SectioningWorkflow(ParallelWorkflow):
-    """Implementation of document sectioning workflow."""
+    """Implementation of document sectioning workflow.
     
-    async def process_document(self, document: str, section_criteria: List[str]) -> str:
-        """Process document by sections in parallel."""
+    Sections with identical content (and context) are processed once per
+    document. With a ``section_cache``, results are also stored per section
+    hash and criteria, so re-processing an edited document only sends the new
+    or changed sections. Pass a ``stats`` dictionary to a run to learn how
+    its sections were served.
+    """
+    
+    def __init__(
+        self,
+        config: ParallelConfig = None,
+        client: VeniceClient = None,
+        max_section_tokens: Optional[int] = None,
+        overlap_tokens: int = 0,
+        section_cache: Optional[ResponseCache] = None
+    ):
+        """Initialize workflow with configuration and API client.
+        
+        Args:
+            config: Parallel processing configuration
+            client: API client used to process sections
+            max_section_tokens: Token budget per section; markdown blocks are
+                packed into sections up to this size (None splits on blank lines)
+            overlap_tokens: Tokens of the previous section's closing prose
+                passed along as context when chunking by tokens
+            section_cache: Cache for section results across runs; give it a
+                path to persist them on disk (None disables caching)
+        """
+        super().__init__(config, client)
+        self.max_section_tokens = max_section_tokens
+        self.overlap_tokens = overlap_tokens
+        self.section_cache = section_cache
+    
+    async def process_document(
+        self,
+        document: str,
+        section_criteria: List[str],
+        stats: Optional[Dict[str, int]] = None
+    ) -> str:
+        """Process document by sections in parallel.
+        
+        Args:
+            document: Document to process
+            section_criteria: Criteria each section is processed against
+            stats: Dictionary to fill with the number of sections and how many
+                were cached, deduplicated and processed
+            
+        Returns:
+            Aggregated result of every section
+        """
         # Split document into sections
-        sections = self._split_into_sections(document)
-        
-        # Create tasks for each section
-        tasks = [
-            ParallelTask(
-                task_id=f"section_{i}",
-                content=f"Process this section following criteria: {', '.join(section_criteria)}\n\nSection:\n{section}"
-            )
-            for i, section in enumerate(sections)
-        ]
-        
-        # Process sections in parallel
-        result = await self.process_tasks(tasks)
-        return result.combined_result
+        sections = self._sections(document)
+        keys = [self._section_key(section, section_criteria) for section in sections]
+        results = await self._cached_results(keys)
+        
+        # Create tasks for each new section, once per distinct content
+        tasks = self._section_tasks(sections, section_criteria, self._pending_indices(keys, results))
+        if stats is not None:
+            stats.update(self._run_stats(keys, results, tasks))
+        
+        # Process sections in parallel; aggregation happens once, over every section
+        async with aclosing(self.iter_results(tasks)) as processed:
+            async for task in processed:
+                await self._store_result(keys[int(task.task_id.rsplit("_", 1)[1])], task.result, results)
+        
+        return await self._aggregate_results([
+            ParallelTask(task_id=f"section_{i}", content=section.text, result=results.get(key))
+            for i, (section, key) in enumerate(zip(sections, keys))
+        ])
+        
+    async def stream_document(
+        self,
+        document: str,
+        section_criteria: List[str],
+        max_buffered: Optional[int] = None,
+        stats: Optional[Dict[str, int]] = None
+    ) -> AsyncGenerator[str, None]:
+        """Process document by sections in parallel and stream the results in order.
+        
+        Each processed section is yielded as soon as it and every section
+        before it are done, so output can be written progressively instead of
+        waiting for the slowest section. Sections that finish early are held in
+        a reorder buffer of at most ``max_buffered`` entries. Cached and
+        repeated sections are yielded without a request.
+        
+        Args:
+            document: Document to process
+            section_criteria: Criteria each section is processed against
+            max_buffered: Bound on sections held back while an earlier one is
+                still running (None for no bound)
+            stats: Dictionary to fill with the number of sections and how many
+                were cached, deduplicated and processed
+            
+        Yields:
+            Processed sections in document order
+        """
+        sections = self._sections(document)
+        keys = [self._section_key(section, section_criteria) for section in sections]
+        results = await self._cached_results(keys)
+        tasks = self._section_tasks(sections, section_criteria, self._pending_indices(keys, results))
+        if stats is not None:
+            stats.update(self._run_stats(keys, results, tasks))
+        
+        next_index = 0
+        while next_index < len(keys) and keys[next_index] in results:
+            if results[keys[next_index]]:
+                yield results[keys[next_index]]
+            next_index += 1
+        async with aclosing(self.iter_ordered(tasks, max_buffered=max_buffered)) as processed:
+            async for task in processed:
+                await self._store_result(keys[int(task.task_id.rsplit("_", 1)[1])], task.result, results)
+                while next_index < len(keys) and keys[next_index] in results:
+                    if results[keys[next_index]]:
+                        yield results[keys[next_index]]
+                    next_index += 1
+        
+    def _section_tasks(
+        self,
+        sections: List[Chunk],
+        section_criteria: List[str],
+        indices: Optional[List[int]] = None
+    ) -> List[ParallelTask]:
+        """Create a task for each section (or for the sections at the given indices)."""
+        tasks = []
+        for i in range(len(sections)) if indices is None else indices:
+            section = sections[i]
+            content = f"Process this section following criteria: {', '.join(section_criteria)}\n\n"
+            if section.context:
+                content += f"Context from the previous section (do not process):\n{section.context}\n\n"
+            tasks.append(ParallelTask(task_id=f"section_{i}", content=content + f"Section:\n{section.text}"))
+        return tasks
+        
+    @staticmethod
+    def _section_key(section: Chunk, section_criteria: List[str]) -> str:
+        """Hash a section's content, context and criteria into a cache key."""
+        canonical = json.dumps(
+            {"section": section.text, "context": section.context, "criteria": list(section_criteria)},
+            sort_keys=True,
+            separators=(",", ":"),
+            ensure_ascii=False
+        )
+        return "section:" + hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+        
+    async def _cached_results(self, keys: List[str]) -> Dict[str, Optional[str]]:
+        """Look up the distinct section keys in the cache."""
+        if self.section_cache is None:
+            return {}
+        distinct = list(dict.fromkeys(keys))
+        values = await asyncio.gather(*[self.section_cache.get(key) for key in distinct])
+        return {key: value for key, value in zip(distinct, values) if value is not None}
+        
+    @staticmethod
+    def _pending_indices(keys: List[str], results: Dict[str, Optional[str]]) -> List[int]:
+        """Get the first index of every distinct section that is not cached."""
+        first: Dict[str, int] = {}
+        for i, key in enumerate(keys):
+            if key not in results and key not in first:
+                first[key] = i
+        return list(first.values())
+        
+    async def _store_result(self, key: str, result: Optional[str], results: Dict[str, Optional[str]]) -> None:
+        """Record a processed section and cache it if it succeeded."""
+        results[key] = result
+        if self.section_cache is not None and result and not result.startswith("Error:"):
+            await self.section_cache.set(key, result)
+            
+    @staticmethod
+    def _run_stats(keys: List[str], results: Dict[str, Optional[str]], tasks: List[ParallelTask]) -> Dict[str, int]:
+        """Count how each section of a run is served."""
+        cached = sum(1 for key in keys if key in results)
+        return {
+            "sections": len(keys),
+            "cached": cached,
+            "deduplicated": len(keys) - cached - len(tasks),
+            "processed": len(tasks)
+        }
+        
+    def _sections(self, document: str) -> List[Chunk]:
+        """Split document into sections using the configured strategy."""
+        if self.max_section_tokens is None:
+            return [
+                Chunk(section, estimate_tokens(section))
+                for section in self._split_into_sections(document)
+            ]
+        return chunk_markdown(document, self.max_section_tokens, self.overlap_tokens)
         
     def _split_into_sections(self, document: str) -> List[str]:
         """Split document into processable sections."""
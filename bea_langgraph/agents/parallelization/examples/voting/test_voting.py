@@ -31,3 +31,187 @@ async def test_voting_error_handling():
     
     assert result
     assert "No consensus" in result
+
+@pytest.mark.asyncio
+async def test_voting_uses_one_multi_sample_request():
+    """Test that all votes are sampled from a single request."""
+    from ....basic_workflow.api.client import Completion
+    
+    class MockVeniceClient:
+        def __init__(self):
+            self.calls = []
+        
+        async def complete_n(self, messages, n, **kwargs):
+            self.calls.append(n)
+            return [Completion("A"), Completion("B"), Completion("A")][:n]
+    
+    client = MockVeniceClient()
+    workflow = VotingWorkflow(ParallelConfig(), client)
+    result = await workflow.get_consensus("Pick A or B", num_voters=3)
+    
+    assert client.calls == [3]
+    assert result.startswith("Consensus: A")
+
+@pytest.mark.asyncio
+async def test_failed_votes_are_not_received():
+    """Test that only valid votes count as received."""
+    from ....basic_workflow.api.client import Completion
+    
+    class PartialVoteClient:
+        async def complete_n(self, messages, n, **kwargs):
+            return [Completion("A"), Completion("Error: timed out"), Completion("")]
+    
+    result = await VotingWorkflow(ParallelConfig(), PartialVoteClient()).vote("Pick A or B", num_voters=3)
+    
+    assert result.votes_received == 1
+    assert result.total_voters == 3
+    
+    class FailingClient:
+        async def complete_n(self, messages, n, **kwargs):
+            raise Exception("provider down")
+    
+    result = await VotingWorkflow(ParallelConfig(), FailingClient()).vote("Pick A or B", num_voters=3)
+    assert result.votes_received == 0
+    assert result.consensus is None
+
+class DelayedVoteClient:
+    """Mock client returning scripted votes after per-call delays."""
+    
+    def __init__(self, answers, delays):
+        self.answers = list(answers)
+        self.delays = list(delays)
+        self.started = 0
+        self.finished = 0
+    
+    async def complete(self, messages, **kwargs):
+        import asyncio
+        from ....basic_workflow.api.client import Completion
+        i = self.started
+        self.started += 1
+        await asyncio.sleep(self.delays[i])
+        self.finished += 1
+        return Completion(self.answers[i])
+
+@pytest.mark.asyncio
+async def test_adaptive_voting_stops_once_decided():
+    """Test that remaining voters are cancelled once the leader cannot be overturned."""
+    client = DelayedVoteClient(["A", "A", "A", "B", "B"], [0.01, 0.02, 0.03, 5, 5])
+    workflow = VotingWorkflow(ParallelConfig(max_concurrent_tasks=5), client)
+    
+    result = await workflow.vote("Pick A or B", num_voters=5, adaptive=True)
+    
+    assert result.consensus == "A"
+    assert result.votes == {"A": 3}
+    assert result.early_stopped
+    assert result.votes_received == 3
+    assert result.calls_saved == 2
+    assert result.metadata["cancelled_in_flight"] == 2
+    assert client.finished == 3
+
+@pytest.mark.asyncio
+async def test_adaptive_voting_saves_unstarted_calls():
+    """Test that voters waiting for a slot are never sent."""
+    client = DelayedVoteClient(["A"] * 7, [0.01] * 7)
+    workflow = VotingWorkflow(ParallelConfig(max_concurrent_tasks=1), client)
+    
+    result = await workflow.vote("Pick A or B", num_voters=7, adaptive=True)
+    
+    assert result.votes == {"A": 4}
+    assert result.calls_saved == 3
+    assert client.finished == 4
+
+@pytest.mark.asyncio
+async def test_adaptive_voting_confidence_bound():
+    """Test that a confidence bound stops before the majority is mathematically safe."""
+    client = DelayedVoteClient(["A"] * 9, [0.01 * (i + 1) for i in range(9)])
+    workflow = VotingWorkflow(ParallelConfig(max_concurrent_tasks=9), client)
+    
+    result = await workflow.vote("Pick A or B", num_voters=9, adaptive=True, confidence=0.9)
+    
+    assert result.early_stopped
+    assert result.votes_received < 5
+    assert result.consensus == "A"
+
+@pytest.mark.asyncio
+async def test_adaptive_voting_with_custom_subclass():
+    """Test that subclasses overriding task processing and vote keys are supported."""
+    class ShoutingVotes(VotingWorkflow):
+        async def _process_task(self, task):
+            return {"voter_0": "yes", "voter_1": "Yes", "voter_2": "no"}[task.task_id]
+        
+        def _vote_key(self, task):
+            return task.result.upper() if task.result else None
+    
+    workflow = ShoutingVotes(ParallelConfig(), client=None)
+    result = await workflow.vote("Any", num_voters=3, adaptive=True)
+    
+    assert result.consensus == "YES"
+    assert result.votes == {"YES": 2}
+    assert result.calls_saved == 1
+
+@pytest.mark.asyncio
+async def test_paraphrased_votes_are_clustered():
+    """Test that near-identical free-text answers count as one vote."""
+    from ....basic_workflow.api.client import Completion
+    
+    class MockVeniceClient:
+        async def complete_n(self, messages, n, **kwargs):
+            return [
+                Completion("Final answer: Paris."),
+                Completion("paris"),
+                Completion("London"),
+                Completion("The answer is: PARIS")
+            ]
+    
+    workflow = VotingWorkflow(ParallelConfig(), MockVeniceClient(), similarity_threshold=0.6)
+    result = await workflow.vote("Capital of France?", num_voters=4)
+    
+    assert result.consensus == "Paris."
+    assert result.votes == {"Paris.": 3, "London": 1}
+    assert [cluster.size for cluster in result.clusters] == [3, 1]
+    assert result.clusters[0].answers == ["Paris."]
+    
+    exact = VotingWorkflow(ParallelConfig(), MockVeniceClient())
+    assert (await exact.vote("Capital of France?", num_voters=4)).votes["London"] == 1
+    assert len((await exact.vote("Capital of France?", num_voters=4)).clusters) == 4
+
+@pytest.mark.asyncio
+async def test_adaptive_voting_counts_only_valid_votes():
+    """Test that empty results finish a call without counting as a received vote."""
+    client = DelayedVoteClient(["A", "", "A", "A", "B"], [0.01, 0.02, 0.03, 0.04, 5])
+    workflow = VotingWorkflow(ParallelConfig(max_concurrent_tasks=5), client)
+    
+    result = await workflow.vote("Pick A or B", num_voters=5, adaptive=True)
+    
+    assert result.votes == {"A": 3}
+    assert result.votes_received == 3
+    assert result.calls_saved == 1
+
+@pytest.mark.asyncio
+async def test_failed_samples_lose_only_their_vote():
+    """Test that samples returned as errors do not discard the other votes."""
+    from ....basic_workflow.api.client import Completion
+    
+    class PartialFailureClient:
+        async def complete_n(self, messages, n, return_exceptions=False, **kwargs):
+            assert return_exceptions
+            return [Completion("A"), Exception("fallback failed"), Completion("A")]
+    
+    workflow = VotingWorkflow(ParallelConfig(), PartialFailureClient())
+    result = await workflow.vote("Pick A or B", num_voters=3)
+    
+    assert result.votes == {"A": 2}
+    assert result.votes_received == 2
+
+@pytest.mark.asyncio
+async def test_custom_task_processing_is_used_without_adaptive():
+    """Test that subclasses overriding task processing skip the multi-sample request."""
+    class FixedVotes(VotingWorkflow):
+        async def _process_task(self, task):
+            return {"voter_0": "yes", "voter_1": "yes", "voter_2": "no"}[task.task_id]
+    
+    workflow = FixedVotes(ParallelConfig(), client=None)
+    result = await workflow.vote("Any", num_voters=3)
+    
+    assert result.consensus == "yes"
+    assert result.votes_received == 3
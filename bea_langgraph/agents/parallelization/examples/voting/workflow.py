@@ -2,48 +2,267 @@
 Multi-agent voting example using parallelization pattern.
 
 This example demonstrates using parallel processing to get multiple agent opinions
-and aggregate them through voting.
+and aggregate them through voting. Free-text answers can optionally be
+normalized and near-duplicates clustered before counting. In adaptive mode votes are tallied
+as they arrive and the remaining voters are cancelled once the outcome is
+decided.
 """
 
 import asyncio
-from typing import List, Dict, Any
-from ...models import ParallelTask, ParallelConfig, ParallelResult
+import math
+from contextlib import aclosing
+from statistics import NormalDist
+from typing import List, Dict, Any, Optional, Tuple
+from ...models import ParallelTask, ParallelConfig, ParallelResult, ConsensusResult, VoteCluster
 from ...workflow import ParallelWorkflow
 from ....basic_workflow.api.client import VeniceClient
+from .....common.clustering import AnswerClusterer
 
 class VotingWorkflow(ParallelWorkflow):
     """Implementation of multi-agent voting workflow."""
     
-    async def get_consensus(self, question: str, num_voters: int = 3) -> str:
-        """Get consensus through parallel agent voting."""
-        # Create voting tasks
+    independent_samples = True
+    
+    def __init__(
+        self,
+        config: ParallelConfig = None,
+        client: VeniceClient = None,
+        similarity_threshold: Optional[float] = None
+    ):
+        """Initialize workflow with configuration and API client.
+        
+        Args:
+            config: Parallel processing configuration
+            client: API client used by the voters
+            similarity_threshold: Estimated Jaccard similarity at which
+                canonicalized answers count as the same vote (e.g. 0.6);
+                None, the default, counts only exactly equal answers
+        """
+        super().__init__(config, client)
+        self.similarity_threshold = similarity_threshold
+    
+    async def get_consensus(
+        self,
+        question: str,
+        num_voters: int = 3,
+        adaptive: bool = False,
+        confidence: Optional[float] = None
+    ) -> str:
+        """Get consensus through parallel agent voting.
+        
+        All votes are sampled from a single request with the ``n`` parameter,
+        so the prompt is uploaded once however many voters there are, unless a
+        subclass overrides how tasks are processed. With ``adaptive`` the
+        voters run as separate requests and voting stops as soon as the leader
+        is decided; see ``vote``.
+        """
+        result = await self.vote(question, num_voters, adaptive=adaptive, confidence=confidence)
+        if result.consensus is None:
+            return "No consensus reached - no valid votes"
+        return f"Consensus: {result.consensus} (Votes: {result.votes})"
+        
+    async def vote(
+        self,
+        question: str,
+        num_voters: int = 3,
+        adaptive: bool = False,
+        confidence: Optional[float] = None
+    ) -> ConsensusResult:
+        """Collect votes and determine the consensus.
+        
+        Args:
+            question: Question put to every voter
+            num_voters: Maximum number of voters
+            adaptive: Run voters as separate tasks, tally votes as they
+                complete and cancel the rest once the leader is decided
+            confidence: In adaptive mode, also stop once the leader's share of
+                the two leading answers is above one half with this confidence
+                (e.g. 0.95); None stops only when the leader cannot be overturned
+                
+        Returns:
+            ConsensusResult with the vote counts and the number of calls saved
+        """
+        if confidence is not None and not 0.5 < confidence < 1.0:
+            raise ValueError("confidence must be between 0.5 and 1")
+        prompt = f"As an independent agent, evaluate this question and provide your answer:\n\n{question}"
         tasks = [
-            ParallelTask(
-                task_id=f"voter_{i}",
-                content=f"As an independent agent, evaluate this question and provide your answer:\n\n{question}"
-            )
+            ParallelTask(task_id=f"voter_{i}", content=prompt)
             for i in range(num_voters)
         ]
         
-        # Get votes in parallel
-        result = await self.process_tasks(tasks)
+        if not adaptive:
+            if self._customizes_processing():
+                # Custom task processing only runs on the per-task path
+                await self.process_tasks(tasks)
+            else:
+                await self._collect_votes(prompt, tasks)
+            votes, clusters = self._tally(tasks)
+            return ConsensusResult(
+                consensus=self._leader(votes),
+                votes=votes,
+                clusters=clusters,
+                total_voters=num_voters,
+                votes_received=sum(1 for task in tasks if self._vote_key(task) is not None)
+            )
+        
+        # Tally votes as they complete and stop once the outcome is settled
+        clusterer = self._new_clusterer()
+        votes: Dict[str, int] = {}
+        finished = received = 0
+        early_stopped = False
+        async with aclosing(self.iter_results(tasks)) as results:
+            async for task in results:
+                finished += 1
+                key = self._vote_key(task)
+                if key is not None:
+                    received += 1
+                    if clusterer is None:
+                        votes[key] = votes.get(key, 0) + 1
+                    else:
+                        clusterer.add(key)
+                        votes = clusterer.counts()
+                if finished < num_voters and self._is_decided(
+                    votes, num_voters - finished, confidence, mergeable=clusterer is not None
+                ):
+                    early_stopped = True
+                    break
+        
+        cancelled = sum(1 for task in tasks if task.metadata.get("started") and task.result is None)
+        return ConsensusResult(
+            consensus=self._leader(votes),
+            votes=votes,
+            clusters=self._clusters(clusterer, votes),
+            total_voters=num_voters,
+            votes_received=received,
+            calls_saved=num_voters - finished,
+            early_stopped=early_stopped,
+            metadata={"cancelled_in_flight": cancelled}
+        )
+        
+    async def _collect_votes(self, prompt: str, tasks: List[ParallelTask]) -> None:
+        """Get every vote in one multi-sample request.
+        
+        A sample that fails only loses its own vote; its task gets an error
+        result like a failed task of the worker pool.
+        """
+        try:
+            async with asyncio.timeout(self.config.timeout_per_task):
+                completions = await self.client.complete_n(
+                    self._task_messages(prompt), len(tasks), return_exceptions=True
+                )
+        except asyncio.TimeoutError:
+            print("Error collecting votes: timed out")
+            return
+        except Exception as e:
+            print(f"Error collecting votes: {str(e)}")
+            return
+        for task, completion in zip(tasks, completions):
+            self._record_result(task, completion if isinstance(completion, Exception) else completion.text)
         
-        # Determine consensus
-        consensus = await self._determine_consensus(result.tasks)
-        return consensus
+    def _customizes_processing(self) -> bool:
+        """Check whether a subclass overrides how tasks are processed."""
+        cls = type(self)
+        return (
+            cls._process_task is not ParallelWorkflow._process_task
+            or cls.process_tasks is not ParallelWorkflow.process_tasks
+        )
+        
+    def _vote_key(self, task: ParallelTask) -> Optional[str]:
+        """Map a voter's result to the answer it votes for.
+        
+        Returns None for tasks that did not produce a valid vote. Subclasses
+        override this to normalize answers before they are counted.
+        """
+        if not task.result or task.result.startswith("Error:"):
+            return None
+        return task.result
+        
+    def _new_clusterer(self) -> Optional[AnswerClusterer]:
+        """Create the clusterer for one vote, or None for exact matching."""
+        if self.similarity_threshold is None:
+            return None
+        return AnswerClusterer(threshold=self.similarity_threshold)
+        
+    def _tally(self, tasks: List[ParallelTask]) -> Tuple[Dict[str, int], List[VoteCluster]]:
+        """Count the valid votes for each answer (or cluster of answers)."""
+        clusterer = self._new_clusterer()
+        vote_counts: Dict[str, int] = {}
+        for task in tasks:
+            key = self._vote_key(task)
+            if key is None:
+                continue
+            if clusterer is None:
+                vote_counts[key] = vote_counts.get(key, 0) + 1
+            else:
+                clusterer.add(key)
+        if clusterer is not None:
+            vote_counts = clusterer.counts()
+        return vote_counts, self._clusters(clusterer, vote_counts)
+        
+    @staticmethod
+    def _clusters(clusterer: Optional[AnswerClusterer], votes: Dict[str, int]) -> List[VoteCluster]:
+        """Describe the vote clusters, largest first."""
+        if clusterer is None:
+            return [
+                VoteCluster(representative=answer, size=count, answers=[answer])
+                for answer, count in sorted(votes.items(), key=lambda x: -x[1])
+            ]
+        return [VoteCluster(**cluster._asdict()) for cluster in clusterer.clusters()]
+        
+    @staticmethod
+    def _leader(votes: Dict[str, int]) -> Optional[str]:
+        """Get the answer with the most votes (the earliest one on ties)."""
+        if not votes:
+            return None
+        return max(votes.items(), key=lambda x: x[1])[0]
+        
+    @staticmethod
+    def _is_decided(
+        votes: Dict[str, int],
+        remaining: int,
+        confidence: Optional[float] = None,
+        mergeable: bool = False
+    ) -> bool:
+        """Check whether the outstanding votes can still change the outcome.
+        
+        Args:
+            votes: Votes counted so far
+            remaining: Voters that have not reported yet
+            confidence: Optional confidence bound for stopping before the
+                leader is mathematically safe
+            mergeable: Whether later votes may merge existing clusters, in
+                which case every other vote counts against the leader
+                
+        Returns:
+            True if voting can stop
+        """
+        counts = sorted(votes.values(), reverse=True)
+        if not counts:
+            return False
+        leader = counts[0]
+        runner_up = counts[1] if len(counts) > 1 else 0
+        challenger = sum(counts[1:]) if mergeable else runner_up
+        # Even if every remaining vote went to the challenger, it could not tie
+        if leader > challenger + remaining:
+            return True
+        if confidence is None:
+            return False
+        
+        # Wilson score lower bound of the leader's share against the runner-up
+        n = leader + runner_up
+        p = leader / n
+        z = NormalDist().inv_cdf(confidence)
+        centre = p + z * z / (2 * n)
+        spread = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n))
+        return (centre - spread) / (1 + z * z / n) > 0.5
         
     async def _determine_consensus(self, tasks: List[ParallelTask]) -> str:
         """Determine consensus from multiple votes."""
         # Simple majority voting, could be more sophisticated
-        votes = [task.result for task in tasks if task.result]
-        if not votes:
+        vote_counts, _ = self._tally(tasks)
+        if not vote_counts:
             return "No consensus reached - no valid votes"
             
-        # Count occurrences of each vote
-        vote_counts = {}
-        for vote in votes:
-            vote_counts[vote] = vote_counts.get(vote, 0) + 1
-            
         # Find majority
-        majority_vote = max(vote_counts.items(), key=lambda x: x[1])[0]
+        majority_vote = self._leader(vote_counts)
         return f"Consensus: {majority_vote} (Votes: {vote_counts})"
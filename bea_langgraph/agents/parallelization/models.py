@@ -33,7 +33,38 @@ class ParallelConfig(BaseModel):
     """Configuration for parallel processing workflow."""
     max_concurrent_tasks: int = Field(default=5, ge=1)
     timeout_per_task: float = Field(default=30.0, ge=0.0)
+    deadline: Optional[float] = Field(default=None, gt=0.0)
+    fail_fast: bool = Field(default=False)
+    # "concatenate", or "tree_reduce" to synthesize results with merge prompts
     aggregation_strategy: str = Field(default="concatenate")
+    # Tree reduce: results merged per call and their token budget (None for no limit)
+    aggregation_fan_in: Optional[int] = Field(default=8, ge=2)
+    aggregation_max_tokens: Optional[int] = Field(default=None, ge=1)
+    
+    class Config:
+        validate_assignment = True
+        arbitrary_types_allowed = True
+
+class VoteCluster(BaseModel):
+    """Model for a group of votes counted as the same answer."""
+    representative: str
+    size: int
+    answers: List[str] = Field(default_factory=list)
+    
+    class Config:
+        validate_assignment = True
+        arbitrary_types_allowed = True
+
+class ConsensusResult(BaseModel):
+    """Model for the outcome of a vote among parallel agents."""
+    consensus: Optional[str] = None
+    votes: Dict[str, int] = Field(default_factory=dict)
+    clusters: List[VoteCluster] = Field(default_factory=list)
+    total_voters: int = 0
+    votes_received: int = 0
+    calls_saved: int = 0
+    early_stopped: bool = False
+    metadata: Dict[str, Any] = Field(default_factory=dict)
     
     class Config:
         validate_assignment = True
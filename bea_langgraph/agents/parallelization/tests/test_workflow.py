@@ -53,3 +53,192 @@ async def test_concurrent_limit():
     result = await workflow.process_tasks(tasks)
     assert len(result.tasks) == 3
     assert all(task.result for task in result.tasks)
+
+@pytest.mark.asyncio
+async def test_open_circuit_fails_tasks_fast():
+    """Test that tasks fail individually and immediately while the circuit is open."""
+    import time
+    from ...basic_workflow.api.breaker import CircuitBreaker, ERROR
+    
+    breaker = CircuitBreaker(min_requests=2, open_duration=60)
+    for _ in range(2):
+        breaker.check()
+        breaker.record(ERROR)
+    client = VeniceClient(api_key="test_key", breaker=breaker)
+    workflow = ParallelWorkflow(ParallelConfig(), client)
+    
+    start = time.monotonic()
+    result = await workflow.process_tasks([
+        {"task_id": str(i), "content": f"Task {i} content"} for i in range(3)
+    ])
+    
+    assert time.monotonic() - start < 1
+    assert all(task.metadata.get("fast_failed") for task in result.tasks)
+    assert all(task.result.startswith("Error: Circuit open") for task in result.tasks)
+    assert result.metadata["fast_failed"] == 3
+    assert breaker.stats["rejected"] == 3
+
+@pytest.mark.asyncio
+async def test_iter_results_yields_in_completion_order():
+    """Test that results stream as tasks finish and closing cancels the rest."""
+    import asyncio
+    from contextlib import aclosing
+    
+    class SleepyWorkflow(ParallelWorkflow):
+        cancelled = 0
+        
+        async def _process_task(self, task):
+            try:
+                await asyncio.sleep(float(task.content))
+            except asyncio.CancelledError:
+                SleepyWorkflow.cancelled += 1
+                raise
+            return task.content
+    
+    workflow = SleepyWorkflow(ParallelConfig(max_concurrent_tasks=3))
+    tasks = [{"task_id": str(i), "content": delay} for i, delay in enumerate(["0.05", "0.01", "5"])]
+    seen = []
+    async with aclosing(workflow.iter_results(tasks)) as results:
+        async for task in results:
+            seen.append(task.task_id)
+            if len(seen) == 2:
+                break
+    
+    assert seen == ["1", "0"]
+    assert SleepyWorkflow.cancelled == 1
+
+class TimedWorkflow(ParallelWorkflow):
+    """Workflow whose tasks sleep for the number of seconds in their content."""
+    
+    def __init__(self, config):
+        super().__init__(config)
+        self.active = 0
+        self.peak = 0
+    
+    async def _process_task(self, task):
+        import asyncio
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            if task.content == "fail":
+                raise Exception("boom")
+            await asyncio.sleep(float(task.content))
+            return f"done {task.task_id}"
+        finally:
+            self.active -= 1
+
+@pytest.mark.asyncio
+async def test_pool_bounds_concurrency_and_keeps_order():
+    """Test that at most max_concurrent_tasks run and results keep input order."""
+    workflow = TimedWorkflow(ParallelConfig(max_concurrent_tasks=2))
+    result = await workflow.process_tasks([
+        {"task_id": str(i), "content": delay} for i, delay in enumerate(["0.03", "0.01", "0.02", "0.01"])
+    ])
+    
+    assert workflow.peak == 2
+    assert [task.task_id for task in result.tasks] == ["0", "1", "2", "3"]
+    assert result.metadata["completed"] == 4
+    assert result.metadata["throughput"] > 0
+    assert result.metadata["latency_max"] >= result.metadata["latency_p50"] > 0
+
+@pytest.mark.asyncio
+async def test_pool_applies_per_task_timeout():
+    """Test that overridden task processing is still bounded by the timeout."""
+    workflow = TimedWorkflow(ParallelConfig(timeout_per_task=0.05))
+    result = await workflow.process_tasks([
+        {"task_id": "slow", "content": "5"},
+        {"task_id": "fast", "content": "0"}
+    ])
+    
+    assert result.tasks[0].result == "Error: Task slow timed out"
+    assert result.tasks[1].result == "done fast"
+    assert result.metadata["failed"] == 1
+
+@pytest.mark.asyncio
+async def test_pool_deadline_cancels_remaining_tasks():
+    """Test that the batch deadline yields unfinished tasks as cancelled."""
+    workflow = TimedWorkflow(ParallelConfig(max_concurrent_tasks=1, deadline=0.1))
+    metrics = {}
+    seen = []
+    async for task in workflow.iter_results(
+        [{"task_id": str(i), "content": "0.04"} for i in range(5)], metrics=metrics
+    ):
+        seen.append((task.task_id, task.metadata.get("cancelled", False)))
+    
+    assert len(seen) == 5
+    assert seen[0] == ("0", False)
+    assert seen[-1] == ("4", True)
+    assert metrics["deadline_exceeded"]
+    assert metrics["completed"] + metrics["cancelled"] == 5
+    assert workflow.active == 0
+
+@pytest.mark.asyncio
+async def test_pool_fail_fast_cancels_and_raises():
+    """Test that a fatal error stops the batch."""
+    workflow = TimedWorkflow(ParallelConfig(max_concurrent_tasks=2, fail_fast=True))
+    tasks = [
+        ParallelTask(task_id="bad", content="fail"),
+        ParallelTask(task_id="slow", content="5"),
+        ParallelTask(task_id="next", content="5"),
+        ParallelTask(task_id="queued", content="5")
+    ]
+    with pytest.raises(Exception, match="boom"):
+        await workflow.process_tasks(tasks)
+    
+    assert tasks[1].metadata["cancelled"]
+    assert "started" not in tasks[3].metadata
+    assert workflow.active == 0
+
+@pytest.mark.asyncio
+async def test_iter_ordered_bounds_reorder_buffer():
+    """Test in-order output with a bounded number of out-of-order completions."""
+    class TrackingWorkflow(TimedWorkflow):
+        started = []
+        started_before_first_finished = None
+        
+        async def _process_task(self, task):
+            self.started.append(task.task_id)
+            result = await super()._process_task(task)
+            if task.task_id == "0":
+                self.started_before_first_finished = list(self.started)
+            return result
+    
+    workflow = TrackingWorkflow(ParallelConfig(max_concurrent_tasks=4))
+    delays = ["0.1", "0", "0", "0", "0", "0", "0"]
+    emitted = []
+    async for task in workflow.iter_ordered(
+        [{"task_id": str(i), "content": d} for i, d in enumerate(delays)], max_buffered=3
+    ):
+        emitted.append(task.task_id)
+    
+    assert emitted == [str(i) for i in range(7)]
+    # While the first section ran, only two later ones could complete ahead of it
+    assert workflow.started_before_first_finished == ["0", "1", "2"]
+
+@pytest.mark.asyncio
+async def test_tree_reduce_aggregation():
+    """Test that results are merged in token-bounded batches before the final merge."""
+    class MergingWorkflow(ParallelWorkflow):
+        async def _process_task(self, task):
+            return task.content.upper()
+    
+    class MergeClient:
+        def __init__(self):
+            self.prompts = []
+        
+        async def complete(self, messages, **kwargs):
+            from ...basic_workflow.api.client import Completion
+            self.prompts.append(messages)
+            final = "final result" in messages[0]["content"]
+            return Completion("FINAL" if final else "partial")
+    
+    client = MergeClient()
+    config = ParallelConfig(aggregation_strategy="tree_reduce", aggregation_fan_in=3)
+    workflow = MergingWorkflow(config, client)
+    result = await workflow.process_tasks([{"task_id": str(i), "content": f"r{i}"} for i in range(7)])
+    
+    assert result.combined_result == "FINAL"
+    # Two partial merges (the seventh result is passed up) and one final merge
+    assert len(client.prompts) == 3
+    assert "R0\n\nR1\n\nR2" in client.prompts[0][1]["content"]
+    assert "partial\n\npartial\n\nR6" in client.prompts[-1][1]["content"]
@@ -6,79 +6,319 @@ providing functionality for parallel task processing and result aggregation.
 """
 
 import asyncio
-from typing import List, Dict, Any, Optional
+import math
+import time
+from contextlib import aclosing
+from typing import AsyncGenerator, List, Dict, Any, Optional, Union
 from .models import ParallelTask, ParallelResult, ParallelConfig
-from ..basic_workflow.api.client import VeniceClient
+from ..basic_workflow.api.breaker import CircuitOpenError
+from ..basic_workflow.api.client import VeniceClient, complete_with
+from ...common.reduce import tree_reduce
 
 class ParallelWorkflow:
     """Implementation of parallel processing workflow."""
     
+    # Subclasses that need independent samples for identical prompts (e.g.
+    # voting) opt out of the client's single-flight request coalescing.
+    independent_samples: bool = False
+    
     def __init__(self, config: ParallelConfig = None, client: VeniceClient = None):
         """Initialize workflow with configuration and API client."""
         self.config = config or ParallelConfig()
         self.client = client
         
     async def process_tasks(self, tasks: List[Dict[str, Any]]) -> ParallelResult:
-        """Process multiple tasks in parallel."""
+        """Process multiple tasks in parallel.
+        
+        Collects everything ``iter_results`` yields and aggregates it. Tasks
+        are returned in input order and the run's metrics are stored in the
+        result's metadata.
+        """
         try:
             # Convert dict tasks to ParallelTask objects
-            parallel_tasks = [ParallelTask(**task) for task in tasks]
+            parallel_tasks = [
+                task if isinstance(task, ParallelTask) else ParallelTask(**task)
+                for task in tasks
+            ]
             
-            # Process tasks concurrently with semaphore for control
-            sem = asyncio.Semaphore(self.config.max_concurrent_tasks)
-            async with sem:
-                results = await asyncio.gather(
-                    *[self._process_task(task) for task in parallel_tasks],
-                    return_exceptions=True
-                )
-            
-            # Handle results and exceptions
-            processed_tasks = []
-            for task, result in zip(parallel_tasks, results):
-                if isinstance(result, Exception):
-                    print(f"Error processing task {task.task_id}: {str(result)}")
-                    task.result = f"Error: {str(result)}"
-                else:
-                    task.result = result
-                processed_tasks.append(task)
+            metrics: Dict[str, Any] = {}
+            async with aclosing(self.iter_results(parallel_tasks, metrics=metrics)) as results:
+                async for _ in results:
+                    pass
             
             # Aggregate results
-            combined_result = await self._aggregate_results(processed_tasks)
+            combined_result = await self._aggregate_results(parallel_tasks)
             return ParallelResult(
-                tasks=processed_tasks,
-                combined_result=combined_result
+                tasks=parallel_tasks,
+                combined_result=combined_result,
+                metadata=metrics
             )
             
         except Exception as e:
             print(f"Error in parallel processing: {str(e)}")
             raise
             
-    async def _process_task(self, task: ParallelTask) -> str:
-        """Process a single task with timeout."""
+    async def iter_results(
+        self,
+        tasks: List[Union[ParallelTask, Dict[str, Any]]],
+        deadline: Optional[float] = None,
+        metrics: Optional[Dict[str, Any]] = None,
+        max_ahead: Optional[int] = None
+    ) -> AsyncGenerator[ParallelTask, None]:
+        """Process tasks with a bounded worker pool and yield each one as it finishes.
+        
+        ``max_concurrent_tasks`` workers pull tasks one at a time, so no more
+        than that many run at once, and each task gets its own
+        ``timeout_per_task``. Failed tasks are yielded with an ``"Error: ..."``
+        result. When the deadline passes, the tasks still running or waiting
+        are cancelled and yielded with a deadline error. When a task fails with
+        an error ``_is_fatal`` accepts, the rest are cancelled and the error is
+        raised. Closing the generator early also cancels the remaining tasks.
+        
+        Args:
+            tasks: Tasks as ParallelTask objects or dicts
+            deadline: Seconds allowed for the whole batch (defaults to
+                ``config.deadline``; None for no deadline)
+            metrics: Optional dict filled with throughput and latency metrics
+                once the generator finishes
+            max_ahead: Optional bound on how far past the oldest unfinished
+                task a task may start, which bounds the completed tasks an
+                in-order consumer has to hold back
+            
+        Yields:
+            Each task with its result (or error) recorded, in completion order
+        """
+        if max_ahead is not None and max_ahead < 1:
+            raise ValueError("max_ahead must be at least 1")
+        parallel_tasks = [
+            task if isinstance(task, ParallelTask) else ParallelTask(**task)
+            for task in tasks
+        ]
+        if deadline is None:
+            deadline = self.config.deadline
+        start = time.monotonic()
+        deadline_at = start + deadline if deadline is not None else None
+        
+        pending = iter(range(len(parallel_tasks)))
+        finished: asyncio.Queue = asyncio.Queue()
+        completed = set()
+        oldest = 0
+        window = asyncio.Condition()
+        
+        async def worker() -> None:
+            nonlocal oldest
+            for i in pending:
+                if max_ahead is not None:
+                    async with window:
+                        await window.wait_for(lambda: i < oldest + max_ahead)
+                task = parallel_tasks[i]
+                began = time.monotonic()
+                task.metadata["started"] = True
+                task.metadata["queue_wait"] = began - start
+                try:
+                    async with asyncio.timeout(self.config.timeout_per_task):
+                        result = await self._process_task(task)
+                except TimeoutError:
+                    result = Exception(f"Task {task.task_id} timed out")
+                except Exception as e:
+                    result = e
+                task.metadata["latency"] = time.monotonic() - began
+                finished.put_nowait((i, result))
+                if max_ahead is not None:
+                    async with window:
+                        completed.add(i)
+                        while oldest in completed:
+                            oldest += 1
+                        window.notify_all()
+        
+        workers = [
+            asyncio.create_task(worker())
+            for _ in range(min(self.config.max_concurrent_tasks, len(parallel_tasks)))
+        ]
+        done = set()
+        deadline_exceeded = False
         try:
-            async with asyncio.timeout(self.config.timeout_per_task):
-                messages = [
-                    {"role": "system", "content": "Process this task efficiently and accurately."},
-                    {"role": "user", "content": task.content}
-                ]
+            while len(done) < len(parallel_tasks):
+                try:
+                    i, result = finished.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = None if deadline_at is None else max(0.0, deadline_at - time.monotonic())
+                    try:
+                        i, result = await asyncio.wait_for(finished.get(), timeout)
+                    except asyncio.TimeoutError:
+                        deadline_exceeded = True
+                        break
+                done.add(i)
+                task = parallel_tasks[i]
+                self._record_result(task, result)
+                if isinstance(result, Exception) and self._is_fatal(result):
+                    raise result
+                yield task
                 
-                result_buffer = []
-                async for chunk in self.client.stream_completion(messages):
-                    if chunk.startswith("<think>"):
-                        print(f"\nThinking: {chunk[7:-8]}")  # Strip <think> tags
-                        continue
-                    result_buffer.append(chunk)
-                    
-                return "".join(result_buffer)
+            if deadline_exceeded:
+                await self._stop_workers(workers)
+                for i, task in enumerate(parallel_tasks):
+                    if i not in done:
+                        done.add(i)
+                        task.metadata["cancelled"] = True
+                        self._record_result(task, Exception(f"Task {task.task_id} cancelled: deadline exceeded"))
+                        yield task
+        finally:
+            await self._stop_workers(workers)
+            for i, task in enumerate(parallel_tasks):
+                if i not in done and task.metadata.get("started"):
+                    task.metadata["cancelled"] = True
+            if metrics is not None:
+                metrics.update(self._pool_metrics(parallel_tasks, time.monotonic() - start))
+                metrics["deadline_exceeded"] = deadline_exceeded
                 
-        except asyncio.TimeoutError:
-            raise Exception(f"Task {task.task_id} timed out")
+    async def iter_ordered(
+        self,
+        tasks: List[Union[ParallelTask, Dict[str, Any]]],
+        max_buffered: Optional[int] = None,
+        deadline: Optional[float] = None
+    ) -> AsyncGenerator[ParallelTask, None]:
+        """Process tasks in parallel and yield them in input order.
+        
+        A reorder buffer holds tasks that finish ahead of an earlier one; each
+        contiguous prefix is yielded as soon as it is complete. With
+        ``max_buffered`` no task starts more than that many positions past the
+        oldest unfinished one, so the buffer never holds more than
+        ``max_buffered`` tasks however uneven the task durations are.
+        
+        Args:
+            tasks: Tasks as ParallelTask objects or dicts
+            max_buffered: Bound on out-of-order tasks held back (None for no bound)
+            deadline: Seconds allowed for the whole batch (see ``iter_results``)
+            
+        Yields:
+            Each task with its result (or error) recorded, in input order
+        """
+        parallel_tasks = [
+            task if isinstance(task, ParallelTask) else ParallelTask(**task)
+            for task in tasks
+        ]
+        positions = {id(task): i for i, task in enumerate(parallel_tasks)}
+        buffer: Dict[int, ParallelTask] = {}
+        next_index = 0
+        results = self.iter_results(parallel_tasks, deadline=deadline, max_ahead=max_buffered)
+        async with aclosing(results):
+            async for task in results:
+                buffer[positions[id(task)]] = task
+                while next_index in buffer:
+                    yield buffer.pop(next_index)
+                    next_index += 1
+        
+    @staticmethod
+    async def _stop_workers(workers: List[asyncio.Task]) -> None:
+        """Cancel pool workers and wait for them to finish."""
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        
+    def _is_fatal(self, error: Exception) -> bool:
+        """Decide whether a task error should stop the whole batch.
+        
+        With ``config.fail_fast`` every task error is fatal. Subclasses can
+        override this to stop only on specific errors.
+        """
+        return self.config.fail_fast
+        
+    @staticmethod
+    def _pool_metrics(tasks: List[ParallelTask], wall_time: float) -> Dict[str, Any]:
+        """Summarize throughput and latency of a worker pool run."""
+        latencies = sorted(
+            task.metadata["latency"] for task in tasks
+            if "latency" in task.metadata and not task.metadata.get("cancelled")
+        )
+        waits = [task.metadata["queue_wait"] for task in tasks if "queue_wait" in task.metadata]
+        failed = sum(1 for task in tasks if task.result is not None and task.result.startswith("Error:"))
+        
+        def percentile(p: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return latencies[max(0, math.ceil(p / 100.0 * len(latencies)) - 1)]
+            
+        return {
+            "tasks": len(tasks),
+            "completed": sum(1 for task in tasks if task.result is not None) - failed,
+            "failed": failed,
+            "cancelled": sum(1 for task in tasks if task.metadata.get("cancelled")),
+            "fast_failed": sum(1 for task in tasks if task.metadata.get("fast_failed")),
+            "wall_time": wall_time,
+            "throughput": len(latencies) / wall_time if wall_time > 0 else 0.0,
+            "latency_avg": sum(latencies) / len(latencies) if latencies else None,
+            "latency_p50": percentile(50),
+            "latency_p95": percentile(95),
+            "latency_max": latencies[-1] if latencies else None,
+            "queue_wait_avg": sum(waits) / len(waits) if waits else None
+        }
+            
+    def _record_result(self, task: ParallelTask, result: Any) -> None:
+        """Store a task's result, or its error if processing failed."""
+        if isinstance(result, Exception):
+            print(f"Error processing task {task.task_id}: {str(result)}")
+            task.result = f"Error: {str(result)}"
+            if isinstance(result, CircuitOpenError):
+                # The provider is degraded; the task was not sent
+                task.metadata["fast_failed"] = True
+        else:
+            task.result = result
+            
+    async def _process_task(self, task: ParallelTask) -> str:
+        """Process a single task (the worker pool applies the timeout)."""
+        try:
+            messages = self._task_messages(task.content)
+            coalesce = False if self.independent_samples else None
+            completion = await complete_with(self.client, messages, coalesce=coalesce)
+            return completion.text
+                
+        except CircuitOpenError:
+            raise
         except Exception as e:
             raise Exception(f"Error processing task {task.task_id}: {str(e)}")
             
+    def _task_messages(self, content: str) -> List[Dict[str, str]]:
+        """Build the request messages for a task."""
+        return [
+            {"role": "system", "content": "Process this task efficiently and accurately."},
+            {"role": "user", "content": content}
+        ]
+            
     async def _aggregate_results(self, tasks: List[ParallelTask]) -> str:
-        """Aggregate results based on configured strategy."""
+        """Aggregate results based on configured strategy.
+        
+        ``"concatenate"`` joins the results. ``"tree_reduce"`` synthesizes the
+        successful results with the client: batches of at most
+        ``aggregation_fan_in`` results and ``aggregation_max_tokens`` tokens
+        are merged in parallel, level by level, until one result remains.
+        """
         if self.config.aggregation_strategy == "concatenate":
             return "\n\n".join(task.result for task in tasks if task.result)
+        elif self.config.aggregation_strategy == "tree_reduce":
+            results = [task.result for task in tasks if task.result and not task.result.startswith("Error:")]
+            if not results:
+                return ""
+            return await tree_reduce(
+                results,
+                self._merge_results,
+                fan_in=self.config.aggregation_fan_in,
+                max_tokens=self.config.aggregation_max_tokens,
+                max_concurrency=self.config.max_concurrent_tasks
+            )
         else:
             raise ValueError(f"Unknown aggregation strategy: {self.config.aggregation_strategy}")
+            
+    async def _merge_results(self, results: List[str], final: bool) -> str:
+        """Merge a batch of results into one, as a partial or the final aggregate."""
+        if final:
+            instruction = "Combine these results into one coherent final result."
+        else:
+            instruction = ("Combine these results into one concise partial result that keeps every key point. "
+                           "It will be combined with other partial results later.")
+        messages = [
+            {"role": "system", "content": instruction},
+            {"role": "user", "content": "Results to combine:\n\n" + "\n\n".join(results)}
+        ]
+        result = await complete_with(self.client, messages)
+        return result.text
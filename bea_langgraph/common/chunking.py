@@ -0,0 +1,279 @@
+"""
+Token-aware chunking of markdown documents.
+
+This module provides:
+- A block parser that recognizes headings, fenced code, lists, tables and
+  paragraphs in a single pass over the lines
+- A chunker that packs adjacent blocks up to a token budget, keeps headings
+  with the content that follows them, never splits inside a code fence and
+  splits oversized lists, tables and paragraphs at item, row and sentence
+  boundaries
+- Optional overlap context carried over from the end of the previous chunk
+"""
+
+import math
+import re
+from typing import Callable, List, NamedTuple, Optional
+
+TokenCounter = Callable[[str], int]
+
+HEADING = "heading"
+CODE = "code"
+LIST = "list"
+TABLE = "table"
+PARAGRAPH = "paragraph"
+
+_FENCE = re.compile(r"^ {0,3}(`{3,}|~{3,})")
+# A fence at any indentation, e.g. inside a list item
+_NESTED_FENCE = re.compile(r"^\s*(?:`{3,}|~{3,})", re.MULTILINE)
+_HEADING = re.compile(r"^ {0,3}(#{1,6})(\s|$)")
+_LIST_ITEM = re.compile(r"^\s*(?:[-*+]|\d{1,9}[.)])\s+")
+_TABLE_ROW = re.compile(r"^\s*\|")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def estimate_tokens(text: str, chars_per_token: float = 4.0) -> int:
+    """Estimate the number of tokens in a text from its length."""
+    return math.ceil(len(text) / chars_per_token)
+
+
+class Block(NamedTuple):
+    """A structural unit of a markdown document."""
+    kind: str
+    text: str
+    level: int = 0
+
+
+class Chunk(NamedTuple):
+    """A group of blocks sized for one request."""
+    text: str
+    tokens: int
+    context: str = ""
+
+
+def parse_blocks(markdown: str) -> List[Block]:
+    """Split markdown into headings, code fences, lists, tables and paragraphs.
+
+    Args:
+        markdown: Document text
+
+    Returns:
+        Blocks in document order; blank lines between blocks are dropped
+    """
+    lines = markdown.splitlines()
+    blocks: List[Block] = []
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        if not line.strip():
+            i += 1
+            continue
+
+        fence = _FENCE.match(line)
+        if fence:
+            marker = fence.group(1)
+            end = i + 1
+            while end < len(lines):
+                closing = _FENCE.match(lines[end])
+                if closing and closing.group(1)[0] == marker[0] and len(closing.group(1)) >= len(marker) \
+                        and not lines[end].strip()[len(closing.group(1)):].strip():
+                    break
+                end += 1
+            # An unclosed fence runs to the end of the document
+            blocks.append(Block(CODE, "\n".join(lines[i:end + 1])))
+            i = end + 1
+            continue
+
+        heading = _HEADING.match(line)
+        if heading:
+            blocks.append(Block(HEADING, line.strip(), len(heading.group(1))))
+            i += 1
+            continue
+
+        if _TABLE_ROW.match(line):
+            end = i
+            while end < len(lines) and _TABLE_ROW.match(lines[end]):
+                end += 1
+            blocks.append(Block(TABLE, "\n".join(lines[i:end])))
+            i = end
+            continue
+
+        if _LIST_ITEM.match(line):
+            end = i + 1
+            while end < len(lines):
+                current = lines[end]
+                if current.strip():
+                    # Items and indented or lazy continuation lines stay in the list
+                    if _FENCE.match(current) and not current.startswith((" ", "\t")) \
+                            or _HEADING.match(current) or _TABLE_ROW.match(current):
+                        break
+                    end += 1
+                    continue
+                # A blank line continues the list only if an item or indented line follows
+                following = end + 1
+                while following < len(lines) and not lines[following].strip():
+                    following += 1
+                if following < len(lines) and (
+                    _LIST_ITEM.match(lines[following]) or lines[following].startswith((" ", "\t"))
+                ):
+                    end = following
+                    continue
+                break
+            blocks.append(Block(LIST, "\n".join(lines[i:end]).rstrip()))
+            i = end
+            continue
+
+        end = i + 1
+        while end < len(lines):
+            current = lines[end]
+            if not current.strip() or _FENCE.match(current) or _HEADING.match(current) \
+                    or _TABLE_ROW.match(current) or _LIST_ITEM.match(current):
+                break
+            end += 1
+        blocks.append(Block(PARAGRAPH, "\n".join(lines[i:end])))
+        i = end
+    return blocks
+
+
+def chunk_markdown(
+    markdown: str,
+    max_tokens: int = 1000,
+    overlap_tokens: int = 0,
+    count_tokens: Optional[TokenCounter] = None
+) -> List[Chunk]:
+    """Pack markdown blocks into chunks of at most ``max_tokens`` tokens.
+
+    Adjacent blocks are packed greedily. A heading is never the last block of
+    a chunk, so it stays with the content it introduces. Blocks larger than
+    the budget are split: lists by item, tables by row (repeating the header),
+    paragraphs by sentence and then by word. Code fences are never split and
+    may exceed the budget on their own; so may a list item containing one.
+
+    Args:
+        markdown: Document text
+        max_tokens: Token budget per chunk
+        overlap_tokens: Tokens of trailing prose from the previous chunk to
+            attach as context (0 for none)
+        count_tokens: Token counter (defaults to a length-based estimate)
+
+    Returns:
+        Chunks in document order
+    """
+    if max_tokens < 1:
+        raise ValueError("max_tokens must be at least 1")
+    count = count_tokens or estimate_tokens
+    pieces: List[Block] = []
+    for block in parse_blocks(markdown):
+        if block.kind == CODE or count(block.text) <= max_tokens:
+            pieces.append(block)
+        else:
+            pieces.extend(_split_block(block, max_tokens, count))
+
+    chunks: List[List[Block]] = []
+    current: List[Block] = []
+    current_tokens = 0
+    for block in pieces:
+        tokens = count(block.text)
+        # Blocks are joined with a blank line, roughly one token
+        if current and current_tokens + 1 + tokens > max_tokens:
+            carried: List[Block] = []
+            while current and current[-1].kind == HEADING:
+                carried.insert(0, current.pop())
+            if current:
+                chunks.append(current)
+            current = carried
+            current_tokens = sum(count(b.text) + 1 for b in current)
+        current.append(block)
+        current_tokens += tokens + (1 if len(current) > 1 else 0)
+    if current:
+        chunks.append(current)
+
+    result: List[Chunk] = []
+    previous: List[Block] = []
+    for blocks in chunks:
+        text = "\n\n".join(block.text for block in blocks)
+        context = _overlap(previous, overlap_tokens, count) if overlap_tokens > 0 else ""
+        result.append(Chunk(text, count(text), context))
+        previous = blocks
+    return result
+
+
+def _split_block(block: Block, max_tokens: int, count: TokenCounter) -> List[Block]:
+    """Split an oversized block at its natural boundaries."""
+    if block.kind == LIST:
+        units = _list_items(block.text)
+        return [Block(LIST, text) for text in _pack(units, max_tokens, count, "\n")]
+    if block.kind == TABLE:
+        rows = block.text.split("\n")
+        header = rows[:2] if len(rows) > 1 and set(rows[1].strip()) <= set("|-: ") else rows[:1]
+        body = rows[len(header):]
+        budget = max(1, max_tokens - count("\n".join(header)) - 1)
+        return [
+            Block(TABLE, "\n".join(header + [text]))
+            for text in _pack(body, budget, count, "\n")
+        ] or [block]
+    sentences = [s for s in _SENTENCE_END.split(block.text) if s]
+    return [Block(block.kind, text, block.level) for text in _pack(sentences, max_tokens, count, " ")]
+
+
+def _list_items(text: str) -> List[str]:
+    """Split a list block into top-level items with their continuation lines."""
+    lines = text.split("\n")
+    indent = len(lines[0]) - len(lines[0].lstrip())
+    items: List[List[str]] = []
+    for line in lines:
+        if _LIST_ITEM.match(line) and len(line) - len(line.lstrip()) <= indent or not items:
+            items.append([line])
+        else:
+            items[-1].append(line)
+    return ["\n".join(item).rstrip() for item in items]
+
+
+def _pack(units: List[str], max_tokens: int, count: TokenCounter, separator: str) -> List[str]:
+    """Greedily join units up to the budget, splitting single oversized units by word.
+
+    A unit containing a code fence is kept whole even if it is oversized.
+    """
+    packed: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+    for unit in units:
+        tokens = count(unit)
+        if tokens > max_tokens and not _NESTED_FENCE.search(unit):
+            words = unit.split(" ")
+            if len(words) > 1:
+                if current:
+                    packed.append(separator.join(current))
+                    current, current_tokens = [], 0
+                packed.extend(_pack(words, max_tokens, count, " "))
+                continue
+        if current and current_tokens + count(separator) + tokens > max_tokens:
+            packed.append(separator.join(current))
+            current, current_tokens = [], 0
+        current.append(unit)
+        current_tokens += tokens + (count(separator) if len(current) > 1 else 0)
+    if current:
+        packed.append(separator.join(current))
+    return packed
+
+
+def _overlap(blocks: List[Block], overlap_tokens: int, count: TokenCounter) -> str:
+    """Take trailing prose of a chunk, up to a token budget, as context."""
+    for block in reversed(blocks):
+        if block.kind in (CODE, TABLE, HEADING):
+            continue
+        sentences = [s for s in _SENTENCE_END.split(block.text) if s]
+        taken: List[str] = []
+        for sentence in reversed(sentences):
+            if taken and count(" ".join([sentence] + taken)) > overlap_tokens:
+                break
+            taken.insert(0, sentence)
+        context = " ".join(taken)
+        if count(context) > overlap_tokens:
+            # A single long sentence: keep its last words
+            words = context.split(" ")
+            while len(words) > 1 and count(" ".join(words)) > overlap_tokens:
+                words.pop(0)
+            context = " ".join(words)
+        return context
+    return ""
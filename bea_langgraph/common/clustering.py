@@ -0,0 +1,310 @@
+"""
+Approximate clustering of free-text answers.
+
+This module provides:
+- Answer extraction from responses that wrap the answer in explanation
+  ("Final answer: ...", ``\\boxed{...}``)
+- Canonicalization that removes case, punctuation, markup, articles and
+  number formatting differences
+- An incremental MinHash clusterer that groups near-duplicate answers with
+  locality-sensitive hashing, so each new answer is compared only against
+  the few answers sharing one of its hash bands instead of all previous ones.
+  Answers that differ in their numbers, option letters or negations are
+  never grouped, however similar their text
+"""
+
+import hashlib
+import re
+import unicodedata
+from typing import Dict, List, NamedTuple, Set
+
+_ANSWER_PATTERNS = [
+    re.compile(r"\\boxed\{([^{}]+)\}"),
+    re.compile(r"(?:final answer|answer)\s*(?:is)?\s*[:=-]\s*(.+)", re.IGNORECASE)
+]
+_MARKUP = re.compile(r"[*_`#>]+")
+_THOUSANDS = re.compile(r"(?<=\d),(?=\d{3}\b)")
+_DECIMAL = re.compile(r"\b(\d+)\.(\d*?)0+\b")
+_PUNCTUATION = re.compile(r"[^\w\s.]|(?<!\d)\.|\.(?!\d)")
+_ARTICLES = {"a", "an", "the"}
+_OPTION_LETTERS = set("abcde")
+_NEGATIONS = {
+    "not", "no", "never", "none", "nothing", "nobody", "nowhere", "neither", "nor",
+    "cannot", "without"
+}
+# Contractions lose their apostrophe during canonicalization: "isn't" -> "isn t"
+_CONTRACTED_NOT = re.compile(r"\b(?:\w+n t|isnt|arent|wasnt|werent|dont|doesnt|didnt|cant|couldnt"
+                             r"|wont|wouldnt|shouldnt|hasnt|havent|hadnt|mustnt)\b")
+
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def extract_answer(text: str) -> str:
+    """Pull the final answer out of a response.
+
+    Args:
+        text: Full response text
+
+    Returns:
+        The last explicitly marked answer, or the stripped text if none is marked
+    """
+    for pattern in _ANSWER_PATTERNS:
+        matches = pattern.findall(text)
+        if matches:
+            return matches[-1].strip()
+    return text.strip()
+
+
+def canonicalize(text: str) -> str:
+    """Normalize an answer so that trivially different spellings compare equal.
+
+    Args:
+        text: Answer text
+
+    Returns:
+        Case-folded text without markup, punctuation, articles or redundant
+        number formatting, with whitespace collapsed
+    """
+    text = unicodedata.normalize("NFKC", text).casefold()
+    text = _MARKUP.sub(" ", text)
+    text = _THOUSANDS.sub("", text)
+    text = _DECIMAL.sub(lambda m: m.group(1) + ("." + m.group(2) if m.group(2) else ""), text)
+    text = _PUNCTUATION.sub(" ", text)
+    words = text.split()
+    # Keep a final article: it may be the answer itself (e.g. "option A")
+    return " ".join(
+        word for i, word in enumerate(words) if word not in _ARTICLES or i == len(words) - 1
+    )
+
+
+def shingles(text: str, size: int = 3) -> Set[str]:
+    """Get the character shingles of a canonical answer."""
+    padded = f" {text} "
+    if len(padded) <= size:
+        return {padded}
+    return {padded[i:i + size] for i in range(len(padded) - size + 1)}
+
+
+def _markers(canonical: str) -> frozenset:
+    """Get the numbers and lone option letters of a canonical answer."""
+    return frozenset(
+        word for word in canonical.split()
+        if word in _OPTION_LETTERS or any(c.isdigit() for c in word)
+    )
+
+
+def _negations(canonical: str) -> frozenset:
+    """Get the negation words of a canonical answer, contractions as "not"."""
+    negations = {word for word in canonical.split() if word in _NEGATIONS}
+    if _CONTRACTED_NOT.search(canonical):
+        negations.add("not")
+    return frozenset(negations)
+
+
+class AnswerCluster(NamedTuple):
+    """A group of answers considered the same.
+
+    ``answers`` holds one example of each distinct canonical form in the group.
+    """
+    representative: str
+    size: int
+    answers: List[str]
+
+
+class _Node:
+    """Distinct canonical answer and its union-find links."""
+
+    __slots__ = (
+        "example", "count", "signature", "markers", "negations", "parent", "size", "best", "first"
+    )
+
+    def __init__(self, example: str, canonical: str, signature: List[int], order: int):
+        self.example = example
+        self.count = 0
+        self.signature = signature
+        self.markers = _markers(canonical)
+        self.negations = _negations(canonical)
+        self.parent = self
+        # Maintained on roots only: total votes, most common member and the
+        # creation order of the earliest member
+        self.size = 0
+        self.best = self
+        self.first = order
+
+
+class AnswerClusterer:
+    """Incremental near-duplicate grouping of answers with MinHash LSH.
+
+    Answers are extracted and canonicalized first; identical canonical forms
+    are counted together without hashing again. Each new canonical form gets
+    a MinHash signature split into ``bands`` bands, and is only compared with
+    forms that share a band. Forms whose estimated Jaccard similarity reaches
+    ``threshold`` are merged with union-find, so adding n answers takes time
+    close to linear in n unless most answers are near-duplicates of each other.
+    Answers mentioning different numbers or option letters (a-e), or negated
+    differently ("safe" and "not safe"), are never merged.
+
+    Example:
+        clusterer = AnswerClusterer()
+        for response in responses:
+            clusterer.add(response)
+        best = clusterer.clusters()[0]
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.6,
+        num_perm: int = 64,
+        bands: int = 16,
+        shingle_size: int = 3,
+        extract: bool = True
+    ):
+        """Initialize an empty clusterer.
+
+        Args:
+            threshold: Estimated Jaccard similarity at which answers are merged
+            num_perm: Number of MinHash permutations
+            bands: Number of LSH bands; must divide num_perm
+            shingle_size: Characters per shingle
+            extract: Whether to extract marked final answers before comparing
+        """
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError("threshold must be in (0, 1]")
+        if bands <= 0 or num_perm % bands:
+            raise ValueError("bands must divide num_perm")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.shingle_size = shingle_size
+        self.extract = extract
+        self._rows = num_perm // bands
+        seed = hashlib.blake2b(b"answer-clusterer", digest_size=8).digest()
+        state = int.from_bytes(seed, "big")
+        self._perms = []
+        for _ in range(num_perm):
+            state = (state * 6364136223846793005 + 1442695040888963407) % (1 << 64)
+            a = state % (_PRIME - 1) + 1
+            state = (state * 6364136223846793005 + 1442695040888963407) % (1 << 64)
+            self._perms.append((a, state % _PRIME))
+        self._nodes: Dict[str, _Node] = {}
+        self._roots: Dict[int, _Node] = {}
+        self._buckets: List[Dict[tuple, List[_Node]]] = [{} for _ in range(bands)]
+        self.comparisons = 0
+
+    def __len__(self) -> int:
+        """Get the number of answers added."""
+        return sum(node.count for node in self._nodes.values())
+
+    def add(self, text: str) -> str:
+        """Add an answer.
+
+        Args:
+            text: Response or answer text
+
+        Returns:
+            Representative answer of the cluster it joined
+        """
+        answer = extract_answer(text) if self.extract else text.strip()
+        canonical = canonicalize(answer)
+        node = self._nodes.get(canonical)
+        if node is None:
+            node = _Node(answer, canonical, self._signature(canonical), len(self._nodes))
+            self._nodes[canonical] = node
+            self._roots[id(node)] = node
+            self._link(node)
+        node.count += 1
+        root = self._find(node)
+        root.size += 1
+        if node.count > root.best.count:
+            root.best = node
+        return root.best.example
+
+    def clusters(self) -> List[AnswerCluster]:
+        """Get the clusters, largest first (earliest first on ties)."""
+        groups: Dict[int, List[_Node]] = {}
+        roots: Dict[int, _Node] = {}
+        for node in self._nodes.values():
+            root = self._find(node)
+            roots[id(root)] = root
+            groups.setdefault(id(root), []).append(node)
+        clusters = [
+            AnswerCluster(
+                representative=roots[key].best.example,
+                size=roots[key].size,
+                answers=[member.example for member in members]
+            )
+            for key, members in groups.items()
+        ]
+        clusters.sort(key=lambda cluster: -cluster.size)
+        return clusters
+
+    def counts(self) -> Dict[str, int]:
+        """Get cluster sizes keyed by representative answer, largest first.
+
+        Reads the sizes kept on the union-find roots, so it costs time in the
+        number of clusters rather than the number of answers.
+        """
+        roots = sorted(self._roots.values(), key=lambda root: (-root.size, root.first))
+        return {root.best.example: root.size for root in roots}
+
+    def _signature(self, canonical: str) -> List[int]:
+        """Compute the MinHash signature of a canonical answer."""
+        hashes = [
+            int.from_bytes(hashlib.blake2b(s.encode(), digest_size=4).digest(), "big")
+            for s in shingles(canonical, self.shingle_size)
+        ]
+        return [min((a * h + b) % _PRIME for h in hashes) & _MAX_HASH for a, b in self._perms]
+
+    def _link(self, node: _Node) -> None:
+        """Index a new node and merge it with similar nodes sharing a band."""
+        seen: Set[int] = set()
+        for band, buckets in enumerate(self._buckets):
+            key = tuple(node.signature[band * self._rows:(band + 1) * self._rows])
+            bucket = buckets.setdefault(key, [])
+            for other in bucket:
+                if id(other) in seen:
+                    continue
+                seen.add(id(other))
+                if self._find(other) is self._find(node):
+                    continue
+                self.comparisons += 1
+                # "Option 1" and "option 2", or "safe" and "not safe", are
+                # similar text but different answers
+                if (
+                    node.markers == other.markers
+                    and node.negations == other.negations
+                    and self._similarity(node, other) >= self.threshold
+                ):
+                    self._union(node, other)
+            bucket.append(node)
+
+    @staticmethod
+    def _similarity(first: _Node, second: _Node) -> float:
+        """Estimate the Jaccard similarity of two nodes from their signatures."""
+        same = sum(1 for x, y in zip(first.signature, second.signature) if x == y)
+        return same / len(first.signature)
+
+    @staticmethod
+    def _find(node: _Node) -> _Node:
+        """Find the root of a node's cluster, compressing the path."""
+        root = node
+        while root.parent is not root:
+            root = root.parent
+        while node.parent is not root:
+            node.parent, node = root, node.parent
+        return root
+
+    def _union(self, first: _Node, second: _Node) -> None:
+        """Merge the clusters of two nodes."""
+        first, second = self._find(first), self._find(second)
+        if first is second:
+            return
+        if first.size < second.size:
+            first, second = second, first
+        second.parent = first
+        del self._roots[id(second)]
+        first.size += second.size
+        first.first = min(first.first, second.first)
+        if second.best.count > first.best.count:
+            first.best = second.best
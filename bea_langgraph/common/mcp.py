@@ -7,6 +7,7 @@ following the Model Context Protocol specification.
 
 from typing import List, Optional, Dict, Any
 from pydantic import BaseModel, Field
+from .streaming import ThinkTagParser
 
 class Tool(BaseModel):
     """Model for tool specification."""
@@ -70,19 +71,28 @@ class MCPResponse(BaseModel):
         arbitrary_types_allowed = True
 
 def process_think_tags(response: str) -> MCPResponse:
-    """Process response text and extract think tags."""
-    think_process = []
+    """Process response text and extract think tags.
+    
+    Uses the same incremental parser as streaming responses. A think section
+    that is never closed is treated as regular content.
+    """
+    parser = ThinkTagParser()
+    events = parser.feed(response) + parser.close()
+    
+    think_blocks: Dict[int, List[str]] = {}
     content_parts = []
+    for event in events:
+        if event.kind == "think":
+            think_blocks.setdefault(event.block, []).append(event.text)
+        else:
+            content_parts.append(event.text)
     
-    # Split response into parts
-    parts = response.split("<think>")
-    for part in parts:
-        if "</think>" in part:
-            think_tag, content = part.split("</think>", 1)
-            think_process.append(think_tag.strip())
-            content_parts.append(content)
+    think_process = []
+    for block, parts in sorted(think_blocks.items()):
+        if block < parser.closed_blocks:
+            think_process.append("".join(parts).strip())
         else:
-            content_parts.append(part)
+            content_parts.extend(parts)
     
     return MCPResponse(
         content="".join(content_parts).strip(),
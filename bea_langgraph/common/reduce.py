@@ -0,0 +1,121 @@
+"""
+Hierarchical (tree) reduction of many texts into one.
+
+This module provides:
+- Batching of texts into consecutive groups bounded by a fan-in and a token
+  budget, so no combine prompt outgrows the context window
+- A tree reducer that combines the batches of each level in parallel and
+  repeats on the combined texts until a single result remains, so the number
+  of sequential combine calls grows with the logarithm of the input size
+  instead of the prompt growing with the input size
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from .chunking import TokenCounter, estimate_tokens
+
+Combine = Callable[[List[str], bool], Awaitable[str]]
+
+
+def batch_items(
+    items: List[str],
+    fan_in: Optional[int] = None,
+    max_tokens: Optional[int] = None,
+    count_tokens: Optional[TokenCounter] = None
+) -> List[List[str]]:
+    """Group consecutive items into batches.
+
+    A batch holds at most ``fan_in`` items whose tokens add up to at most
+    ``max_tokens``, except that every batch takes at least two items when
+    two are available, so each level of a reduction makes progress even when
+    single items exceed the budget.
+
+    Args:
+        items: Texts in order
+        fan_in: Maximum items per batch (None for no limit)
+        max_tokens: Token budget per batch (None for no limit)
+        count_tokens: Token counter (defaults to a length-based estimate)
+
+    Returns:
+        Batches in order
+    """
+    if fan_in is not None and fan_in < 2:
+        raise ValueError("fan_in must be at least 2")
+    count = count_tokens or estimate_tokens
+    batches: List[List[str]] = []
+    current: List[str] = []
+    current_tokens = 0
+    for item in items:
+        tokens = count(item)
+        full = fan_in is not None and len(current) >= fan_in
+        over = max_tokens is not None and current_tokens + tokens > max_tokens
+        if len(current) >= 2 and (full or over):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(item)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+async def tree_reduce(
+    items: List[str],
+    combine: Combine,
+    fan_in: Optional[int] = None,
+    max_tokens: Optional[int] = None,
+    count_tokens: Optional[TokenCounter] = None,
+    max_concurrency: Optional[int] = None,
+    stats: Optional[Dict[str, Any]] = None
+) -> str:
+    """Reduce texts to one by combining token-bounded batches level by level.
+
+    Each level splits the current texts with ``batch_items`` and combines the
+    batches concurrently; the combined texts, in order, form the next level.
+    A lone batch left over at an intermediate level is passed up unchanged.
+    The level with a single batch is the root and is combined with
+    ``final=True``, so callers can use a different prompt for the final
+    result. Without a fan-in or token limit this is one combine call over all
+    items.
+
+    Args:
+        items: Texts to reduce, in order
+        combine: Coroutine function taking a batch and whether it is the root
+        fan_in: Maximum texts combined per call (None for no limit)
+        max_tokens: Token budget of the texts combined per call (None for no limit)
+        count_tokens: Token counter (defaults to a length-based estimate)
+        max_concurrency: Limit on concurrent combine calls (None for no limit)
+        stats: Dictionary to fill with the number of levels, calls and the
+            batch count of each level
+
+    Returns:
+        Result of the root combine call
+    """
+    semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+    level_batches: List[int] = []
+    calls = 0
+
+    async def run(batch: List[str], final: bool) -> str:
+        if semaphore is None:
+            return await combine(batch, final)
+        async with semaphore:
+            return await combine(batch, final)
+
+    try:
+        current = list(items)
+        while True:
+            batches = batch_items(current, fan_in, max_tokens, count_tokens)
+            final = len(batches) <= 1
+            if final:
+                level_batches.append(1)
+                calls += 1
+                return await run(batches[0] if batches else [], True)
+            pending = [batch for batch in batches if len(batch) > 1]
+            level_batches.append(len(pending))
+            calls += len(pending)
+            combined = iter(await asyncio.gather(*[run(batch, False) for batch in pending]))
+            current = [next(combined) if len(batch) > 1 else batch[0] for batch in batches]
+    finally:
+        if stats is not None:
+            stats.update({"levels": len(level_batches), "calls": calls, "batches": level_batches})
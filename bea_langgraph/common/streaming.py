@@ -0,0 +1,239 @@
+"""
+Streaming response utilities.
+
+This module provides:
+- An accumulator for streamed completion chunks that keeps running statistics
+  up to date in constant time per chunk, so stop conditions can be checked
+  without re-joining the whole response on every chunk
+- An incremental think-tag parser that separates reasoning from content in a
+  single pass over arbitrarily split chunks
+"""
+
+from typing import Callable, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+StopPredicate = Callable[["StreamAccumulator"], bool]
+
+
+class StreamAccumulator:
+    """Linear-time accumulator for streamed text.
+
+    Tracks the total length, the number of newlines and the number of
+    paragraph breaks (non-overlapping ``"\\n\\n"`` occurrences, matching
+    ``str.count``) incrementally. The full text is only joined when requested.
+
+    Example:
+        accumulator = StreamAccumulator(
+            stop_when=lambda acc: acc.length > 200 and acc.paragraph_breaks >= 2
+        )
+        async for chunk in client.stream_completion(messages):
+            if accumulator.append(chunk):
+                break
+        document = accumulator.text
+    """
+
+    def __init__(self, stop_when: Optional[Union[StopPredicate, Iterable[StopPredicate]]] = None):
+        """Initialize an empty accumulator.
+
+        Args:
+            stop_when: Predicate, or list of predicates, evaluated after each
+                chunk; the stream should stop when any of them returns True
+        """
+        if stop_when is None:
+            self.stop_predicates: List[StopPredicate] = []
+        elif callable(stop_when):
+            self.stop_predicates = [stop_when]
+        else:
+            self.stop_predicates = list(stop_when)
+        self.length = 0
+        self.chunks = 0
+        self.newlines = 0
+        self.paragraph_breaks = 0
+        self._newline_run = 0
+        self._parts: List[str] = []
+        self._text: Optional[str] = ""
+
+    def append(self, chunk: str) -> bool:
+        """Add a chunk and report whether a stop predicate is satisfied.
+
+        Args:
+            chunk: Next piece of streamed text
+
+        Returns:
+            True if any stop predicate fired after adding the chunk
+        """
+        if chunk:
+            self._parts.append(chunk)
+            self._text = None
+            self.length += len(chunk)
+            self.chunks += 1
+            self._count_newlines(chunk)
+        return self.should_stop()
+
+    def should_stop(self) -> bool:
+        """Evaluate the stop predicates against the current statistics."""
+        for predicate in self.stop_predicates:
+            if predicate(self):
+                return True
+        return False
+
+    @property
+    def text(self) -> str:
+        """Get the accumulated text, joining pending chunks at most once."""
+        if self._text is None:
+            self._text = "".join(self._parts)
+            self._parts = [self._text]
+        return self._text
+
+    def __len__(self) -> int:
+        """Get the accumulated length in characters."""
+        return self.length
+
+    def __str__(self) -> str:
+        """Get the accumulated text."""
+        return self.text
+
+    def _count_newlines(self, chunk: str) -> None:
+        """Update newline and paragraph break counts for a chunk.
+
+        Newline runs may span chunks, so the length of the trailing run is
+        carried over; a run of k newlines contains k // 2 paragraph breaks.
+        """
+        count = chunk.count("\n")
+        if not count:
+            self._newline_run = 0
+            return
+        self.newlines += count
+
+        run = self._newline_run
+        body = chunk.lstrip("\n")
+        leading = len(chunk) - len(body)
+        if not body:
+            self.paragraph_breaks += (run + leading) // 2 - run // 2
+            self._newline_run = run + leading
+            return
+
+        self.paragraph_breaks += (run + leading) // 2 - run // 2
+        stripped = body.rstrip("\n")
+        trailing = len(body) - len(stripped)
+        self.paragraph_breaks += stripped.count("\n\n") + trailing // 2
+        self._newline_run = trailing
+
+
+class ThinkEvent(NamedTuple):
+    """Typed piece of a parsed response stream."""
+    kind: str  # "content" or "think"
+    text: str
+    block: int = -1  # Index of the enclosing think block for think events
+
+
+class ThinkTagParser:
+    """Incremental state machine separating think sections from content.
+
+    Chunks may be split at any point, including inside a tag; a trailing
+    partial tag is held back until the next chunk resolves it. Nested think
+    tags are tracked by depth and only text at depth zero is content. A stray
+    closing tag outside a think section is dropped. Each chunk is scanned once
+    and consecutive text of the same kind is emitted as a single event.
+    """
+
+    OPEN_TAG = "<think>"
+    CLOSE_TAG = "</think>"
+
+    def __init__(self, keep_think: bool = True):
+        """Initialize the parser.
+
+        Args:
+            keep_think: Emit think events; when False think text is skipped
+                without being buffered
+        """
+        self.keep_think = keep_think
+        self.depth = 0
+        self.blocks = 0
+        self.closed_blocks = 0
+        self.think_chars = 0
+        self._held = ""
+
+    @property
+    def in_think(self) -> bool:
+        """Check whether the parser is currently inside a think section."""
+        return self.depth > 0
+
+    def feed(self, chunk: str) -> List[ThinkEvent]:
+        """Parse a chunk and return the completed content and think events."""
+        if self._held:
+            chunk = self._held + chunk
+            self._held = ""
+        elif "<" not in chunk:
+            # Fast path: no tag can start in this chunk
+            if not chunk:
+                return []
+            if self.depth:
+                self.think_chars += len(chunk)
+                if not self.keep_think:
+                    return []
+                return [ThinkEvent("think", chunk, self.blocks - 1)]
+            return [ThinkEvent("content", chunk, -1)]
+        events: List[Tuple[str, int, List[str]]] = []
+        pos = 0
+        end = len(chunk)
+        while pos < end:
+            lt = chunk.find("<", pos)
+            if lt == -1:
+                self._emit(events, chunk[pos:])
+                break
+            if lt > pos:
+                self._emit(events, chunk[pos:lt])
+            if chunk.startswith(self.OPEN_TAG, lt):
+                if self.depth == 0:
+                    self.blocks += 1
+                self.depth += 1
+                pos = lt + len(self.OPEN_TAG)
+            elif chunk.startswith(self.CLOSE_TAG, lt):
+                if self.depth > 0:
+                    self.depth -= 1
+                    if self.depth == 0:
+                        self.closed_blocks += 1
+                pos = lt + len(self.CLOSE_TAG)
+            elif end - lt < len(self.CLOSE_TAG) and self._is_partial_tag(chunk, lt):
+                self._held = chunk[lt:]
+                break
+            else:
+                self._emit(events, "<")
+                pos = lt + 1
+        return self._join(events)
+
+    def close(self) -> List[ThinkEvent]:
+        """Flush held text at the end of the stream."""
+        events: List[Tuple[str, int, List[str]]] = []
+        if self._held:
+            held, self._held = self._held, ""
+            self._emit(events, held)
+        return self._join(events)
+
+    def _is_partial_tag(self, chunk: str, start: int) -> bool:
+        """Check whether the tail of a chunk could be the start of a tag."""
+        tail = chunk[start:]
+        return self.OPEN_TAG.startswith(tail) or self.CLOSE_TAG.startswith(tail)
+
+    def _emit(self, events: List[Tuple[str, int, List[str]]], text: str) -> None:
+        """Append text to the pending events, merging with the previous event.
+
+        Pending events hold their text as a list of parts, so an event made
+        of many pieces is joined once instead of being copied for each piece.
+        """
+        if self.depth:
+            self.think_chars += len(text)
+            if not self.keep_think:
+                return
+            kind, block = "think", self.blocks - 1
+        else:
+            kind, block = "content", -1
+        if events and events[-1][0] == kind and events[-1][1] == block:
+            events[-1][2].append(text)
+        else:
+            events.append((kind, block, [text]))
+
+    @staticmethod
+    def _join(events: List[Tuple[str, int, List[str]]]) -> List[ThinkEvent]:
+        """Build the events of a chunk from their pending parts."""
+        return [ThinkEvent(kind, "".join(parts), block) for kind, block, parts in events]
@@ -9,5 +9,8 @@ setup(
         "aiohttp",
         "pydantic==1.10.13",
         "typing-extensions>=4.5.0"
-    ]
+    ],
+    extras_require={
+        "fast": ["orjson"]
+    }
 )
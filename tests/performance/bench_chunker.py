@@ -0,0 +1,109 @@
+"""Benchmark for splitting documents into sections.
+
+Runs ``SectioningWorkflow`` over large synthetic documents with a simulated
+client whose latency is a fixed per-call overhead plus a per-token cost, and
+compares the blank-line splitter with the token-budgeted markdown chunker on
+call count, largest section and (simulated) wall time.
+
+Run from the repository root:
+    python -m tests.performance.bench_chunker
+"""
+
+import asyncio
+import random
+import time
+from typing import Dict, Optional
+
+from bea_langgraph.agents.basic_workflow.api.client import Completion
+from bea_langgraph.agents.parallelization.examples.sectioning.workflow import SectioningWorkflow
+from bea_langgraph.agents.parallelization.models import ParallelConfig
+from bea_langgraph.common.chunking import chunk_markdown, estimate_tokens
+
+CALL_OVERHEAD = 0.6     # Seconds of latency per request
+SECONDS_PER_TOKEN = 0.002
+TIME_SCALE = 0.005      # Simulated seconds are slept at this scale
+CONCURRENCY = 8
+SECTION_TOKENS = 1500
+
+WORDS = ["data", "model", "request", "latency", "section", "token", "budget",
+         "stream", "parallel", "worker", "result", "cache", "the", "and", "of"]
+
+
+def sentence(rng: random.Random) -> str:
+    """Build a random sentence."""
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 20))).capitalize() + "."
+
+
+def list_heavy(rng: random.Random) -> str:
+    """Checklists with loose items: every item is its own blank-line block."""
+    parts = []
+    for section in range(60):
+        parts.append(f"## Checklist {section}")
+        parts.extend(f"- {sentence(rng)}" for _ in range(25))
+    return "\n\n".join(parts)
+
+
+def dense_prose(rng: random.Random) -> str:
+    """A few very long paragraphs with no blank lines inside."""
+    return "\n\n".join(" ".join(sentence(rng) for _ in range(1200)) for _ in range(6))
+
+
+def mixed(rng: random.Random) -> str:
+    """Headings, short paragraphs, code and tables."""
+    parts = []
+    for section in range(150):
+        parts.append(f"# Part {section}")
+        parts.extend(sentence(rng) for _ in range(3))
+        parts.append("```python\ndef handler():\n\n    return compute()\n```")
+        parts.append("| key | value |\n|-----|-------|\n" + "\n".join(f"| k{i} | {i} |" for i in range(5)))
+    return "\n\n".join(parts)
+
+
+class SimulatedClient:
+    """Client whose latency grows with the prompt size."""
+
+    def __init__(self):
+        self.calls = 0
+        self.max_tokens = 0
+
+    async def complete(self, messages, **kwargs):
+        tokens = estimate_tokens(messages[-1]["content"])
+        self.calls += 1
+        self.max_tokens = max(self.max_tokens, tokens)
+        await asyncio.sleep((CALL_OVERHEAD + SECONDS_PER_TOKEN * tokens) * TIME_SCALE)
+        return Completion("ok")
+
+
+async def run(document: str, max_section_tokens: Optional[int]) -> Dict[str, float]:
+    """Process a document and return call count, largest prompt and simulated wall time."""
+    client = SimulatedClient()
+    workflow = SectioningWorkflow(
+        ParallelConfig(max_concurrent_tasks=CONCURRENCY, timeout_per_task=600),
+        client,
+        max_section_tokens=max_section_tokens
+    )
+    start = time.perf_counter()
+    await workflow.process_document(document, ["clarity"])
+    elapsed = time.perf_counter() - start
+    return {"calls": client.calls, "largest": client.max_tokens, "wall": elapsed / TIME_SCALE}
+
+
+def main() -> None:
+    rng = random.Random(0)
+    documents = [("list-heavy", list_heavy(rng)), ("dense prose", dense_prose(rng)), ("mixed", mixed(rng))]
+    print(f"{CONCURRENCY} concurrent calls, {CALL_OVERHEAD}s per call + {SECONDS_PER_TOKEN * 1000:.0f}ms per token")
+    for name, document in documents:
+        print(f"\n{name}: {estimate_tokens(document):,} tokens")
+        start = time.perf_counter()
+        chunk_markdown(document, SECTION_TOKENS)
+        print(f"  chunking time {1000 * (time.perf_counter() - start):.1f} ms")
+        for label, budget in [("blank lines", None), (f"chunker ({SECTION_TOKENS} tokens)", SECTION_TOKENS)]:
+            stats = asyncio.run(run(document, budget))
+            print(
+                f"  {label:24s} {stats['calls']:6,} calls  largest {stats['largest']:6,} tokens"
+                f"  simulated wall {stats['wall']:7.1f} s"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Microbenchmark for parsing streamed chat completion events.
+
+Compares the incremental ``SSEParser`` against the original per-line loop of
+``VeniceClient.stream_completion`` (decode, strip, ``json.loads`` and nested
+dict checks for every line).
+
+Run from the repository root:
+    python -m tests.performance.bench_sse_parser
+"""
+
+import json
+import time
+from typing import Iterable, List
+
+from bea_langgraph.agents.basic_workflow.api import sse
+from bea_langgraph.agents.basic_workflow.api.sse import SSEParser
+
+NUM_TOKENS = 200_000
+READ_SIZE = 4096
+REPEATS = 5
+
+
+def build_stream(num_tokens: int) -> bytes:
+    """Build a realistic event stream with one token per event."""
+    events = []
+    for i in range(num_tokens):
+        payload = {
+            "id": "chatcmpl-bench",
+            "object": "chat.completion.chunk",
+            "created": 1700000000,
+            "model": "deepseek-r1-671b",
+            "choices": [{"index": 0, "delta": {"content": f" tok{i % 100}"}, "finish_reason": None}]
+        }
+        events.append(b"data: " + json.dumps(payload).encode() + b"\n\n")
+    events.append(b"data: [DONE]\n\n")
+    return b"".join(events)
+
+
+def legacy_parse(lines: Iterable[bytes]) -> List[str]:
+    """Original per-line parsing loop, minus the network iteration."""
+    out = []
+    for line in lines:
+        if not line:
+            continue
+        chunk = line.decode('utf-8').strip()
+        if not chunk or chunk == 'data: [DONE]':
+            continue
+        if not chunk.startswith('data: '):
+            continue
+        try:
+            data = json.loads(chunk[6:])
+            if not isinstance(data, dict) or 'choices' not in data:
+                continue
+            if not data.get('choices') or not isinstance(data['choices'], list):
+                continue
+            delta = data['choices'][0].get('delta', {})
+            if not isinstance(delta, dict):
+                continue
+            content = delta.get('content', '')
+            if content:
+                out.append(content)
+        except json.JSONDecodeError:
+            pass
+    return out
+
+
+def incremental_parse(reads: Iterable[bytes]) -> List[str]:
+    """Parse raw network reads with the incremental parser."""
+    parser = SSEParser()
+    out = []
+    for raw in reads:
+        out.extend(parser.feed(raw))
+    out.extend(parser.close())
+    return out
+
+
+def best_of(func, data) -> float:
+    """Return the best wall time over several runs."""
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        func(data)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    stream = build_stream(NUM_TOKENS)
+    # The legacy loop is handed lines already split by aiohttp's readline,
+    # which flatters it; the incremental parser receives raw reads.
+    lines = stream.splitlines(keepends=True)
+    reads = [stream[i:i + READ_SIZE] for i in range(0, len(stream), READ_SIZE)]
+    assert legacy_parse(lines) == incremental_parse(reads)
+
+    results = {"legacy per-line loop": best_of(legacy_parse, lines)}
+    results[f"SSEParser ({sse._loads.__module__})"] = best_of(incremental_parse, reads)
+    original_loads = sse._loads
+    sse._loads = sse._json_loads
+    try:
+        results["SSEParser (json)"] = best_of(incremental_parse, reads)
+    finally:
+        sse._loads = original_loads
+
+    baseline = results["legacy per-line loop"]
+    print(f"{NUM_TOKENS} tokens, {len(stream) / 1e6:.1f} MB, {READ_SIZE}-byte reads")
+    for name, elapsed in results.items():
+        print(f"{name:28s} {NUM_TOKENS / elapsed:12,.0f} tokens/s  {baseline / elapsed:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Benchmark for streaming synthesis in the orchestrator.
+
+Runs ``OrchestratorWorkflow`` with barrier synthesis (one prompt after the
+last worker) and with streaming synthesis (results folded into a running
+synthesis as workers finish) against a simulated client. Worker durations
+are skewed so a few stragglers finish late; synthesis calls cost a fixed
+overhead plus time per prompt token (prefill) and per generated token
+(decode). Reports the synthesis time left after the last worker and the
+total wall time.
+
+Run from the repository root:
+    python -m tests.performance.bench_streaming_synthesis
+"""
+
+import asyncio
+import random
+from typing import Dict, List
+
+from bea_langgraph.agents.basic_workflow.api.client import Completion
+from bea_langgraph.agents.orchestrator.models import OrchestratorConfig, Task
+from bea_langgraph.agents.orchestrator.workflow import OrchestratorWorkflow
+from bea_langgraph.common.chunking import estimate_tokens
+
+CALL_OVERHEAD = 0.5       # Seconds of latency per request
+PREFILL_PER_TOKEN = 0.0005
+DECODE_PER_TOKEN = 0.01
+RESULT_TOKENS = 400       # Tokens per worker result
+PARTIAL_TOKENS = 300      # Tokens per running synthesis
+FINAL_TOKENS = 500        # Tokens in the final result
+TIME_SCALE = 0.01         # Simulated seconds are slept at this scale
+
+
+class SimulatedClient:
+    """Client with scripted worker durations and token-priced synthesis calls."""
+
+    def __init__(self, durations: List[float]):
+        self.durations = durations
+
+    async def complete(self, messages, **kwargs):
+        content = messages[-1]["content"]
+        if content.startswith("Task to break down"):
+            return Completion("\n".join(f"{i + 1}. Part {i}" for i in range(len(self.durations))))
+        if content.startswith("Synthesis so far"):
+            output = PARTIAL_TOKENS
+        elif content.startswith("Subtask results to synthesize"):
+            output = FINAL_TOKENS
+        else:
+            index = int(content.rsplit(" ", 1)[-1])
+            await asyncio.sleep(self.durations[index] * TIME_SCALE)
+            return Completion("word " * RESULT_TOKENS)
+        seconds = CALL_OVERHEAD + PREFILL_PER_TOKEN * estimate_tokens(content) + DECODE_PER_TOKEN * output
+        await asyncio.sleep(seconds * TIME_SCALE)
+        return Completion("word " * output)
+
+
+async def run(durations: List[float], streaming: bool) -> Dict[str, float]:
+    """Run one task and return simulated synthesis tail, wall time and merges."""
+    config = OrchestratorConfig(
+        max_subtasks=len(durations),
+        timeout_per_subtask=600,
+        synthesis_timeout=600,
+        streaming_synthesis=streaming
+    )
+    workflow = OrchestratorWorkflow(config, SimulatedClient(durations))
+    task = await workflow.execute(Task(description="Benchmark"))
+    return {
+        "tail": task.metadata["synthesis_time"] / TIME_SCALE,
+        "wall": task.metadata["elapsed"] / TIME_SCALE,
+        "merges": task.metadata.get("synthesis", {}).get("merges", 0)
+    }
+
+
+def main() -> None:
+    rng = random.Random(0)
+    print(
+        f"{CALL_OVERHEAD}s per call, {PREFILL_PER_TOKEN * 1000:.1f}ms per prompt token, "
+        f"{DECODE_PER_TOKEN * 1000:.0f}ms per generated token; {RESULT_TOKENS}-token results"
+    )
+    for count in (4, 8, 16, 32):
+        # Most workers take a few seconds, stragglers much longer
+        durations = [rng.lognormvariate(1.5, 0.6) for _ in range(count)]
+        barrier = asyncio.run(run(durations, streaming=False))
+        streaming = asyncio.run(run(durations, streaming=True))
+        saved = barrier["wall"] - streaming["wall"]
+        print(
+            f"\n{count} subtasks (slowest worker {max(durations):.1f} s)\n"
+            f"  barrier    synthesis after last worker {barrier['tail']:6.1f} s  wall {barrier['wall']:6.1f} s\n"
+            f"  streaming  synthesis after last worker {streaming['tail']:6.1f} s  wall {streaming['wall']:6.1f} s"
+            f"  ({streaming['merges']} merges)\n"
+            f"  saved {saved:.1f} s ({100 * saved / barrier['wall']:.0f}% of wall time)"
+        )
+
+
+if __name__ == "__main__":
+    main()
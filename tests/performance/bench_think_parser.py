@@ -0,0 +1,92 @@
+"""Benchmark for separating think sections from streamed content.
+
+Streams a multi-megabyte reasoning trace in token-sized chunks through the
+incremental ``ThinkTagParser`` and compares it with the original approach of
+buffering the full response and splitting it afterwards.
+
+Run from the repository root:
+    python -m tests.performance.bench_think_parser
+"""
+
+import random
+import time
+import tracemalloc
+from typing import List, Tuple
+
+from bea_langgraph.common.streaming import ThinkTagParser
+
+TRACE_MB = 8
+CHUNK_SIZE = 6  # Roughly one token per chunk
+
+
+def build_chunks(trace_mb: int) -> List[str]:
+    """Build a reasoning trace followed by an answer, split into chunks."""
+    rng = random.Random(0)
+    words = ["consider", "the", "case", "where", "x", "<", "y", "so", "hence", "therefore"]
+    reasoning = []
+    size = 0
+    while size < trace_mb * 1_000_000:
+        word = rng.choice(words)
+        reasoning.append(word)
+        size += len(word) + 1
+    text = "<think>" + " ".join(reasoning) + "</think>\n\nThe answer is 42."
+    return [text[i:i + CHUNK_SIZE] for i in range(0, len(text), CHUNK_SIZE)]
+
+
+def buffered_split(chunks: List[str]) -> Tuple[str, str]:
+    """Original approach: buffer the whole response, then split on tags."""
+    response = "".join(chunks)
+    think, content = [], []
+    for part in response.split("<think>"):
+        if "</think>" in part:
+            reasoning, rest = part.split("</think>", 1)
+            think.append(reasoning)
+            content.append(rest)
+        else:
+            content.append(part)
+    return "".join(content), "".join(think)
+
+
+def incremental(chunks: List[str], keep_think: bool) -> Tuple[str, str]:
+    """Parse chunk by chunk with the incremental state machine."""
+    parser = ThinkTagParser(keep_think=keep_think)
+    content, think = [], []
+    for chunk in chunks:
+        for event in parser.feed(chunk):
+            (think if event.kind == "think" else content).append(event.text)
+    for event in parser.close():
+        (think if event.kind == "think" else content).append(event.text)
+    return "".join(content), "".join(think)
+
+
+def measure(func, *args) -> Tuple[float, int]:
+    """Return wall time and peak traced memory, measured in separate runs."""
+    start = time.perf_counter()
+    func(*args)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main() -> None:
+    chunks = build_chunks(TRACE_MB)
+    total_mb = sum(len(c) for c in chunks) / 1e6
+    assert buffered_split(chunks) == incremental(chunks, True)
+    assert incremental(chunks, False)[0] == buffered_split(chunks)[0]
+
+    print(f"{total_mb:.1f} MB trace in {len(chunks):,} chunks of {CHUNK_SIZE} chars")
+    runs = [
+        ("buffer + split", buffered_split, (chunks,)),
+        ("ThinkTagParser (keep)", incremental, (chunks, True)),
+        ("ThinkTagParser (discard)", incremental, (chunks, False)),
+    ]
+    for name, func, args in runs:
+        elapsed, peak = measure(func, *args)
+        print(f"{name:26s} {total_mb / elapsed:8.1f} MB/s  peak {peak / 1e6:7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Tests for markdown-aware document chunking."""
+
+from bea_langgraph.common.chunking import (
+    CODE, HEADING, LIST, PARAGRAPH, TABLE,
+    chunk_markdown, estimate_tokens, parse_blocks
+)
+
+DOCUMENT = """# Guide
+
+Intro paragraph. It explains things.
+
+- first item
+- second item
+  with a continuation
+
+- third item
+
+```python
+def example():
+
+    return 1
+```
+
+| name | value |
+|------|-------|
+| a    | 1     |
+| b    | 2     |
+"""
+
+def test_parse_blocks():
+    """Test that markdown structures become single blocks."""
+    kinds = [block.kind for block in parse_blocks(DOCUMENT)]
+    assert kinds == [HEADING, PARAGRAPH, LIST, CODE, TABLE]
+    code = parse_blocks(DOCUMENT)[3]
+    assert "\n\n    return 1" in code.text
+
+def test_small_blocks_are_packed():
+    """Test that adjacent blocks share a chunk within the budget."""
+    chunks = chunk_markdown(DOCUMENT, max_tokens=1000)
+    assert len(chunks) == 1
+    assert chunks[0].tokens == estimate_tokens(chunks[0].text)
+
+def test_fences_are_never_split():
+    """Test that a code fence stays whole even when it exceeds the budget."""
+    code = "```\n" + "\n".join(f"line {i}" for i in range(200)) + "\n```"
+    chunks = chunk_markdown(f"Before.\n\n{code}\n\nAfter.", max_tokens=50)
+    assert any(chunk.text == code for chunk in chunks)
+    assert all(chunk.text.count("```") in (0, 2) for chunk in chunks)
+
+def test_fences_inside_list_items_are_never_split():
+    """Test that an oversized list item holding an indented code fence stays whole."""
+    code = "    ```\n" + "\n".join(f"    line {i}" for i in range(100)) + "\n    ```"
+    item = f"- setup steps:\n\n{code}"
+    chunks = chunk_markdown(f"- short item\n{item}\n- last item", max_tokens=50)
+    assert any(item in chunk.text for chunk in chunks)
+    assert all(chunk.text.count("```") in (0, 2) for chunk in chunks)
+
+def test_headings_stay_with_their_content():
+    """Test that a chunk never ends with a heading."""
+    document = "\n\n".join(f"## Part {i}\n\n" + "Some words here. " * 10 for i in range(10))
+    for chunk in chunk_markdown(document, max_tokens=60):
+        assert not chunk.text.rstrip().split("\n")[-1].startswith("#")
+
+def test_oversized_blocks_split_at_boundaries():
+    """Test splitting long lists by item and tables by row with the header repeated."""
+    items = "\n".join(f"- item number {i}" for i in range(100))
+    for chunk in chunk_markdown(items, max_tokens=40):
+        assert chunk.tokens <= 40
+        assert all(line.startswith("- ") for line in chunk.text.split("\n"))
+
+    table = "| k | v |\n|---|---|\n" + "\n".join(f"| {i} | {i * i} |" for i in range(100))
+    chunks = chunk_markdown(table, max_tokens=40)
+    assert len(chunks) > 1
+    assert all(chunk.text.startswith("| k | v |\n|---|---|") for chunk in chunks)
+
+def test_overlap_context():
+    """Test that trailing prose of the previous chunk is attached as context."""
+    document = "\n\n".join(f"Paragraph {i} starts. Paragraph {i} ends here." for i in range(3))
+    chunks = chunk_markdown(document, max_tokens=12, overlap_tokens=8)
+    assert chunks[0].context == ""
+    assert chunks[1].context == "Paragraph 0 ends here."
@@ -0,0 +1,89 @@
+"""Tests for answer normalization and near-duplicate clustering."""
+
+import random
+import string
+from bea_langgraph.common.clustering import AnswerClusterer, canonicalize, extract_answer
+
+def test_extract_answer():
+    """Test that marked answers are pulled out of explanations."""
+    assert extract_answer("Let me think.\nFinal answer: Paris") == "Paris"
+    assert extract_answer("So the result is \\boxed{42}.") == "42"
+    assert extract_answer("  Just text  ") == "Just text"
+
+def test_canonicalize():
+    """Test that formatting differences disappear."""
+    assert canonicalize("**The Answer**!") == canonicalize("answer")
+    assert canonicalize("1,000.50") == "1000.5"
+    assert canonicalize("3.0") == "3"
+    assert canonicalize("A") == "a"
+
+def test_near_duplicates_cluster_together():
+    """Test that paraphrased answers join one cluster with a representative."""
+    clusterer = AnswerClusterer()
+    for answer in [
+        "Use a hash map for constant-time lookups.",
+        "use a hash map for constant time lookups",
+        "Final answer: Use a hash map for constant-time lookups",
+        "Sort the array and use binary search"
+    ]:
+        clusterer.add(answer)
+    clusters = clusterer.clusters()
+    assert [cluster.size for cluster in clusters] == [3, 1]
+    assert clusters[0].representative == "Use a hash map for constant-time lookups."
+    assert len(clusterer) == 4
+
+def test_different_numbers_are_not_merged():
+    """Test that textually similar answers with different numbers stay apart."""
+    clusterer = AnswerClusterer()
+    clusterer.add("Option 1")
+    clusterer.add("option 2")
+    assert len(clusterer.clusters()) == 2
+
+def test_comparisons_scale_near_linearly():
+    """Test that unrelated answers are rarely compared with each other."""
+    rng = random.Random(0)
+    clusterer = AnswerClusterer()
+    for _ in range(500):
+        clusterer.add(" ".join("".join(rng.choices(string.ascii_lowercase, k=6)) for _ in range(4)))
+    assert len(clusterer.clusters()) == 500
+    assert clusterer.comparisons < 5 * 500
+
+def test_incremental_counts_match_clusters():
+    """Test that counts kept on the roots agree with a full rebuild after every add."""
+    rng = random.Random(1)
+    stems = ["use a hash map for lookups", "sort the array first", "Option 1", "option 2"]
+    clusterer = AnswerClusterer()
+    for _ in range(200):
+        stem = rng.choice(stems)
+        clusterer.add(stem if rng.random() < 0.5 else stem.upper() + "!")
+        counts = clusterer.counts()
+        clusters = clusterer.clusters()
+        assert counts == {cluster.representative: cluster.size for cluster in clusters}
+        assert list(counts) == [cluster.representative for cluster in clusters]
+
+def test_negated_answers_are_not_merged():
+    """Test that answers with opposite meanings stay in separate clusters."""
+    for first, second in [
+        ("It is safe to proceed.", "It is not safe to proceed."),
+        ("The function is thread-safe.", "The function is not thread-safe."),
+        ("Approve the merge", "Do not approve the merge"),
+        ("It is safe to deploy.", "It isn't safe to deploy.")
+    ]:
+        clusterer = AnswerClusterer()
+        clusterer.add(first)
+        clusterer.add(second)
+        assert len(clusterer.clusters()) == 2, (first, second)
+    
+    clusterer = AnswerClusterer()
+    clusterer.add("It isn't safe to deploy.")
+    clusterer.add("it is not safe to deploy")
+    assert len(clusterer.clusters()) == 1
+
+def test_option_letters_are_not_merged():
+    """Test that answers naming different options stay apart."""
+    assert canonicalize("Option A") == "option a"
+    clusterer = AnswerClusterer()
+    clusterer.add("Option A")
+    clusterer.add("option B")
+    clusterer.add("Final answer: option a.")
+    assert clusterer.counts() == {"Option A": 2, "option B": 1}
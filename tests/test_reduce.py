@@ -0,0 +1,76 @@
+"""Tests for hierarchical tree reduction."""
+
+import asyncio
+
+import pytest
+
+from bea_langgraph.common.reduce import batch_items, tree_reduce
+
+def test_batches_respect_fan_in_and_budget():
+    """Test that batches are cut at the fan-in or the token budget."""
+    items = ["a" * 40, "b" * 40, "c" * 40, "d" * 40, "e" * 40]  # 10 tokens each
+    assert batch_items(items, fan_in=2) == [items[0:2], items[2:4], items[4:]]
+    assert batch_items(items, max_tokens=30) == [items[0:3], items[3:]]
+    assert batch_items(items) == [items]
+
+def test_oversized_items_still_pair_up():
+    """Test that every batch takes two items so each level shrinks."""
+    items = ["x" * 400] * 4
+    assert batch_items(items, max_tokens=10) == [items[0:2], items[2:4]]
+    with pytest.raises(ValueError):
+        batch_items(items, fan_in=1)
+
+@pytest.mark.asyncio
+async def test_tree_reduce_combines_level_by_level():
+    """Test that batches are combined in parallel until one root remains."""
+    calls = []
+    active = 0
+    peak = 0
+
+    async def combine(parts, final):
+        nonlocal active, peak
+        calls.append((list(parts), final))
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return ("final" if final else "") + "(" + "+".join(parts) + ")"
+
+    stats = {}
+    result = await tree_reduce([str(i) for i in range(9)], combine, fan_in=3, stats=stats)
+
+    assert result == "final((0+1+2)+(3+4+5)+(6+7+8))"
+    assert stats == {"levels": 2, "calls": 4, "batches": [3, 1]}
+    assert peak == 3
+    assert [final for _, final in calls].count(True) == 1
+
+@pytest.mark.asyncio
+async def test_tree_reduce_passes_lone_batch_up():
+    """Test that a single leftover item is not combined on its own."""
+    calls = []
+
+    async def combine(parts, final):
+        calls.append(parts)
+        return "+".join(parts)
+
+    result = await tree_reduce(["a", "b", "c"], combine, fan_in=2)
+
+    assert result == "a+b+c"
+    assert calls == [["a", "b"], ["a+b", "c"]]
+
+@pytest.mark.asyncio
+async def test_tree_reduce_limits_concurrency():
+    """Test the bound on concurrent combine calls."""
+    active = 0
+    peak = 0
+
+    async def combine(parts, final):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return "x"
+
+    await tree_reduce(["a"] * 16, combine, fan_in=2, max_concurrency=2)
+    assert peak == 2
@@ -0,0 +1,103 @@
+"""Tests for streamed text accumulation."""
+
+import random
+from bea_langgraph.common.streaming import StreamAccumulator, ThinkTagParser
+
+def test_counts_match_full_text():
+    """Test incremental counts against recomputing on the joined text."""
+    rng = random.Random(0)
+    alphabet = ["a", "b", " ", "\n", "\n\n", "\n\n\n"]
+    for _ in range(200):
+        chunks = ["".join(rng.choice(alphabet) for _ in range(rng.randint(0, 6)))
+                  for _ in range(rng.randint(1, 30))]
+        acc = StreamAccumulator()
+        for chunk in chunks:
+            acc.append(chunk)
+        text = "".join(chunks)
+        assert acc.text == text
+        assert acc.length == len(text)
+        assert acc.newlines == text.count("\n")
+        assert acc.paragraph_breaks == text.count("\n\n")
+
+def test_newline_runs_across_chunks():
+    """Test paragraph breaks formed by newlines in separate chunks."""
+    acc = StreamAccumulator()
+    for chunk in ["para one\n", "\n", "\npara two\n", "\n"]:
+        acc.append(chunk)
+    assert acc.paragraph_breaks == "para one\n\n\npara two\n\n".count("\n\n")
+
+def test_stop_predicates():
+    """Test that stop predicates fire once their condition is met."""
+    acc = StreamAccumulator(stop_when=lambda a: a.length > 10 and a.paragraph_breaks >= 1)
+    assert not acc.append("short\n")
+    assert not acc.append("\nx")
+    assert acc.append("longer text")
+    
+    acc = StreamAccumulator(stop_when=[lambda a: a.newlines >= 5, lambda a: a.chunks >= 2])
+    assert not acc.append("one")
+    assert acc.append("two")
+
+def test_text_is_joined_lazily():
+    """Test that the text is cached until new chunks arrive."""
+    acc = StreamAccumulator()
+    acc.append("a")
+    acc.append("b")
+    assert acc.text is acc.text
+    acc.append("c")
+    assert str(acc) == "abc"
+    assert len(acc) == 3
+
+def parse(chunks, keep_think=True):
+    """Feed chunks through a think-tag parser and merge the events by kind."""
+    parser = ThinkTagParser(keep_think=keep_think)
+    events = []
+    for chunk in chunks:
+        events.extend(parser.feed(chunk))
+    events.extend(parser.close())
+    content = "".join(e.text for e in events if e.kind == "content")
+    think = "".join(e.text for e in events if e.kind == "think")
+    return content, think, parser
+
+def test_think_tags_split_at_every_offset():
+    """Test tags split across chunks at every possible position."""
+    text = "Intro <think>step one</think>Answer <b>bold</b> done"
+    for split in range(len(text) + 1):
+        content, think, _ = parse([text[:split], text[split:]])
+        assert content == "Intro Answer <b>bold</b> done"
+        assert think == "step one"
+    
+    content, think, _ = parse(list(text))
+    assert content == "Intro Answer <b>bold</b> done"
+    assert think == "step one"
+
+def test_nested_and_unterminated_think_tags():
+    """Test nested sections and a section left open at end of stream."""
+    content, think, parser = parse(["a<think>x<think>y</think>z</think>b"])
+    assert content == "ab"
+    assert think == "xyz"
+    assert parser.closed_blocks == 1
+    
+    content, think, parser = parse(["a<think>never closed"])
+    assert content == "a"
+    assert think == "never closed"
+    assert parser.in_think
+
+def test_discarded_think_text_is_not_emitted():
+    """Test that discard mode emits only content events."""
+    content, think, parser = parse(["<think>", "long reasoning " * 10, "</think>", "result"], keep_think=False)
+    assert content == "result"
+    assert think == ""
+    assert parser.think_chars == len("long reasoning " * 10)
+
+def test_partial_tag_at_end_is_flushed():
+    """Test that a held partial tag is emitted as text at end of stream."""
+    content, _, _ = parse(["value <", "/thi"])
+    assert content == "value </thi"
+
+def test_many_stray_brackets_form_one_event():
+    """Test that text broken up by many '<' characters is emitted as one event per kind."""
+    parser = ThinkTagParser()
+    events = parser.feed("a < b" * 1000 + "<think>x<y</think>z")
+    assert [(e.kind, e.text) for e in events] == [
+        ("content", "a < b" * 1000), ("think", "x<y"), ("content", "z")
+    ]